@@ -1,7 +1,15 @@
+import logging
 import threading
 
+from django.db import DatabaseError
+
 _user = threading.local()
 
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT al volcar los registros de auditoría de una petición
+AUDIT_BATCH_SIZE = 500
+
 class CurrentUserMiddleware:
     """
     Middleware que guarda temporalmente el usuario en el hilo actual
@@ -20,3 +28,58 @@ class CurrentUserMiddleware:
 def get_current_user():
     """Obtiene el usuario actual del hilo."""
     return getattr(_user, "value", None)
+
+
+class AuditBufferMiddleware:
+    """
+    Middleware que agrupa los registros de auditoría (AuthLogs) de la petición.
+
+    ``registrar_log_auditoria`` acumula los registros en
+    ``request._audit_buffer`` y aquí se insertan con un solo ``bulk_create``
+    al terminar la vista, en vez de un INSERT por cada acción registrada.
+
+    Si la vista falla (excepción o respuesta 5xx) el lote se descarta: la
+    transacción de ``AtomicTransactionMixin`` ya revirtió la acción y sus
+    registros no deben quedar. Las respuestas 4xx se auditan igual, porque
+    no revierten nada y pueden ser eventos de seguridad (login fallido).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._audit_buffer = []
+        try:
+            response = self.get_response(request)
+        finally:
+            buffer, request._audit_buffer = request._audit_buffer, None
+        if buffer:
+            if response.status_code >= 500:
+                logger.warning(
+                    "Se descartan %d logs de auditoría de una petición fallida (%s)",
+                    len(buffer), response.status_code,
+                )
+            else:
+                self._guardar(buffer)
+        return response
+
+    @staticmethod
+    def _guardar(buffer):
+        from core.utils.logging import obtener_accion_id, registrar_traza
+        from .models import AuthLogs
+
+        try:
+            acciones = {}
+            logs = []
+            for glosa, log in buffer:
+                if glosa not in acciones:
+                    acciones[glosa] = obtener_accion_id(glosa)
+                log.accion_id = acciones[glosa]
+                logs.append(log)
+            AuthLogs.objects.bulk_create(logs, batch_size=AUDIT_BATCH_SIZE)
+        except DatabaseError as e:
+            # Igual que registrar_log_auditoria: un error de la base de datos
+            # al auditar no debe romper la respuesta de la operación principal
+            logger.error(
+                "Error al guardar logs de auditoría de la petición: %s", e,
+                exc_info=registrar_traza(e),
+            )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_alter_persona_fecha_nacimiento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='authlogs',
+            name='auth_logs_usuario_15447e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='authlogs',
+            name='auth_logs_accion__2815c8_idx',
+        ),
+        migrations.AlterField(
+            model_name='authlogaccion',
+            name='glosa',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='authlogs',
+            name='accion',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='accounts.authlogaccion'),
+        ),
+        migrations.AlterField(
+            model_name='authlogs',
+            name='usuario',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='auth_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='authlogs',
+            index=models.Index(fields=['usuario', '-fecha_creacion'], name='auth_logs_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authlogs',
+            index=models.Index(fields=['accion', '-fecha_creacion'], name='auth_logs_accion_fecha_idx'),
+        ),
+    ]
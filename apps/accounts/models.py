@@ -52,7 +52,8 @@ class AuthUserEstado(models.Model):
 
 
 class AuthLogAccion(models.Model):
-    glosa = models.CharField(max_length=200)
+    # Indexada: el registro de auditoría busca la acción por glosa
+    glosa = models.CharField(max_length=200, db_index=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     activo = models.BooleanField(default=True)
@@ -73,9 +74,13 @@ class AuthLogs(models.Model):
         blank=True,
         on_delete=models.SET_NULL,
         related_name="auth_logs",
+        db_index=False,  # cubierto por auth_logs_usuario_fecha_idx
     )
     accion = models.ForeignKey(
-        AuthLogAccion, on_delete=models.PROTECT, related_name="logs"
+        AuthLogAccion,
+        on_delete=models.PROTECT,
+        related_name="logs",
+        db_index=False,  # cubierto por auth_logs_accion_fecha_idx
     )
     descripcion = models.TextField(blank=True)
     ip_usuario = models.GenericIPAddressField(null=True, blank=True)
@@ -87,9 +92,12 @@ class AuthLogs(models.Model):
         db_table = "auth_logs"
         verbose_name = "Log de autenticación"
         verbose_name_plural = "Logs de autenticación"
+        # Tabla de solo inserción: cada índice se paga en cada INSERT. Los
+        # filtros por usuario/acción del listado ordenan por fecha, así que
+        # van compuestos con ella y reemplazan a los índices simples de FK.
         indexes = [
-            models.Index(fields=["usuario"]),
-            models.Index(fields=["accion"]),
+            models.Index(fields=["usuario", "-fecha_creacion"], name="auth_logs_usuario_fecha_idx"),
+            models.Index(fields=["accion", "-fecha_creacion"], name="auth_logs_accion_fecha_idx"),
             models.Index(fields=["-fecha_creacion"]),
         ]
 
@@ -5,7 +5,8 @@ from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
 from django.contrib.auth.models import User
-from .models import AuthLogs, AuthLogAccion, HistorialLogin, UserAccessProfile
+from core.utils import registrar_log_auditoria
+from .models import HistorialLogin, UserAccessProfile
 from .utils import get_client_ip
 from .middleware import get_current_user
 
@@ -24,19 +25,9 @@ def log_user_login(sender, request, user, **kwargs):
     if hasattr(request, 'session'):
         session_key = request.session.session_key
 
-    # Obtener o crear la acción de login
-    accion, created = AuthLogAccion.objects.get_or_create(
-        glosa="LOGIN",
-        defaults={'activo': True}
-    )
-
-    # Crear log de autenticación
-    AuthLogs.objects.create(
-        accion=accion,
-        usuario=user,
-        descripcion=f"Usuario {user.username} inició sesión exitosamente.",
-        ip_usuario=ip,
-        agente=agente,
+    # Crear log de autenticación (en lote con los demás de la petición)
+    registrar_log_auditoria(
+        user, "LOGIN", f"Usuario {user.username} inició sesión exitosamente.", request
     )
 
     # Crear registro en historial de login
@@ -52,42 +43,22 @@ def log_user_login(sender, request, user, **kwargs):
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
     """Registra el logout del usuario."""
-    ip = get_client_ip(request)
-    agente = request.META.get("HTTP_USER_AGENT", "")
-
-    # Obtener o crear la acción de logout
-    accion, created = AuthLogAccion.objects.get_or_create(
-        glosa="LOGOUT",
-        defaults={'activo': True}
-    )
-
-    AuthLogs.objects.create(
-        accion=accion,
-        usuario=user if user and user.is_authenticated else None,
-        descripcion=f"Usuario {getattr(user, 'username', 'Anónimo')} cerró sesión.",
-        ip_usuario=ip,
-        agente=agente,
+    registrar_log_auditoria(
+        user if user and user.is_authenticated else None,
+        "LOGOUT",
+        f"Usuario {getattr(user, 'username', 'Anónimo')} cerró sesión.",
+        request,
     )
 
 
 @receiver(user_login_failed)
 def log_user_login_failed(sender, credentials, request, **kwargs):
     """Registra intentos de login fallidos."""
-    ip = get_client_ip(request)
-    agente = request.META.get("HTTP_USER_AGENT", "")
-
-    # Obtener o crear la acción de login fallido
-    accion, created = AuthLogAccion.objects.get_or_create(
-        glosa="LOGIN_FALLIDO",
-        defaults={'activo': True}
-    )
-
-    AuthLogs.objects.create(
-        accion=accion,
-        usuario=None,
-        descripcion=f"Intento fallido de login con usuario: {credentials.get('username')}",
-        ip_usuario=ip,
-        agente=agente,
+    registrar_log_auditoria(
+        None,
+        "LOGIN_FALLIDO",
+        f"Intento fallido de login con usuario: {credentials.get('username')}",
+        request,
     )
 
 
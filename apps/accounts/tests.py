@@ -661,6 +661,18 @@ class GetClientIPTest(TestCase):
         ip = get_client_ip(request)
         self.assertEqual(ip, '203.0.113.1')
 
+    def test_ip_se_calcula_una_vez_por_request(self):
+        """
+        Test: La IP se memoriza en el request.
+        Criterio: Llamadas posteriores no vuelven a leer las cabeceras.
+        """
+        request = self.factory.get('/')
+        request.META['HTTP_X_FORWARDED_FOR'] = '203.0.113.1, 198.51.100.1'
+
+        self.assertEqual(get_client_ip(request), '203.0.113.1')
+        request.META['HTTP_X_FORWARDED_FOR'] = '198.51.100.9'
+        self.assertEqual(get_client_ip(request), '203.0.113.1')
+
     def test_manejar_request_none(self):
         """
         Test: Debe manejar request=None sin fallar.
@@ -681,6 +693,158 @@ class GetClientIPTest(TestCase):
         self.assertEqual(ip, '')
 
 
+class AuditBufferMiddlewareTest(TestCase):
+    """
+    Tests para AuditBufferMiddleware.
+    Valida que los logs de una petición se inserten juntos al final.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username='auditado', password='x')
+
+    def test_logs_de_la_peticion_se_insertan_en_lote(self):
+        """
+        Test: Los logs se acumulan durante la vista y se insertan al terminarla.
+        Criterio: Un solo INSERT para todos los logs de la petición.
+        """
+        from django.http import HttpResponse
+        from apps.accounts.middleware import AuditBufferMiddleware
+        from core.utils import registrar_log_auditoria
+
+        AuthLogAccion.objects.create(glosa='EDITAR')
+        durante_la_vista = []
+
+        def vista(request):
+            for i in range(3):
+                registrar_log_auditoria(self.user, 'EDITAR', f'Cambio {i}', request)
+            durante_la_vista.append(AuthLogs.objects.count())
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        middleware = AuditBufferMiddleware(vista)
+        # Conteo de la vista + 1 lectura de la acción + 1 INSERT
+        with self.assertNumQueries(3):
+            middleware(request)
+
+        self.assertEqual(durante_la_vista, [0])
+        self.assertEqual(
+            list(AuthLogs.objects.order_by('id').values_list('descripcion', flat=True)),
+            ['Cambio 0', 'Cambio 1', 'Cambio 2'],
+        )
+        self.assertIsNone(request._audit_buffer)
+
+    def test_logs_de_una_peticion_fallida_se_descartan(self):
+        """
+        Test: Una vista que falla no deja los logs de la acción revertida.
+        Criterio: Respuesta 5xx sin AuthLogs; una 4xx se audita igual.
+        """
+        from django.http import HttpResponse, HttpResponseForbidden
+        from apps.accounts.middleware import AuditBufferMiddleware
+        from core.utils import registrar_log_auditoria
+
+        def vista_fallida(request):
+            registrar_log_auditoria(self.user, 'EDITAR', 'Cambio revertido', request)
+            return HttpResponse(status=500)
+
+        def vista_denegada(request):
+            registrar_log_auditoria(self.user, 'ACCESO_DENEGADO', 'Sin permiso', request)
+            return HttpResponseForbidden()
+
+        with self.assertLogs('apps.accounts.middleware', level='WARNING'):
+            AuditBufferMiddleware(vista_fallida)(self.factory.post('/'))
+        AuditBufferMiddleware(vista_denegada)(self.factory.get('/'))
+
+        self.assertEqual(
+            list(AuthLogs.objects.values_list('descripcion', flat=True)), ['Sin permiso']
+        )
+
+    def test_logs_en_lote_fuera_de_una_peticion(self):
+        """
+        Test: registrar_logs_auditoria inserta varios eventos de una vez.
+        Criterio: Una lectura de la acción y un INSERT para todos los eventos.
+        """
+        from core.utils import registrar_logs_auditoria
+
+        AuthLogAccion.objects.create(glosa='IMPORTAR')
+        request = self.factory.get('/')
+
+        with self.assertNumQueries(2):
+            registrar_logs_auditoria(
+                self.user, 'importar', ['Fila 1', 'Fila 2', 'Fila 3'], request,
+                metas=[{'fila': 1}, {'fila': 2}, {'fila': 3}],
+            )
+
+        self.assertEqual(
+            list(AuthLogs.objects.order_by('id').values_list('descripcion', 'meta')),
+            [('Fila 1', {'fila': 1}), ('Fila 2', {'fila': 2}), ('Fila 3', {'fila': 3})],
+        )
+
+    def test_glosa_repetida_usa_la_accion_mas_antigua(self):
+        """
+        Test: Una glosa duplicada en el catálogo no rompe la auditoría.
+        Criterio: El log se asocia a la primera acción, sin MultipleObjectsReturned.
+        """
+        from core.utils import registrar_log_auditoria
+
+        primera = AuthLogAccion.objects.create(glosa='EDITAR')
+        AuthLogAccion.objects.create(glosa='EDITAR')
+
+        registrar_log_auditoria(self.user, 'EDITAR', 'Editó artículo', self.factory.get('/'))
+
+        self.assertEqual(AuthLogs.objects.get().accion_id, primera.pk)
+
+    @override_settings(AUDIT_SAMPLE_RATES={'CONSULTAR': 0.5, 'LISTAR': 0})
+    def test_acciones_muestreadas_segun_configuracion(self):
+        """
+        Test: AUDIT_SAMPLE_RATES descarta eventos de las acciones configuradas.
+        Criterio: Tasa 0 no consulta la base; tasa 0.5 guarda según el sorteo.
+        """
+        from unittest import mock
+        from core.utils import registrar_log_auditoria, registrar_logs_auditoria
+
+        request = self.factory.get('/')
+        with self.assertNumQueries(0):
+            registrar_log_auditoria(self.user, 'listar', 'Listado', request)
+
+        with mock.patch('core.utils.logging.random.random', side_effect=[0.2, 0.7, 0.4]):
+            registrar_logs_auditoria(self.user, 'CONSULTAR', ['A', 'B', 'C'], request)
+
+        self.assertEqual(
+            list(AuthLogs.objects.order_by('id').values_list('descripcion', flat=True)),
+            ['A', 'C'],
+        )
+
+    def test_traza_de_error_una_vez_por_tipo_e_intervalo(self):
+        """
+        Test: Con errores repetidos la traza se registra solo la primera vez.
+        Criterio: Se limita por tipo de excepción dentro del intervalo.
+        """
+        from core.utils import logging as audit_logging
+
+        self.addCleanup(audit_logging._ultima_traza.clear)
+        self.assertTrue(audit_logging.registrar_traza(ValueError('caída')))
+        self.assertFalse(audit_logging.registrar_traza(ValueError('caída')))
+        self.assertTrue(audit_logging.registrar_traza(KeyError('otra')))
+
+    def test_usuario_anonimo_no_genera_log(self):
+        """
+        Test: Un AnonymousUser no genera auditoría; usuario=None sí.
+        Criterio: El anónimo no consulta la base; el login fallido se registra.
+        """
+        from django.contrib.auth.models import AnonymousUser
+        from core.utils import registrar_log_auditoria
+
+        request = self.factory.get('/')
+        with self.assertNumQueries(0):
+            registrar_log_auditoria(AnonymousUser(), 'CONSULTAR', 'Anónimo', request)
+        registrar_log_auditoria(None, 'LOGIN_FALLIDO', 'Intento fallido', request)
+
+        self.assertEqual(
+            list(AuthLogs.objects.values_list('descripcion', flat=True)),
+            ['Intento fallido'],
+        )
+
 # ============================================================================
 # TESTS DE SIGNALS (Señales de Django)
 # ============================================================================
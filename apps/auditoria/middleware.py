@@ -44,6 +44,31 @@ class AuditoriaMiddleware(MiddlewareMixin):
         return None
 
 
+def _serializar_campos(instance) -> dict:
+    """
+    Serializa los campos cargados de la instancia para la auditoría.
+
+    Las FKs se registran como ``Modelo:pk`` a partir de su columna ``*_id``,
+    sin cargar el objeto relacionado, y los campos diferidos (``only``/
+    ``defer``) se omiten: leerlos dispararía una consulta por campo.
+    """
+    diferidos = instance.get_deferred_fields()
+    datos = {}
+    for field in instance._meta.fields:
+        if field.name.startswith('_') or field.attname in diferidos:
+            continue
+        try:
+            valor = getattr(instance, field.attname)
+            # Convertir a string para serialización JSON
+            if field.is_relation and valor is not None:
+                datos[field.name] = f"{field.related_model.__name__}:{valor}"
+            else:
+                datos[field.name] = str(valor) if valor is not None else None
+        except Exception:
+            pass
+    return datos
+
+
 def registrar_auditoria_automatica(sender, instance, created, **kwargs):
     """
     Handler de señal que registra automáticamente creaciones y actualizaciones.
@@ -64,18 +89,7 @@ def registrar_auditoria_automatica(sender, instance, created, **kwargs):
     accion = AuditoriaAccion.CREAR if created else AuditoriaAccion.ACTUALIZAR
     
     # Obtener el estado actual del objeto
-    datos_nuevos = {}
-    for field in instance._meta.fields:
-        if not field.name.startswith('_'):
-            try:
-                valor = getattr(instance, field.name)
-                # Convertir a string para serialización JSON
-                if hasattr(valor, 'pk'):
-                    datos_nuevos[field.name] = f"{valor.__class__.__name__}:{valor.pk}"
-                else:
-                    datos_nuevos[field.name] = str(valor) if valor is not None else None
-            except:
-                pass
+    datos_nuevos = _serializar_campos(instance)
     
     #  Registrar en la auditoría
     try:
@@ -112,17 +126,7 @@ def registrar_eliminacion_automatica(sender, instance, **kwargs):
     request = get_current_request()
     
     # Obtener el estado del objeto antes de eliminar
-    datos_anteriores = {}
-    for field in instance._meta.fields:
-        if not field.name.startswith('_'):
-            try:
-                valor = getattr(instance, field.name)
-                if hasattr(valor, 'pk'):
-                    datos_anteriores[field.name] = f"{valor.__class__.__name__}:{valor.pk}"
-                else:
-                    datos_anteriores[field.name] = str(valor) if valor is not None else None
-            except:
-                pass
+    datos_anteriores = _serializar_campos(instance)
     
     # Registrar en la auditoría
     try:
@@ -4,10 +4,25 @@ Service Layer para importacion de datos desde Excel.
 Contiene la logica de negocio para importar mantenedores desde archivos Excel.
 Sigue Clean Architecture: separacion de responsabilidades.
 """
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from openpyxl import load_workbook
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.utils import timezone
+
+from core.utils.business import clave_orden_natural
+from core.utils.signals import emitir_post_save
+
+
+# Filas por sentencia en las importaciones masivas (un INSERT/UPDATE por lote)
+LOTE_IMPORTACION = 500
+
+# Ultima fila cubierta por las listas desplegables de las plantillas
+FILAS_PLANTILLA = 1000
+
+# Maximo de filas de datos aceptadas al importar un catalogo de configuracion;
+# la importacion corre dentro de la peticion, asi que se acota su duracion
+MAX_FILAS_CATALOGO = 5000
 
 
 class ImportacionExcelService:
@@ -45,7 +60,9 @@ class ImportacionExcelService:
             return False, f"Error al leer el archivo: {str(e)}"
     
     @staticmethod
-    def leer_datos_desde_excel(archivo, columnas_esperadas: List[str], fila_inicio: int = 2) -> List[Dict[str, Any]]:
+    def leer_datos_desde_excel(
+        archivo, columnas_esperadas: List[str], fila_inicio: int = 2, max_filas: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Lee datos desde un archivo Excel.
         
@@ -53,45 +70,69 @@ class ImportacionExcelService:
             archivo: Archivo Excel subido
             columnas_esperadas: Lista de nombres de columnas esperadas
             fila_inicio: Fila donde comienzan los datos (default: 2, asumiendo fila 1 es encabezado)
+            max_filas: Maximo de filas de datos; si se supera se corta la lectura
+                con ValidationError (default: sin limite)
             
         Returns:
             Lista de diccionarios con los datos leidos
         """
-        wb = load_workbook(archivo, read_only=True)
-        ws = wb.active
-        
-        datos = []
-        
-        # Leer encabezados de la primera fila
-        encabezados = []
-        for cell in ws[1]:
-            encabezados.append(cell.value if cell.value else "")
-        
-        # Validar que las columnas esperadas esten presentes
-        columnas_faltantes = [col for col in columnas_esperadas if col not in encabezados]
-        if columnas_faltantes:
-            wb.close()
-            raise ValidationError(f"Columnas faltantes en el archivo: {', '.join(columnas_faltantes)}")
-        
-        # Leer datos desde la fila de inicio
-        for row in ws.iter_rows(min_row=fila_inicio, values_only=False):
-            # Saltar filas vacias
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
+        # Modo solo lectura: las filas se recorren en streaming desde el zip en
+        # vez de cargar todas las celdas en memoria; data_only entrega el valor
+        # calculado de las formulas en lugar de su texto.
+        wb = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            
+            # Leer encabezados de la primera fila
+            primera = next(ws.iter_rows(max_row=1, values_only=True), ())
+            encabezados = [valor if valor else "" for valor in primera]
             
-            # Crear diccionario con los datos de la fila
-            fila_data = {}
-            for idx, header in enumerate(encabezados):
-                if idx < len(row):
-                    valor = row[idx].value
-                    # Convertir None a string vacio
-                    fila_data[header] = str(valor).strip() if valor is not None else ""
+            # Validar que las columnas esperadas esten presentes
+            columnas_faltantes = [col for col in columnas_esperadas if col not in encabezados]
+            if columnas_faltantes:
+                raise ValidationError(f"Columnas faltantes en el archivo: {', '.join(columnas_faltantes)}")
             
-            datos.append(fila_data)
+            datos = []
+            
+            # Leer datos desde la fila de inicio
+            for row in ws.iter_rows(min_row=fila_inicio, values_only=True):
+                # Saltar filas vacias
+                if all(valor is None or str(valor).strip() == "" for valor in row):
+                    continue
+                
+                if max_filas is not None and len(datos) >= max_filas:
+                    raise ValidationError(f"El archivo supera el maximo de {max_filas} filas")
+                
+                # Crear diccionario con los datos de la fila (None como string vacio)
+                datos.append({
+                    header: str(valor).strip() if valor is not None else ""
+                    for header, valor in zip(encabezados, row)
+                })
+        finally:
+            wb.close()
         
-        wb.close()
         return datos
     
+    @staticmethod
+    def _agregar_lista_si_no(ws, columnas: List[str]) -> None:
+        """
+        Agrega una lista desplegable SI/NO a las columnas indicadas.
+
+        Se registra una sola validacion con un rango por columna
+        (``D2:D1000``) en vez de una por celda, que Excel abre lento y a
+        veces reporta como archivo danado.
+
+        Args:
+            ws: Hoja de la plantilla
+            columnas: Letras de las columnas SI/NO (ej: ['D', 'E'])
+        """
+        from openpyxl.worksheet.datavalidation import DataValidation
+        
+        dv = DataValidation(type='list', formula1='"SI,NO"', allow_blank=True)
+        for columna in columnas:
+            dv.add(f'{columna}2:{columna}{FILAS_PLANTILLA}')
+        ws.add_data_validation(dv)
+    
     @staticmethod
     def importar_marcas(archivo, usuario) -> Tuple[int, int, List[str]]:
         """
@@ -369,8 +410,13 @@ class ImportacionExcelService:
     # ==================== METODOS PARA SOLICITUDES ====================
     
     @staticmethod
-    def generar_plantilla_tipos_solicitud() -> bytes:
-        """Genera plantilla de tipos de solicitud con datos reales."""
+    def generar_plantilla_tipos_solicitud(stream=None) -> Optional[bytes]:
+        """
+        Genera plantilla de tipos de solicitud con datos reales.
+
+        Si se indica ``stream`` (archivo binario), el libro se escribe ahi y no
+        se retorna contenido; si no, se retorna como bytes.
+        """
         from openpyxl import Workbook
         from openpyxl.styles import Font, Alignment
         from io import BytesIO
@@ -396,6 +442,8 @@ class ImportacionExcelService:
             ws.cell(row=row_idx, column=4, value='SI' if tipo.requiere_aprobacion else 'NO')
             ws.cell(row=row_idx, column=5, value='SI' if tipo.activo else 'NO')
         
+        ImportacionExcelService._agregar_lista_si_no(ws, ['D', 'E'])
+        
         # Ajustar ancho de columnas
         ws.column_dimensions['A'].width = 15
         ws.column_dimensions['B'].width = 30
@@ -403,6 +451,10 @@ class ImportacionExcelService:
         ws.column_dimensions['D'].width = 20
         ws.column_dimensions['E'].width = 10
         
+        if stream is not None:
+            wb.save(stream)
+            return None
+        
         output = BytesIO()
         wb.save(output)
         output.seek(0)
@@ -411,58 +463,135 @@ class ImportacionExcelService:
         
         return contenido
     
+    @staticmethod
+    def _limpiar_fila(modelo, valores: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valida y convierte los valores de una fila con los campos del modelo.
+
+        ``_guardar_por_codigo`` no pasa por ``full_clean()``: sin esta
+        validacion un texto mas largo que ``max_length`` llegaria a la base de
+        datos (``DataError`` en PostgreSQL) y revertiria el archivo completo
+        en lugar de reportarse en su fila.
+
+        Raises:
+            ValidationError: Con el nombre del campo invalido
+        """
+        limpios = {}
+        for nombre, valor in valores.items():
+            campo = modelo._meta.get_field(nombre)
+            try:
+                limpios[nombre] = campo.clean(valor, None)
+            except ValidationError as e:
+                raise ValidationError(f"{campo.verbose_name}: {' '.join(e.messages)}")
+        return limpios
+
+    @staticmethod
+    def _guardar_por_codigo(modelo, filas: Dict[str, Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Crea o actualiza en lote los registros de un mantenedor por su codigo.
+
+        Los codigos existentes se resuelven con una sola consulta y el resto se
+        inserta con ``bulk_create``; los existentes se guardan con
+        ``bulk_update``, ambos por lotes de ``LOTE_IMPORTACION`` filas.
+
+        Como las operaciones masivas no pasan por ``save()``, aqui se calcula
+        ``codigo_sortkey`` de los nuevos, se fija ``fecha_actualizacion`` de los
+        actualizados y se emite ``post_save`` por cada registro para que la
+        auditoria y la invalidacion de cache sigan funcionando.
+
+        Args:
+            modelo: Modelo con campo ``codigo`` unico
+            filas: Valores por codigo (sin incluir el codigo)
+
+        Returns:
+            Tuple[int, int]: (creados, actualizados)
+        """
+        if not filas:
+            return 0, 0
+
+        campos = list(next(iter(filas.values())).keys())
+        existentes = modelo.objects.filter(codigo__in=list(filas)).in_bulk(field_name='codigo')
+        ahora = timezone.now()
+
+        nuevos = []
+        for codigo, valores in filas.items():
+            obj = existentes.get(codigo)
+            if obj is None:
+                nuevos.append(modelo(
+                    codigo=codigo, codigo_sortkey=clave_orden_natural(codigo), **valores
+                ))
+                continue
+            for campo, valor in valores.items():
+                setattr(obj, campo, valor)
+            obj.fecha_actualizacion = ahora
+
+        campos_update = campos + ['fecha_actualizacion']
+        with transaction.atomic():
+            modelo.objects.bulk_create(nuevos, batch_size=LOTE_IMPORTACION)
+            modelo.objects.bulk_update(
+                list(existentes.values()), campos_update, batch_size=LOTE_IMPORTACION
+            )
+            emitir_post_save(modelo, nuevos, created=True)
+            emitir_post_save(
+                modelo, existentes.values(), created=False, update_fields=campos_update
+            )
+
+        return len(nuevos), len(existentes)
+
     @staticmethod
     def importar_tipos_solicitud(archivo, usuario) -> Tuple[int, int, List[str]]:
-        """Importa tipos de solicitud desde Excel."""
+        """Importa tipos de solicitud desde Excel (en lote, ver ``_guardar_por_codigo``)."""
         from apps.solicitudes.models import TipoSolicitud
         
         columnas_esperadas = ['Codigo', 'Nombre', 'Descripcion', 'RequiereAprobacion', 'Activo']
-        datos = ImportacionExcelService.leer_datos_desde_excel(archivo, columnas_esperadas)
+        datos = ImportacionExcelService.leer_datos_desde_excel(
+            archivo, columnas_esperadas, max_filas=MAX_FILAS_CATALOGO
+        )
         
-        creadas = 0
-        actualizadas = 0
+        filas = {}
+        validas = 0
         errores = []
         
-        with transaction.atomic():
-            for idx, fila in enumerate(datos, start=2):
-                try:
-                    codigo = fila.get('Codigo', '').strip()
-                    nombre = fila.get('Nombre', '').strip()
-                    descripcion = fila.get('Descripcion', '').strip()
-                    requiere_aprobacion_str = fila.get('RequiereAprobacion', 'SI').strip().upper()
-                    activo_str = fila.get('Activo', 'SI').strip().upper()
+        for idx, fila in enumerate(datos, start=2):
+            try:
+                codigo = fila.get('Codigo', '').strip()
+                nombre = fila.get('Nombre', '').strip()
+                descripcion = fila.get('Descripcion', '').strip()
+                requiere_aprobacion_str = fila.get('RequiereAprobacion', 'SI').strip().upper()
+                activo_str = fila.get('Activo', 'SI').strip().upper()
+                
+                if not codigo or not nombre:
+                    errores.append(f"Fila {idx}: Codigo y Nombre son obligatorios")
+                    continue
+                
+                valores = ImportacionExcelService._limpiar_fila(TipoSolicitud, {
+                    'codigo': codigo,
+                    'nombre': nombre,
+                    'descripcion': descripcion,
+                    'requiere_aprobacion': requiere_aprobacion_str in ['SI', 'S', 'TRUE', '1'],
+                    'activo': activo_str in ['SI', 'S', 'TRUE', '1', 'ACTIVO'],
+                    'eliminado': False,
+                })
+                # Si un codigo se repite en el archivo, prevalece la ultima fila
+                filas[valores.pop('codigo')] = valores
+                validas += 1
                     
-                    if not codigo or not nombre:
-                        errores.append(f"Fila {idx}: Codigo y Nombre son obligatorios")
-                        continue
-                    
-                    requiere_aprobacion = requiere_aprobacion_str in ['SI', 'S', 'TRUE', '1']
-                    activo = activo_str in ['SI', 'S', 'TRUE', '1', 'ACTIVO']
-                    
-                    tipo, created = TipoSolicitud.objects.update_or_create(
-                        codigo=codigo,
-                        defaults={
-                            'nombre': nombre,
-                            'descripcion': descripcion,
-                            'requiere_aprobacion': requiere_aprobacion,
-                            'activo': activo,
-                            'eliminado': False,
-                        }
-                    )
-                    
-                    if created:
-                        creadas += 1
-                    else:
-                        actualizadas += 1
-                        
-                except Exception as e:
-                    errores.append(f"Fila {idx}: {str(e)}")
+            except ValidationError as e:
+                errores.append(f"Fila {idx}: {' '.join(e.messages)}")
+            except Exception as e:
+                errores.append(f"Fila {idx}: {str(e)}")
         
-        return creadas, actualizadas, errores
+        creadas, _ = ImportacionExcelService._guardar_por_codigo(TipoSolicitud, filas)
+        return creadas, validas - creadas, errores
     
     @staticmethod
-    def generar_plantilla_estados_solicitud() -> bytes:
-        """Genera plantilla de estados de solicitud con datos reales."""
+    def generar_plantilla_estados_solicitud(stream=None) -> Optional[bytes]:
+        """
+        Genera plantilla de estados de solicitud con datos reales.
+
+        Si se indica ``stream`` (archivo binario), el libro se escribe ahi y no
+        se retorna contenido; si no, se retorna como bytes.
+        """
         from openpyxl import Workbook
         from openpyxl.styles import Font, Alignment
         from io import BytesIO
@@ -485,9 +614,11 @@ class ImportacionExcelService:
             ws.cell(row=row_idx, column=1, value=estado.codigo)
             ws.cell(row=row_idx, column=2, value=estado.nombre)
             ws.cell(row=row_idx, column=3, value=estado.descripcion or '')
-            ws.cell(row=row_idx, column=4, value=estado.color)
+            ws.cell(row=row_idx, column=4, value=estado.color_hex)
             ws.cell(row=row_idx, column=5, value='SI' if estado.activo else 'NO')
         
+        ImportacionExcelService._agregar_lista_si_no(ws, ['E'])
+        
         # Ajustar ancho de columnas
         ws.column_dimensions['A'].width = 15
         ws.column_dimensions['B'].width = 30
@@ -495,6 +626,10 @@ class ImportacionExcelService:
         ws.column_dimensions['D'].width = 15
         ws.column_dimensions['E'].width = 10
         
+        if stream is not None:
+            wb.save(stream)
+            return None
+        
         output = BytesIO()
         wb.save(output)
         output.seek(0)
@@ -505,51 +640,49 @@ class ImportacionExcelService:
     
     @staticmethod
     def importar_estados_solicitud(archivo, usuario) -> Tuple[int, int, List[str]]:
-        """Importa estados de solicitud desde Excel."""
+        """Importa estados de solicitud desde Excel (en lote, ver ``_guardar_por_codigo``)."""
         from apps.solicitudes.models import EstadoSolicitud
         
         columnas_esperadas = ['Codigo', 'Nombre', 'Descripcion', 'Color', 'Activo']
-        datos = ImportacionExcelService.leer_datos_desde_excel(archivo, columnas_esperadas)
+        datos = ImportacionExcelService.leer_datos_desde_excel(
+            archivo, columnas_esperadas, max_filas=MAX_FILAS_CATALOGO
+        )
         
-        creadas = 0
-        actualizadas = 0
+        filas = {}
+        validas = 0
         errores = []
         
-        with transaction.atomic():
-            for idx, fila in enumerate(datos, start=2):
-                try:
-                    codigo = fila.get('Codigo', '').strip()
-                    nombre = fila.get('Nombre', '').strip()
-                    descripcion = fila.get('Descripcion', '').strip()
-                    color = fila.get('Color', '#6c757d').strip()
-                    activo_str = fila.get('Activo', 'SI').strip().upper()
-                    
-                    if not codigo or not nombre:
-                        errores.append(f"Fila {idx}: Codigo y Nombre son obligatorios")
-                        continue
-                    
-                    activo = activo_str in ['SI', 'S', 'TRUE', '1', 'ACTIVO']
+        for idx, fila in enumerate(datos, start=2):
+            try:
+                codigo = fila.get('Codigo', '').strip()
+                nombre = fila.get('Nombre', '').strip()
+                descripcion = fila.get('Descripcion', '').strip()
+                color = fila.get('Color', '#6c757d').strip()
+                activo_str = fila.get('Activo', 'SI').strip().upper()
+                
+                if not codigo or not nombre:
+                    errores.append(f"Fila {idx}: Codigo y Nombre son obligatorios")
+                    continue
+                
+                valores = ImportacionExcelService._limpiar_fila(EstadoSolicitud, {
+                    'codigo': codigo,
+                    'nombre': nombre,
+                    'descripcion': descripcion,
+                    'color': color,
+                    'activo': activo_str in ['SI', 'S', 'TRUE', '1', 'ACTIVO'],
+                    'eliminado': False,
+                })
+                # Si un codigo se repite en el archivo, prevalece la ultima fila
+                filas[valores.pop('codigo')] = valores
+                validas += 1
                     
-                    estado, created = EstadoSolicitud.objects.update_or_create(
-                        codigo=codigo,
-                        defaults={
-                            'nombre': nombre,
-                            'descripcion': descripcion,
-                            'color': color,
-                            'activo': activo,
-                            'eliminado': False,
-                        }
-                    )
-                    
-                    if created:
-                        creadas += 1
-                    else:
-                        actualizadas += 1
-                        
-                except Exception as e:
-                    errores.append(f"Fila {idx}: {str(e)}")
+            except ValidationError as e:
+                errores.append(f"Fila {idx}: {' '.join(e.messages)}")
+            except Exception as e:
+                errores.append(f"Fila {idx}: {str(e)}")
         
-        return creadas, actualizadas, errores
+        creadas, _ = ImportacionExcelService._guardar_por_codigo(EstadoSolicitud, filas)
+        return creadas, validas - creadas, errores
     
     # ==================== METODOS PARA COMPRAS ====================
     
@@ -453,13 +453,12 @@ class EntregaArticuloForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         # Filtrar solo solicitudes de artículos en estado DESPACHAR (Para despachar)
-        from apps.solicitudes.models import Solicitud, EstadoSolicitud
+        from apps.solicitudes.models import Solicitud
+        from apps.solicitudes.repositories import EstadoSolicitudRepository
 
         try:
-            # Obtener el estado DESPACHAR
-            estado_despachar = EstadoSolicitud.objects.filter(
-                codigo="DESPACHAR", activo=True, eliminado=False
-            ).first()
+            # Obtener el estado DESPACHAR (catálogo cacheado)
+            estado_despachar = EstadoSolicitudRepository.get_by_codigo("DESPACHAR")
 
             if estado_despachar:
                 from django.db.models import Q, F
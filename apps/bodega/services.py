@@ -35,7 +35,7 @@ from .repositories import (
     RecepcionActivoRepository,
     DetalleRecepcionActivoRepository
 )
-from core.utils import generar_codigo_unico
+from core.utils import a_decimal, generar_codigo_unico
 from apps.compras.models import OrdenCompra
 from apps.activos.models import Activo
 from apps.activos.repositories import ActivoRepository
@@ -635,7 +635,7 @@ class EntregaArticuloService:
         # Procesar detalles y actualizar stock
         for detalle_data in detalles:
             articulo_id = detalle_data.get('articulo_id')
-            cantidad = Decimal(str(detalle_data.get('cantidad', 0)))
+            cantidad = a_decimal(detalle_data.get('cantidad', 0))
             lote = detalle_data.get('lote')
             obs_detalle = detalle_data.get('observaciones')
             detalle_solicitud_id = detalle_data.get('detalle_solicitud_id')
@@ -695,7 +695,9 @@ class EntregaArticuloService:
             # Si hay detalle de solicitud, actualizar cantidad despachada
             if detalle_solicitud:
                 detalle_solicitud.cantidad_despachada += cantidad
-                detalle_solicitud.save()
+                detalle_solicitud.save(
+                    update_fields=['cantidad_despachada', 'fecha_actualizacion']
+                )
 
             # Registrar movimiento de salida
             tipo_mov_entrega = TipoMovimiento.objects.filter(
@@ -824,7 +826,7 @@ class EntregaArticuloService:
 
             if estado_completado:
                 solicitud.estado = estado_completado
-                solicitud.save()
+                solicitud.save(update_fields=['estado', 'fecha_actualizacion'])
 
 
 class EntregaBienService:
@@ -926,7 +928,7 @@ class EntregaBienService:
         # Procesar detalles
         for detalle_data in detalles:
             equipo_id = detalle_data.get('equipo_id')
-            cantidad = Decimal(str(detalle_data.get('cantidad', 0)))
+            cantidad = a_decimal(detalle_data.get('cantidad', 0))
             numero_serie = detalle_data.get('numero_serie')
             estado_fisico = detalle_data.get('estado_fisico')
             obs_detalle = detalle_data.get('observaciones')
@@ -962,7 +964,9 @@ class EntregaBienService:
             # Si hay detalle de solicitud, actualizar cantidad despachada
             if detalle_solicitud:
                 detalle_solicitud.cantidad_despachada += cantidad
-                detalle_solicitud.save()
+                detalle_solicitud.save(
+                    update_fields=['cantidad_despachada', 'fecha_actualizacion']
+                )
                 print(f"DEBUG: DetalleSolicitud {detalle_solicitud.id} actualizado: cant_desp={detalle_solicitud.cantidad_despachada}")
 
         # Determinar y actualizar el estado correcto de la entrega
@@ -92,7 +92,7 @@ class EstadoSolicitudAdmin(admin.ModelAdmin):
     """Administración de estados de solicitud."""
 
     list_display = [
-        'codigo', 'nombre', 'color', 'es_inicial', 'es_final',
+        'codigo', 'nombre', 'color_hex', 'es_inicial', 'es_final',
         'requiere_accion', 'activo', 'fecha_creacion'
     ]
     list_filter = ['es_inicial', 'es_final', 'requiere_accion', 'activo', 'eliminado', 'fecha_creacion']
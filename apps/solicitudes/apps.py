@@ -5,3 +5,7 @@ class SolicitudesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.solicitudes'
     verbose_name = 'Gestión de Solicitudes'
+
+    def ready(self):
+        """Registra las señales del módulo."""
+        from . import signals  # noqa: F401
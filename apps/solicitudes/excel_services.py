@@ -71,29 +71,35 @@ class ExportacionSolicitudesService:
         ("Observaciones", 45),
     ]
 
+    EXPORT_FIELDS = (
+        "numero", "fecha_solicitud", "tipo", "tipo_solicitud__nombre",
+        "estado__nombre", "titulo_actividad", "solicitante__username",
+        "solicitante__first_name", "solicitante__last_name",
+        "departamento__nombre", "area__nombre", "motivo", "observaciones",
+    )
+
     @classmethod
     def exportar(cls, queryset, titulo: str = "Solicitudes") -> bytes:
         """Genera el Excel a partir del queryset de solicitudes."""
         from .models import Solicitud  # import local para evitar circulares
+        from .repositories import SolicitudRepository
 
-        qs = queryset.select_related(
-            "tipo_solicitud", "estado", "solicitante", "departamento", "area"
-        )
-
+        tipos = dict(Solicitud.TIPO_CHOICES)
         rows = []
-        for s in qs:
+        for s in SolicitudRepository.iter_for_export(cls.EXPORT_FIELDS, queryset=queryset):
+            nombre_completo = f"{s['solicitante__first_name'] or ''} {s['solicitante__last_name'] or ''}".strip()
             rows.append([
-                s.numero,
-                s.fecha_solicitud.strftime("%d/%m/%Y %H:%M") if s.fecha_solicitud else "",
-                s.get_tipo_display() if hasattr(s, "get_tipo_display") else s.tipo,
-                s.tipo_solicitud.nombre if s.tipo_solicitud else "",
-                s.estado.nombre if s.estado else "",
-                s.titulo_actividad or "",
-                s.solicitante.get_full_name() or s.solicitante.username if s.solicitante else "",
-                s.departamento.nombre if s.departamento else "",
-                s.area.nombre if s.area else "",
-                s.motivo or "",
-                s.observaciones or "",
+                s["numero"],
+                s["fecha_solicitud"].strftime("%d/%m/%Y %H:%M") if s["fecha_solicitud"] else "",
+                tipos.get(s["tipo"], s["tipo"]),
+                s["tipo_solicitud__nombre"] or "",
+                s["estado__nombre"] or "",
+                s["titulo_actividad"] or "",
+                nombre_completo or s["solicitante__username"] or "",
+                s["departamento__nombre"] or "",
+                s["area__nombre"] or "",
+                s["motivo"] or "",
+                s["observaciones"] or "",
             ])
 
         return _build_wb(titulo, cls.HEADERS_WIDTHS, rows)
@@ -214,10 +214,13 @@ class AprobarSolicitudForm(forms.Form):
     def __init__(self, *args, solicitud=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.solicitud = solicitud
+        # IDs de los detalles con campo propio, para no volver a recorrerlos
+        self.detalle_ids: list[int] = []
 
         # Agregar campos dinámicos para cada detalle
         if solicitud:
             for detalle in solicitud.detalles.all():
+                self.detalle_ids.append(detalle.id)
                 field_name = f"cantidad_aprobada_{detalle.id}"
                 # Obtener unidad de medida según tipo
                 if detalle.articulo and detalle.articulo.unidad_medida:
@@ -239,6 +242,25 @@ class AprobarSolicitudForm(forms.Form):
                     help_text=f"Solicitada: {detalle.cantidad_solicitada} {unidad}",
                 )
 
+    def get_detalles_aprobados(self) -> list[dict]:
+        """
+        Cantidades aprobadas en el formato de ``SolicitudService.aprobar_solicitud``.
+
+        Recorre ``cleaned_data`` una sola vez para juntar los campos
+        ``cantidad_aprobada_<id>`` y los devuelve en el orden de los detalles.
+        """
+        prefijo = "cantidad_aprobada_"
+        cantidades = {
+            int(campo[len(prefijo):]): valor
+            for campo, valor in self.cleaned_data.items()
+            if campo.startswith(prefijo)
+        }
+        return [
+            {"detalle_id": detalle_id, "cantidad_aprobada": cantidades[detalle_id]}
+            for detalle_id in self.detalle_ids
+            if detalle_id in cantidades
+        ]
+
 
 class DespacharSolicitudForm(forms.Form):
     """Formulario para despachar una solicitud"""
@@ -0,0 +1,32 @@
+"""
+Middleware del módulo de solicitudes.
+"""
+import threading
+from typing import Optional
+
+_memo = threading.local()
+
+
+class CatalogoRequestCacheMiddleware:
+    """
+    Middleware que abre una memoria de catálogos por petición.
+
+    Las búsquedas cacheadas de los repositories (estados, tipos, áreas,
+    departamentos) se guardan aquí la primera vez, de modo que los distintos
+    services que se instancien durante la petición las compartan sin volver
+    al backend de cache.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _memo.value = {}
+        try:
+            return self.get_response(request)
+        finally:
+            _memo.value = None  # limpiar después de la petición
+
+
+def get_memo_catalogos() -> Optional[dict]:
+    """Obtiene la memoria de catálogos de la petición actual, si hay una."""
+    return getattr(_memo, "value", None)
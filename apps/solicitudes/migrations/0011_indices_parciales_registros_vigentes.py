@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0010_remove_area_usuario_actualizacion_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='area',
+            name='tba_solicit_activo_9ebc34_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='departamento',
+            name='tba_solicit_activo_7bd44a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='estadosolicitud',
+            name='tba_solicit_activo_7a9eef_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_activo_642a18_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tiposolicitud',
+            name='tba_solicit_activo_c4b785_idx',
+        ),
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo'], name='sol_area_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='departamento',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo'], name='sol_departamento_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estadosolicitud',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo'], name='sol_estado_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['-fecha_solicitud'], name='sol_solicitud_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiposolicitud',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo'], name='sol_tipo_live_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def limpiar_bodega_activos(apps, schema_editor):
+    """Quita la bodega de origen de solicitudes de activos antes de la constraint."""
+    Solicitud = apps.get_model('solicitudes', 'Solicitud')
+    Solicitud.objects.filter(tipo='ACTIVO', bodega_origen__isnull=False).update(bodega_origen=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0011_indices_parciales_registros_vigentes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(limpiar_bodega_activos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('tipo', 'ARTICULO')), fields=['bodega_origen'], name='sol_bodega_articulo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='solicitud',
+            constraint=models.CheckConstraint(condition=models.Q(('tipo', 'ARTICULO'), models.Q(('bodega_origen__isnull', True), ('tipo', 'ACTIVO')), _connector='OR'), name='sol_bodega_matches_tipo'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def limpiar_detalles_producto(apps, schema_editor):
+    """
+    Deja un solo producto por detalle antes de la constraint ``sol_det_un_producto``.
+
+    Los detalles con activo y artículo a la vez conservan el que corresponde
+    al tipo de su solicitud. Los que no tienen ninguno no se pueden corregir
+    automáticamente: se aborta la migración indicando sus IDs.
+    """
+    DetalleSolicitud = apps.get_model('solicitudes', 'DetalleSolicitud')
+    ambos = DetalleSolicitud.objects.filter(activo__isnull=False, articulo__isnull=False)
+    ambos.filter(solicitud__tipo='ARTICULO').update(activo=None)
+    ambos.filter(solicitud__tipo='ACTIVO').update(articulo=None)
+
+    invalidos = list(
+        DetalleSolicitud.objects.filter(
+            models.Q(activo__isnull=True, articulo__isnull=True)
+            | models.Q(activo__isnull=False, articulo__isnull=False)
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+    if invalidos:
+        raise RuntimeError(
+            'Detalles de solicitud sin un único producto (activo o artículo), '
+            f'corríjalos antes de migrar: {invalidos}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0007_remove_activo_usuario_actualizacion_and_more'),
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0012_solicitud_bodega_segun_tipo'),
+    ]
+
+    operations = [
+        migrations.RunPython(limpiar_detalles_producto, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='detallesolicitud',
+            name='tba_solicit_articul_f8f610_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='detallesolicitud',
+            name='tba_solicit_activo__18be64_idx',
+        ),
+        migrations.AlterField(
+            model_name='detallesolicitud',
+            name='activo',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Bien o activo solicitado (solo para solicitudes de activos)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='detalles_solicitud', to='activos.activo', verbose_name='Bien/Activo'),
+        ),
+        migrations.AlterField(
+            model_name='detallesolicitud',
+            name='articulo',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Artículo solicitado (solo para solicitudes de artículos)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='detalles_solicitud', to='bodega.articulo', verbose_name='Artículo'),
+        ),
+        migrations.AddIndex(
+            model_name='detallesolicitud',
+            index=models.Index(condition=models.Q(('articulo__isnull', False)), fields=['articulo'], name='sol_det_articulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detallesolicitud',
+            index=models.Index(condition=models.Q(('activo__isnull', False)), fields=['activo'], name='sol_det_activo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='detallesolicitud',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('activo__isnull', True), ('articulo__isnull', False)), models.Q(('activo__isnull', False), ('articulo__isnull', True)), _connector='OR'), name='sol_det_un_producto'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+import re
+
+from django.db import migrations
+
+import core.fields
+
+
+COLOR_POR_DEFECTO = 0x6C757D
+_HEX_RE = re.compile(r'^#?([0-9a-fA-F]{6})$')
+
+
+def hex_a_entero(apps, schema_editor):
+    """Convierte los colores '#rrggbb' existentes al nuevo campo entero."""
+    EstadoSolicitud = apps.get_model('solicitudes', 'EstadoSolicitud')
+    for pk, color in EstadoSolicitud.objects.values_list('pk', 'color'):
+        match = _HEX_RE.match((color or '').strip())
+        valor = int(match.group(1), 16) if match else COLOR_POR_DEFECTO
+        EstadoSolicitud.objects.filter(pk=pk).update(color_rgb=valor)
+
+
+def entero_a_hex(apps, schema_editor):
+    EstadoSolicitud = apps.get_model('solicitudes', 'EstadoSolicitud')
+    for pk, color_rgb in EstadoSolicitud.objects.values_list('pk', 'color_rgb'):
+        EstadoSolicitud.objects.filter(pk=pk).update(color=f'#{color_rgb:06x}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0013_detalle_indices_por_producto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estadosolicitud',
+            name='color_rgb',
+            field=core.fields.ColorRGBField(default=COLOR_POR_DEFECTO, help_text='Color para representación visual', verbose_name='Color'),
+        ),
+        migrations.RunPython(hex_a_entero, entero_a_hex),
+        migrations.RemoveField(
+            model_name='estadosolicitud',
+            name='color',
+        ),
+        migrations.RenameField(
+            model_name='estadosolicitud',
+            old_name='color_rgb',
+            new_name='color',
+        ),
+    ]
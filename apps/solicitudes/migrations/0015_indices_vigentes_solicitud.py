@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0014_estadosolicitud_color_rgb'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='sol_solicitud_live_idx',
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['-fecha_solicitud', '-numero'], name='sol_solicitud_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['estado', 'aprobador'], name='sol_pend_aprobacion_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0015_indices_vigentes_solicitud'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_numero_1d2d5c_idx',
+        ),
+    ]
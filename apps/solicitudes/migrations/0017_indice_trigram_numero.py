@@ -0,0 +1,52 @@
+import logging
+
+from django.db import NotSupportedError, ProgrammingError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def crear_indice_trigram(apps, schema_editor):
+    """
+    Crea un índice GIN trigram sobre UPPER(numero) (solo PostgreSQL).
+
+    Django traduce ``numero__icontains`` a ``UPPER(numero) LIKE UPPER(%s)``;
+    con pg_trgm ese patrón deja de requerir un recorrido secuencial.
+    Si la extensión no puede instalarse (falta de permisos o extensión no
+    disponible en el servidor) se omite el índice y se deja un aviso; cualquier
+    otro error hace fallar la migración.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except (ProgrammingError, NotSupportedError) as e:
+            logger.warning(
+                "No se pudo instalar pg_trgm, se omite el índice sol_numero_trgm: %s", e
+            )
+            return
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS sol_numero_trgm
+            ON tba_solicitudes_solicitud
+            USING gin (UPPER(numero) gin_trgm_ops)
+        """)
+
+
+def eliminar_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS sol_numero_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0016_quitar_indice_numero_duplicado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_trigram, eliminar_indice_trigram),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:02
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+_DIGITOS_RE = re.compile(r"\d+")
+
+
+def poblar_sortkey(apps, schema_editor):
+    """Calcula codigo_sortkey para los registros existentes."""
+    for nombre in ('Departamento', 'Area', 'TipoSolicitud', 'EstadoSolicitud'):
+        modelo = apps.get_model('solicitudes', nombre)
+        for pk, codigo in modelo.objects.values_list('pk', 'codigo'):
+            clave = _DIGITOS_RE.sub(lambda m: m.group().zfill(10), codigo or '')[:100]
+            modelo.objects.filter(pk=pk).update(codigo_sortkey=clave)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0017_indice_trigram_numero'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='area',
+            options={'ordering': ['codigo_sortkey'], 'verbose_name': 'Área', 'verbose_name_plural': 'Áreas'},
+        ),
+        migrations.AlterModelOptions(
+            name='departamento',
+            options={'ordering': ['codigo_sortkey'], 'verbose_name': 'Departamento', 'verbose_name_plural': 'Departamentos'},
+        ),
+        migrations.AlterModelOptions(
+            name='estadosolicitud',
+            options={'ordering': ['codigo_sortkey'], 'verbose_name': 'Estado de Solicitud', 'verbose_name_plural': 'Estados de Solicitudes'},
+        ),
+        migrations.AlterModelOptions(
+            name='tiposolicitud',
+            options={'ordering': ['codigo_sortkey'], 'verbose_name': 'Tipo de Solicitud', 'verbose_name_plural': 'Tipos de Solicitud'},
+        ),
+        migrations.RemoveIndex(
+            model_name='area',
+            name='sol_area_live_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='departamento',
+            name='sol_departamento_live_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='estadosolicitud',
+            name='sol_estado_live_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tiposolicitud',
+            name='sol_tipo_live_idx',
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='codigo_sortkey',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Clave de orden'),
+        ),
+        migrations.AddField(
+            model_name='departamento',
+            name='codigo_sortkey',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Clave de orden'),
+        ),
+        migrations.AddField(
+            model_name='estadosolicitud',
+            name='codigo_sortkey',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Clave de orden'),
+        ),
+        migrations.AddField(
+            model_name='tiposolicitud',
+            name='codigo_sortkey',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Clave de orden'),
+        ),
+        migrations.RunPython(poblar_sortkey, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo_sortkey'], name='sol_area_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='departamento',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo_sortkey'], name='sol_departamento_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estadosolicitud',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo_sortkey'], name='sol_estado_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiposolicitud',
+            index=models.Index(condition=models.Q(('activo', True), ('eliminado', False)), fields=['codigo_sortkey'], name='sol_tipo_live_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activos', '0007_remove_activo_usuario_actualizacion_and_more'),
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0018_codigo_sortkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detallesolicitud',
+            name='pendiente_despacho',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('cantidad_aprobada__gt', models.F('cantidad_despachada'))), output_field=models.BooleanField(), verbose_name='Pendiente de Despacho'),
+        ),
+        migrations.AddIndex(
+            model_name='detallesolicitud',
+            index=models.Index(condition=models.Q(('eliminado', False), ('pendiente_despacho', True)), fields=['solicitud'], name='sol_det_pendiente_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bodega', '0011_remove_articulo_usuario_actualizacion_and_more'),
+        ('solicitudes', '0019_detalle_pendiente_despacho'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_tipo_77da04_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_solicit_ef8e58_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_estado__e84001_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='solicitud',
+            name='tba_solicit_tipo_so_8e215f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['solicitante', '-fecha_solicitud'], name='sol_solicitante_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['estado', '-fecha_solicitud'], name='sol_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['tipo', '-fecha_solicitud'], name='sol_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['tipo_solicitud', '-fecha_solicitud'], name='sol_tipo_sol_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def crear_indice_brin(apps, schema_editor):
+    """
+    Crea un índice BRIN sobre fecha_creacion de solicitudes vigentes (solo PostgreSQL).
+
+    Las filas se insertan en orden de fecha, así que un BRIN resuelve los
+    filtros por rango de los reportes de auditoría ocupando unas pocas
+    páginas, sin el costo de mantener un btree en cada INSERT.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS sol_fc_brin
+            ON tba_solicitudes_solicitud
+            USING brin (fecha_creacion)
+            WHERE eliminado = false
+        """)
+
+
+def eliminar_indice_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS sol_fc_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0020_indices_listado_por_fecha'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_brin, eliminar_indice_brin),
+    ]
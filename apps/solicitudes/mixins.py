@@ -11,6 +11,8 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from typing import List, Optional
 
+from core.authz import request_permission_checker
+
 
 class SolicitudPermissionMixin(PermissionRequiredMixin):
     """
@@ -18,17 +20,35 @@ class SolicitudPermissionMixin(PermissionRequiredMixin):
 
     Extiende PermissionRequiredMixin para agregar lógica específica
     del módulo de solicitudes.
+
+    Los permisos se consultan con ``tiene_permiso``, que resuelve el conjunto
+    de permisos del usuario una sola vez por petición.
     """
 
+    def tiene_permiso(self, perm: str) -> bool:
+        """Verifica un permiso usando el conjunto cacheado en la petición."""
+        return request_permission_checker(self.request)(perm)
+
+    def has_permission(self):
+        """Verifica los permisos requeridos contra el conjunto cacheado."""
+        return all(self.tiene_permiso(perm) for perm in self.get_permission_required())
+
+    def dispatch(self, request, *args, **kwargs):
+        """Envía al login a los anónimos antes de evaluar permisos u objetos."""
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return super().dispatch(request, *args, **kwargs)
+
     def handle_no_permission(self):
         """Maneja la falta de permisos mostrando mensaje al usuario."""
-        if self.raise_exception or self.request.user.is_authenticated:
-            messages.error(
-                self.request,
-                'No tiene permisos suficientes para realizar esta acción.'
-            )
-            raise PermissionDenied(self.get_permission_denied_message())
-        return redirect('solicitudes:menu_solicitudes')
+        if not self.request.user.is_authenticated and not self.raise_exception:
+            # Anónimos: directo al login (con ?next=) sin pasar por el menú
+            return super().handle_no_permission()
+        messages.error(
+            self.request,
+            'No tiene permisos suficientes para realizar esta acción.'
+        )
+        raise PermissionDenied(self.get_permission_denied_message())
 
 
 class GestionSolicitudesPermissionMixin(SolicitudPermissionMixin):
@@ -47,8 +67,8 @@ class GestionSolicitudesPermissionMixin(SolicitudPermissionMixin):
     def has_permission(self):
         """Verifica si el usuario tiene permisos de gestión."""
         return (
-            self.request.user.has_perm('solicitudes.gestionar_solicitudes') or
-            self.request.user.has_perm('solicitudes.ver_todas_solicitudes')
+            self.tiene_permiso('solicitudes.gestionar_solicitudes') or
+            self.tiene_permiso('solicitudes.ver_todas_solicitudes')
         )
 
 
@@ -112,11 +132,10 @@ class VerSolicitudesArticulosPermissionMixin(SolicitudPermissionMixin):
 
     def has_permission(self):
         """Permite acceso si tiene permiso de ver artículos O permisos de gestión."""
-        user = self.request.user
         return (
-            user.has_perm('solicitudes.ver_solicitudes_articulos') or
-            user.has_perm('solicitudes.gestionar_solicitudes') or
-            user.has_perm('solicitudes.ver_todas_solicitudes')
+            self.tiene_permiso('solicitudes.ver_solicitudes_articulos') or
+            self.tiene_permiso('solicitudes.gestionar_solicitudes') or
+            self.tiene_permiso('solicitudes.ver_todas_solicitudes')
         )
 
 
@@ -133,11 +152,10 @@ class VerSolicitudesBienesPermissionMixin(SolicitudPermissionMixin):
 
     def has_permission(self):
         """Permite acceso si tiene permiso de ver bienes O permisos de gestión."""
-        user = self.request.user
         return (
-            user.has_perm('solicitudes.ver_solicitudes_bienes') or
-            user.has_perm('solicitudes.gestionar_solicitudes') or
-            user.has_perm('solicitudes.ver_todas_solicitudes')
+            self.tiene_permiso('solicitudes.ver_solicitudes_bienes') or
+            self.tiene_permiso('solicitudes.gestionar_solicitudes') or
+            self.tiene_permiso('solicitudes.ver_todas_solicitudes')
         )
 
 
@@ -156,14 +174,12 @@ class MisSolicitudesPermissionMixin(SolicitudPermissionMixin):
         Si el usuario tiene permisos de gestión completa, permite acceso.
         Si no, verifica permisos específicos de "mis solicitudes".
         """
-        user = self.request.user
-
         # Administradores y gestores tienen acceso completo
-        if user.has_perm('solicitudes.gestionar_solicitudes'):
+        if self.tiene_permiso('solicitudes.gestionar_solicitudes'):
             return True
 
         # Verificar permiso específico de ver mis solicitudes
-        return user.has_perm('solicitudes.ver_mis_solicitudes')
+        return self.tiene_permiso('solicitudes.ver_mis_solicitudes')
 
 
 class EditarMisSolicitudesPermissionMixin(SolicitudPermissionMixin):
@@ -181,18 +197,20 @@ class EditarMisSolicitudesPermissionMixin(SolicitudPermissionMixin):
         user = self.request.user
 
         # Gestores pueden editar cualquier solicitud
-        if user.has_perm('solicitudes.editar_cualquier_solicitud'):
+        if self.tiene_permiso('solicitudes.editar_cualquier_solicitud'):
             return True
 
         # Verificar si es el solicitante y tiene permiso
         solicitud = self.get_object()
         if solicitud.solicitante == user:
-            return user.has_perm('solicitudes.editar_mis_solicitudes')
+            return self.tiene_permiso('solicitudes.editar_mis_solicitudes')
 
         return False
 
     def dispatch(self, request, *args, **kwargs):
         """Verifica que la solicitud pueda ser editada."""
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
         if not self.has_permission():
             messages.error(
                 request,
@@ -227,18 +245,20 @@ class EliminarMisSolicitudesPermissionMixin(SolicitudPermissionMixin):
         user = self.request.user
 
         # Gestores pueden eliminar cualquier solicitud
-        if user.has_perm('solicitudes.eliminar_cualquier_solicitud'):
+        if self.tiene_permiso('solicitudes.eliminar_cualquier_solicitud'):
             return True
 
         # Verificar si es el solicitante y tiene permiso
         solicitud = self.get_object()
         if solicitud.solicitante == user:
-            return user.has_perm('solicitudes.eliminar_mis_solicitudes')
+            return self.tiene_permiso('solicitudes.eliminar_mis_solicitudes')
 
         return False
 
     def dispatch(self, request, *args, **kwargs):
         """Verifica que la solicitud pueda ser eliminada."""
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
         if not self.has_permission():
             messages.error(
                 request,
@@ -282,14 +302,13 @@ class MultiplePermissionRequiredMixin(SolicitudPermissionMixin):
             return True
 
         perms = self.permissions_required
-        user = self.request.user
 
         if self.require_all:
             # Requiere TODOS los permisos
-            return all(user.has_perm(perm) for perm in perms)
+            return all(self.tiene_permiso(perm) for perm in perms)
         else:
             # Requiere AL MENOS UNO de los permisos
-            return any(user.has_perm(perm) for perm in perms)
+            return any(self.tiene_permiso(perm) for perm in perms)
 
 
 class OwnerOrPermissionRequiredMixin:
@@ -320,7 +339,7 @@ class OwnerOrPermissionRequiredMixin:
         # Verificar permiso alternativo
         has_fallback = (
             self.fallback_permission and
-            user.has_perm(self.fallback_permission)
+            request_permission_checker(request)(self.fallback_permission)
         )
 
         # Permitir acceso si es dueño O tiene permiso alternativo
@@ -3,15 +3,24 @@ from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.db import models
+from django.db.models import Q
 
 from apps.activos.models import Activo
 from apps.bodega.models import Articulo, Bodega
-from core.models import AutoCodeMixin, BaseModel
+from core.fields import ColorRGBField, color_int_a_hex
+from core.models import (
+    ActiveManager,
+    AutoCodeMixin,
+    BaseModel,
+    CodigoSortKeyMixin,
+    SoftDeleteManager,
+    SoftDeleteQuerySet,
+)
 
 User = get_user_model()
 
 
-class Departamento(AutoCodeMixin, BaseModel):
+class Departamento(AutoCodeMixin, CodigoSortKeyMixin, BaseModel):
     AUTO_CODE_PREFIX = "DEP"
     """
     Catálogo de departamentos de la institución.
@@ -55,14 +64,21 @@ class Departamento(AutoCodeMixin, BaseModel):
         help_text="Usuario responsable del departamento",
     )
 
+    objects = SoftDeleteManager()
+    objects_active = ActiveManager()
+
     class Meta:
         db_table = "tba_solicitudes_conf_departamento"
         verbose_name = "Departamento"
         verbose_name_plural = "Departamentos"
-        ordering = ["codigo"]
+        ordering = ["codigo_sortkey"]
         indexes = [
             models.Index(fields=["codigo"]),
-            models.Index(fields=["activo", "eliminado"]),
+            models.Index(
+                fields=["codigo_sortkey"],
+                condition=Q(activo=True, eliminado=False),
+                name="sol_departamento_live_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -70,7 +86,7 @@ class Departamento(AutoCodeMixin, BaseModel):
         return f"{self.codigo} - {self.nombre}"
 
 
-class Area(AutoCodeMixin, BaseModel):
+class Area(AutoCodeMixin, CodigoSortKeyMixin, BaseModel):
     """
     Catálogo de áreas dentro de los departamentos.
 
@@ -120,15 +136,22 @@ class Area(AutoCodeMixin, BaseModel):
         help_text="Usuario responsable del área",
     )
 
+    objects = SoftDeleteManager()
+    objects_active = ActiveManager()
+
     class Meta:
         db_table = "tba_solicitudes_conf_area"
         verbose_name = "Área"
         verbose_name_plural = "Áreas"
-        ordering = ["codigo"]
+        ordering = ["codigo_sortkey"]
         indexes = [
             models.Index(fields=["codigo"]),
             models.Index(fields=["departamento"]),
-            models.Index(fields=["activo", "eliminado"]),
+            models.Index(
+                fields=["codigo_sortkey"],
+                condition=Q(activo=True, eliminado=False),
+                name="sol_area_live_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -136,7 +159,7 @@ class Area(AutoCodeMixin, BaseModel):
         return f"{self.codigo} - {self.nombre}"
 
 
-class TipoSolicitud(AutoCodeMixin, BaseModel):
+class TipoSolicitud(AutoCodeMixin, CodigoSortKeyMixin, BaseModel):
     """
     Catálogo de tipos de solicitud.
 
@@ -174,14 +197,21 @@ class TipoSolicitud(AutoCodeMixin, BaseModel):
         help_text="Indica si las solicitudes de este tipo requieren aprobación",
     )
 
+    objects = SoftDeleteManager()
+    objects_active = ActiveManager()
+
     class Meta:
         db_table = "tba_solicitudes_conf_tipo"
         verbose_name = "Tipo de Solicitud"
         verbose_name_plural = "Tipos de Solicitud"
-        ordering = ["codigo"]
+        ordering = ["codigo_sortkey"]
         indexes = [
             models.Index(fields=["codigo"]),
-            models.Index(fields=["activo", "eliminado"]),
+            models.Index(
+                fields=["codigo_sortkey"],
+                condition=Q(activo=True, eliminado=False),
+                name="sol_tipo_live_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -189,7 +219,7 @@ class TipoSolicitud(AutoCodeMixin, BaseModel):
         return f"{self.codigo} - {self.nombre}"
 
 
-class EstadoSolicitud(BaseModel):
+class EstadoSolicitud(CodigoSortKeyMixin, BaseModel):
     """
     Catálogo de estados de solicitudes.
 
@@ -200,7 +230,7 @@ class EstadoSolicitud(BaseModel):
         codigo: Código único identificador del estado.
         nombre: Nombre descriptivo del estado.
         descripcion: Descripción detallada opcional del estado.
-        color: Color hexadecimal para representar visualmente el estado.
+        color: Color RGB (entero de 24 bits) para representar visualmente el estado.
         es_inicial: Indica si es un estado inicial.
         es_final: Indica si es un estado final.
         requiere_accion: Indica si el estado requiere acción del usuario.
@@ -222,11 +252,10 @@ class EstadoSolicitud(BaseModel):
         verbose_name="Descripción",
         help_text="Descripción detallada del estado",
     )
-    color = models.CharField(
-        max_length=7,
-        default="#6c757d",
-        verbose_name="Color (Hex)",
-        help_text="Color hexadecimal para representación visual",
+    color = ColorRGBField(
+        default=0x6C757D,
+        verbose_name="Color",
+        help_text="Color para representación visual",
     )
     es_inicial = models.BooleanField(
         default=False,
@@ -244,22 +273,94 @@ class EstadoSolicitud(BaseModel):
         help_text="Indica si el estado requiere acción del usuario",
     )
 
+    objects = SoftDeleteManager()
+    objects_active = ActiveManager()
+
     class Meta:
         db_table = "tba_solicitudes_conf_estado"
         verbose_name = "Estado de Solicitud"
         verbose_name_plural = "Estados de Solicitudes"
-        ordering = ["codigo"]
+        ordering = ["codigo_sortkey"]
         indexes = [
             models.Index(fields=["codigo"]),
             models.Index(fields=["es_inicial"]),
             models.Index(fields=["es_final"]),
-            models.Index(fields=["activo", "eliminado"]),
+            models.Index(
+                fields=["codigo_sortkey"],
+                condition=Q(activo=True, eliminado=False),
+                name="sol_estado_live_idx",
+            ),
         ]
 
     def __str__(self) -> str:
         """Representación en cadena del estado."""
         return f"{self.codigo} - {self.nombre}"
 
+    @property
+    def color_hex(self) -> str:
+        """Color del estado en notación ``#rrggbb`` para templates y exportaciones."""
+        return color_int_a_hex(self.color)
+
+
+class SolicitudQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet de Solicitud con los predicados por tipo.
+
+    Encadenable sobre un queryset ya acotado (permisos, filtros): el filtro
+    llega con la misma forma que el índice ``sol_tipo_fecha_idx`` y que el
+    parcial ``sol_bodega_articulo_idx``.
+    """
+
+    def de_activos(self):
+        """Solicitudes de activos/bienes."""
+        return self.filter(tipo="ACTIVO")
+
+    def de_articulos(self):
+        """Solicitudes de artículos de bodega."""
+        return self.filter(tipo="ARTICULO")
+
+
+class SolicitudManager(models.Manager.from_queryset(SolicitudQuerySet)):
+    """Manager de Solicitud con las cargas de relaciones usadas en lectura."""
+
+    def with_relations(self) -> models.QuerySet:
+        """
+        Retorna solicitudes con todas sus relaciones de lectura precargadas.
+
+        Agrupa los ``select_related`` de las FKs y los ``prefetch_related`` de
+        detalles (vigentes, ordenados por id) e historial (vigente, del cambio
+        más reciente al más antiguo, como ``HistorialSolicitudRepository``), de
+        modo que recorrer
+        el resultado ejecuta un número constante de consultas sin importar
+        cuántas solicitudes se listen.
+
+        Returns:
+            QuerySet[Solicitud]: QuerySet con relaciones precargadas.
+        """
+        return self.select_related(
+            "estado",
+            "tipo_solicitud",
+            "solicitante",
+            "aprobador",
+            "despachador",
+            "departamento",
+            "area",
+            "bodega_origen",
+        ).prefetch_related(
+            models.Prefetch(
+                "detalles",
+                queryset=DetalleSolicitud.objects.filter(eliminado=False)
+                .select_related("articulo", "activo")
+                .order_by("id"),
+            ),
+            models.Prefetch(
+                "historial",
+                queryset=HistorialSolicitud.objects.alive()
+                .select_related("estado_anterior", "estado_nuevo", "usuario")
+                .order_by("-fecha_cambio"),
+            ),
+        )
+
 
 class Solicitud(BaseModel):
     """
@@ -445,6 +546,9 @@ class Solicitud(BaseModel):
         help_text="Notas del despachador",
     )
 
+    objects = SolicitudManager()
+    objects_active = ActiveManager()
+
     class Meta:
         db_table = "tba_solicitudes_solicitud"
         verbose_name = "Solicitud"
@@ -510,14 +614,39 @@ class Solicitud(BaseModel):
             ),
         ]
         indexes = [
-            models.Index(fields=["numero"]),
-            models.Index(fields=["tipo"]),
+            # numero ya tiene el índice de su restricción UNIQUE
             models.Index(fields=["fecha_solicitud"]),
             models.Index(fields=["fecha_requerida"]),
-            models.Index(fields=["solicitante"]),
-            models.Index(fields=["estado"]),
-            models.Index(fields=["tipo_solicitud"]),
-            models.Index(fields=["activo", "eliminado"]),
+            # Filtro + orden de los listados (-fecha_solicitud) en un solo
+            # recorrido del índice; también cubren el filtro por la columna sola
+            models.Index(fields=["solicitante", "-fecha_solicitud"], name="sol_solicitante_fecha_idx"),
+            models.Index(fields=["estado", "-fecha_solicitud"], name="sol_estado_fecha_idx"),
+            models.Index(fields=["tipo", "-fecha_solicitud"], name="sol_tipo_fecha_idx"),
+            models.Index(fields=["tipo_solicitud", "-fecha_solicitud"], name="sol_tipo_sol_fecha_idx"),
+            # Respaldan los predicados ACTIVE de SolicitudRepository
+            models.Index(
+                fields=["-fecha_solicitud", "-numero"],
+                condition=Q(eliminado=False),
+                name="sol_solicitud_live_idx",
+            ),
+            models.Index(
+                fields=["estado", "aprobador"],
+                condition=Q(eliminado=False),
+                name="sol_pend_aprobacion_idx",
+            ),
+            models.Index(
+                fields=["bodega_origen"],
+                condition=Q(tipo="ARTICULO"),
+                name="sol_bodega_articulo_idx",
+            ),
+        ]
+        constraints = [
+            # Las solicitudes de activos nunca tienen bodega de origen.
+            models.CheckConstraint(
+                condition=Q(tipo="ARTICULO")
+                | Q(tipo="ACTIVO", bodega_origen__isnull=True),
+                name="sol_bodega_matches_tipo",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -539,6 +668,7 @@ class DetalleSolicitud(BaseModel):
         cantidad_solicitada: Cantidad solicitada inicialmente.
         cantidad_aprobada: Cantidad aprobada por el aprobador.
         cantidad_despachada: Cantidad efectivamente despachada.
+        pendiente_despacho: Calculado en BD (aprobada > despachada).
         observaciones: Observaciones específicas del detalle (opcional).
 
     Note:
@@ -561,6 +691,7 @@ class DetalleSolicitud(BaseModel):
         verbose_name="Artículo",
         blank=True,
         null=True,
+        db_index=False,
         help_text="Artículo solicitado (solo para solicitudes de artículos)",
     )
     # FK a Activo/Bien de Inventario (para solicitudes de bienes)
@@ -571,6 +702,7 @@ class DetalleSolicitud(BaseModel):
         verbose_name="Bien/Activo",
         blank=True,
         null=True,
+        db_index=False,
         help_text="Bien o activo solicitado (solo para solicitudes de activos)",
     )
     cantidad_solicitada = models.IntegerField(
@@ -590,6 +722,14 @@ class DetalleSolicitud(BaseModel):
         verbose_name="Cantidad Despachada",
         help_text="Cantidad efectivamente despachada",
     )
+    # Columna calculada por la base de datos: permite indexar la comparación
+    # entre columnas de la misma fila, que un índice normal no cubre.
+    pendiente_despacho = models.GeneratedField(
+        expression=Q(cantidad_aprobada__gt=models.F("cantidad_despachada")),
+        output_field=models.BooleanField(),
+        db_persist=True,
+        verbose_name="Pendiente de Despacho",
+    )
     observaciones = models.TextField(
         blank=True,
         null=True,
@@ -597,15 +737,39 @@ class DetalleSolicitud(BaseModel):
         help_text="Observaciones específicas del detalle",
     )
 
+    objects = SoftDeleteManager()
+
     class Meta:
         db_table = "tba_solicitudes_detalle"
         verbose_name = "Detalle de Solicitud"
         verbose_name_plural = "Detalles de Solicitudes"
         ordering = ["solicitud", "id"]
+        # Cada línea referencia un artículo O un activo: los índices de
+        # producto son parciales para no indexar la mitad NULL de la tabla.
         indexes = [
             models.Index(fields=["solicitud"]),
-            models.Index(fields=["articulo"]),
-            models.Index(fields=["activo"]),
+            models.Index(
+                fields=["articulo"],
+                condition=Q(articulo__isnull=False),
+                name="sol_det_articulo_idx",
+            ),
+            models.Index(
+                fields=["activo"],
+                condition=Q(activo__isnull=False),
+                name="sol_det_activo_idx",
+            ),
+            models.Index(
+                fields=["solicitud"],
+                condition=Q(pendiente_despacho=True, eliminado=False),
+                name="sol_det_pendiente_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(articulo__isnull=False, activo__isnull=True)
+                | Q(articulo__isnull=True, activo__isnull=False),
+                name="sol_det_un_producto",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -714,6 +878,8 @@ class HistorialSolicitud(BaseModel):
         help_text="Fecha y hora del cambio de estado",
     )
 
+    objects = SoftDeleteManager()
+
     class Meta:
         db_table = "tba_solicitudes_historial"
         verbose_name = "Historial de Solicitud"
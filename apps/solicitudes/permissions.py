@@ -4,7 +4,7 @@ Helpers para trabajar con permisos categorizados del módulo de solicitudes.
 Funciones auxiliares para consultar permisos organizados por módulo funcional.
 """
 
-from typing import Optional
+from typing import Iterator, Optional
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import QuerySet
@@ -73,41 +73,40 @@ def obtener_permisos_por_modulo() -> dict[str, QuerySet[Permission]]:
     return permisos_organizados
 
 
-def enriquecer_permisos_con_modulo(permisos_queryset: QuerySet[Permission]) -> list[Permission]:
+def enriquecer_permisos_con_modulo(
+    permisos_queryset: QuerySet[Permission], chunk_size: int = 500
+) -> Iterator[Permission]:
     """
     Agrega atributo 'modulo' a cada permiso del queryset.
 
+    Los permisos se recorren en bloques con ``iterator()`` y se entregan de a
+    uno, por lo que la memoria usada depende de ``chunk_size`` y no del total.
+    Quien necesite una lista debe envolver el resultado con ``list(...)``.
+
     Args:
         permisos_queryset: QuerySet de Permission
+        chunk_size: Tamaño de bloque para la lectura del queryset
 
-    Returns:
-        Lista de permisos con atributo 'modulo' agregado.
+    Yields:
+        Permisos con atributo 'modulo' agregado.
 
     Example:
         >>> permisos = Permission.objects.filter(content_type__app_label='solicitudes')
-        >>> permisos_enriquecidos = enriquecer_permisos_con_modulo(permisos)
-        >>> for p in permisos_enriquecidos:
+        >>> for p in enriquecer_permisos_con_modulo(permisos):
         ...     print(f"{p.modulo} - {p.name}")
     """
     from .models import CategoriaPermiso
 
-    permisos_lista = list(permisos_queryset)
-
-    # Obtener categorías en una sola query
-    codenames = [p.codename for p in permisos_lista]
-    categorias_dict = {
-        cat.permiso.codename: cat
-        for cat in CategoriaPermiso.objects.filter(
-            permiso__codename__in=codenames
-        ).select_related('permiso')
+    # El catálogo de categorías es pequeño: se materializa completo en una query
+    etiquetas = dict(CategoriaPermiso.Modulo.choices)
+    modulos_por_permiso = {
+        permiso_id: etiquetas.get(modulo, modulo)
+        for permiso_id, modulo in CategoriaPermiso.objects.values_list('permiso_id', 'modulo')
     }
 
-    # Agregar atributo modulo
-    for permiso in permisos_lista:
-        categoria = categorias_dict.get(permiso.codename)
-        permiso.modulo = categoria.get_modulo_display() if categoria else None
-
-    return permisos_lista
+    for permiso in permisos_queryset.iterator(chunk_size=chunk_size):
+        permiso.modulo = modulos_por_permiso.get(permiso.pk)
+        yield permiso
 
 
 def obtener_permisos_solicitud() -> QuerySet[Permission]:
@@ -4,15 +4,135 @@ Repository Pattern para el módulo de solicitudes.
 Separa la lógica de acceso a datos de la lógica de negocio,
 siguiendo el principio de Inversión de Dependencias (SOLID).
 """
-from typing import Optional
-from django.db.models import QuerySet
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from django.db.models import (
+    Case, Count, Model, Prefetch, Q, QuerySet, TextField, Value, When, prefetch_related_objects
+)
+from django.db.models.functions import Concat
 from django.contrib.auth.models import User
 from .models import (
     Departamento, Area,
     TipoSolicitud, EstadoSolicitud, Solicitud,
     DetalleSolicitud, HistorialSolicitud
 )
-from apps.bodega.models import Bodega
+from .middleware import get_memo_catalogos
+from apps.activos.models import Activo
+from apps.bodega.models import Articulo, Bodega
+from core.utils.signals import emitir_post_save
+
+T = TypeVar('T')
+
+# Los predicados de registros vigentes viven en ``core.models``:
+# ``objects.alive()`` (``eliminado=False``) y ``objects_active``
+# (``eliminado=False, activo=True``). Están respaldados por índices parciales
+# declarados en models.py (``sol_*_live_idx``, ``sol_pend_aprobacion_idx``):
+# si cambia el predicado, deben cambiar también esos índices.
+
+# Los catálogos (departamentos, áreas, tipos y estados) cambian muy poco y se
+# consultan en casi cada request: sus búsquedas puntuales se cachean.
+LOOKUP_CACHE_TTL = 60 * 60
+
+# Las invalidaciones viajan como versiones en el backend de cache: solo llegan
+# a todos los workers si ``CACHES`` es compartido. Con un cache propio de cada
+# proceso (el default en memoria) solo se entera el proceso que guardó, así que
+# las entradas se acotan a este TTL para que los demás se pongan al día.
+LOOKUP_CACHE_LOCAL_TTL = 60
+
+# Los conteos del menú no necesitan ser exactos: se cachean unos segundos y se
+# descartan (cambiando de versión) cada vez que se guarda o borra una solicitud.
+MENU_STATS_VERSION_KEY = 'solicitudes:menu_stats:version'
+MENU_STATS_GLOBAL_TTL = 60
+MENU_STATS_USUARIO_TTL = 30
+
+
+def cache_compartido() -> bool:
+    """Indica si el cache default es compartido entre procesos (Redis, base de datos...)."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _version_key(modelo: type[Model]) -> str:
+    return f'{modelo._meta.label_lower}:version'
+
+
+def _incrementar_version(clave: str) -> None:
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), None)
+
+
+def invalidar_menu_stats() -> None:
+    """Descarta los conteos del menú cacheados por ``menu_counts_cached``."""
+    _incrementar_version(MENU_STATS_VERSION_KEY)
+
+
+def invalidar_cache_catalogo(modelo: type[Model]) -> None:
+    """
+    Invalida todas las entradas cacheadas de un catálogo incrementando su versión.
+
+    Alcanza a todos los procesos solo si el cache es compartido; con el cache
+    en memoria los demás workers lo ven al vencer ``LOOKUP_CACHE_LOCAL_TTL``.
+    """
+    _incrementar_version(_version_key(modelo))
+    memo = get_memo_catalogos()
+    if memo:
+        for clave in [clave for clave in memo if clave[0] is modelo]:
+            del memo[clave]
+
+
+# Memoria del proceso para entradas inmutables: ``{(modelo, clave): (version, valor)}``
+_memo_proceso: dict[tuple[type[Model], str], tuple[Any, Any]] = {}
+
+
+def _cached(
+    modelo: type[Model], clave: str, fn: Callable[[], T], proceso: bool = False,
+    ttl: int = LOOKUP_CACHE_TTL
+) -> T:
+    """
+    Resuelve ``fn`` a través del cache, con clave versionada por modelo.
+
+    Dentro de una petición el resultado se guarda además en la memoria de
+    ``CatalogoRequestCacheMiddleware``: las búsquedas repetidas, aunque
+    vengan de services distintos, no vuelven al backend de cache.
+
+    Con ``proceso=True`` el valor se guarda también en memoria del proceso
+    junto a la versión con que se leyó: las peticiones siguientes solo
+    consultan la versión en el cache y, si no cambió, reutilizan el valor sin
+    volver a traerlo ni deserializarlo. Solo para valores que nadie modifica
+    (enteros, frozensets, diccionarios de solo lectura), porque se comparten
+    entre peticiones e hilos. Solo se activa con un cache compartido: con el
+    cache en memoria la versión que se consulta es la del propio proceso y el
+    valor no vencería nunca.
+
+    ``ttl`` acota la vida de la entrada en el backend de cache; si el cache
+    no es compartido se reduce a ``LOOKUP_CACHE_LOCAL_TTL``.
+    """
+    if not cache_compartido():
+        ttl = min(ttl, LOOKUP_CACHE_LOCAL_TTL)
+        proceso = False
+    memo = get_memo_catalogos()
+    if memo is not None and (modelo, clave) in memo:
+        return memo[(modelo, clave)]
+    version = cache.get_or_set(_version_key(modelo), time.time_ns, None)
+    entrada = _memo_proceso.get((modelo, clave)) if proceso else None
+    if entrada is not None and entrada[0] == version:
+        valor = entrada[1]
+    else:
+        valor = cache.get_or_set(
+            f'{modelo._meta.label_lower}:{clave}:v{version}', fn, ttl
+        )
+        if proceso:
+            _memo_proceso[(modelo, clave)] = (version, valor)
+    if memo is not None:
+        memo[(modelo, clave)] = valor
+    return valor
 
 
 # ==================== DEPARTAMENTO REPOSITORY ====================
@@ -23,25 +143,23 @@ class DepartamentoRepository:
     @staticmethod
     def get_all() -> QuerySet[Departamento]:
         """Retorna todos los departamentos activos y no eliminados."""
-        return Departamento.objects.filter(
-            activo=True, eliminado=False
-        ).order_by('codigo')
+        return Departamento.objects_active.order_by('codigo_sortkey')
 
     @staticmethod
     def get_by_id(departamento_id: int) -> Optional[Departamento]:
         """Obtiene un departamento por su ID."""
-        try:
-            return Departamento.objects.get(id=departamento_id, eliminado=False, activo=True)
-        except Departamento.DoesNotExist:
-            return None
+        return _cached(
+            Departamento, f'id:{departamento_id}',
+            lambda: Departamento.objects_active.filter(id=departamento_id).first()
+        )
 
     @staticmethod
     def get_by_codigo(codigo: str) -> Optional[Departamento]:
         """Obtiene un departamento por su código."""
-        try:
-            return Departamento.objects.get(codigo=codigo, eliminado=False, activo=True)
-        except Departamento.DoesNotExist:
-            return None
+        return _cached(
+            Departamento, f'codigo:{codigo}',
+            lambda: Departamento.objects_active.filter(codigo=codigo).first()
+        )
 
 
 # ==================== AREA REPOSITORY ====================
@@ -52,38 +170,32 @@ class AreaRepository:
     @staticmethod
     def get_all() -> QuerySet[Area]:
         """Retorna todas las áreas activas y no eliminadas."""
-        return Area.objects.filter(
-            activo=True, eliminado=False
-        ).select_related('departamento').order_by('codigo')
+        return Area.objects_active.select_related('departamento').order_by('codigo_sortkey')
 
     @staticmethod
     def get_by_id(area_id: int) -> Optional[Area]:
         """Obtiene un área por su ID."""
-        try:
-            return Area.objects.select_related('departamento').get(
-                id=area_id, eliminado=False, activo=True
-            )
-        except Area.DoesNotExist:
-            return None
+        return _cached(
+            Area, f'id:{area_id}',
+            lambda: Area.objects_active.select_related('departamento').filter(
+                id=area_id
+            ).first()
+        )
 
     @staticmethod
     def get_by_codigo(codigo: str) -> Optional[Area]:
         """Obtiene un área por su código."""
-        try:
-            return Area.objects.select_related('departamento').get(
-                codigo=codigo, eliminado=False, activo=True
-            )
-        except Area.DoesNotExist:
-            return None
+        return _cached(
+            Area, f'codigo:{codigo}',
+            lambda: Area.objects_active.select_related('departamento').filter(
+                codigo=codigo
+            ).first()
+        )
 
     @staticmethod
     def filter_by_departamento(departamento: Departamento) -> QuerySet[Area]:
         """Retorna áreas de un departamento específico."""
-        return Area.objects.filter(
-            departamento=departamento,
-            activo=True,
-            eliminado=False
-        ).order_by('codigo')
+        return Area.objects_active.filter(departamento=departamento).order_by('codigo_sortkey')
 
 
 # ==================== TIPO SOLICITUD REPOSITORY ====================
@@ -94,39 +206,33 @@ class TipoSolicitudRepository:
     @staticmethod
     def get_all() -> QuerySet[TipoSolicitud]:
         """Retorna todos los tipos activos y no eliminados."""
-        return TipoSolicitud.objects.filter(
-            activo=True, eliminado=False
-        ).order_by('codigo')
+        return TipoSolicitud.objects_active.order_by('codigo_sortkey')
 
     @staticmethod
     def get_by_id(tipo_id: int) -> Optional[TipoSolicitud]:
         """Obtiene un tipo por su ID."""
-        try:
-            return TipoSolicitud.objects.get(id=tipo_id, eliminado=False, activo=True)
-        except TipoSolicitud.DoesNotExist:
-            return None
+        return _cached(
+            TipoSolicitud, f'id:{tipo_id}',
+            lambda: TipoSolicitud.objects_active.filter(id=tipo_id).first()
+        )
 
     @staticmethod
     def get_by_codigo(codigo: str) -> Optional[TipoSolicitud]:
         """Obtiene un tipo por su código."""
-        try:
-            return TipoSolicitud.objects.get(codigo=codigo, eliminado=False, activo=True)
-        except TipoSolicitud.DoesNotExist:
-            return None
+        return _cached(
+            TipoSolicitud, f'codigo:{codigo}',
+            lambda: TipoSolicitud.objects_active.filter(codigo=codigo).first()
+        )
 
     @staticmethod
     def get_with_aprobacion() -> QuerySet[TipoSolicitud]:
         """Retorna tipos que requieren aprobación."""
-        return TipoSolicitud.objects.filter(
-            requiere_aprobacion=True, activo=True, eliminado=False
-        ).order_by('codigo')
+        return TipoSolicitud.objects_active.filter(requiere_aprobacion=True).order_by('codigo_sortkey')
 
     @staticmethod
     def get_without_aprobacion() -> QuerySet[TipoSolicitud]:
         """Retorna tipos que NO requieren aprobación."""
-        return TipoSolicitud.objects.filter(
-            requiere_aprobacion=False, activo=True, eliminado=False
-        ).order_by('codigo')
+        return TipoSolicitud.objects_active.filter(requiere_aprobacion=False).order_by('codigo_sortkey')
 
 
 # ==================== ESTADO SOLICITUD REPOSITORY ====================
@@ -137,122 +243,373 @@ class EstadoSolicitudRepository:
     @staticmethod
     def get_all() -> QuerySet[EstadoSolicitud]:
         """Retorna todos los estados activos y no eliminados."""
-        return EstadoSolicitud.objects.filter(
-            activo=True, eliminado=False
-        ).order_by('codigo')
+        return EstadoSolicitud.objects_active.order_by('codigo_sortkey')
 
     @staticmethod
     def get_by_id(estado_id: int) -> Optional[EstadoSolicitud]:
         """Obtiene un estado por su ID."""
-        try:
-            return EstadoSolicitud.objects.get(id=estado_id, eliminado=False, activo=True)
-        except EstadoSolicitud.DoesNotExist:
-            return None
+        return _cached(
+            EstadoSolicitud, f'id:{estado_id}',
+            lambda: EstadoSolicitud.objects_active.filter(id=estado_id).first()
+        )
 
     @staticmethod
     def get_by_codigo(codigo: str) -> Optional[EstadoSolicitud]:
         """Obtiene un estado por su código."""
-        try:
-            return EstadoSolicitud.objects.get(codigo=codigo, eliminado=False, activo=True)
-        except EstadoSolicitud.DoesNotExist:
-            return None
+        return EstadoSolicitudRepository.get_por_codigo().get(codigo)
+
+    @staticmethod
+    def get_por_codigo() -> dict[str, EstadoSolicitud]:
+        """
+        Estados activos indexados por código, cacheados junto al catálogo.
+
+        Se cargan todos en una sola consulta: tras la primera transición
+        ninguna otra búsqueda por código va a la base de datos hasta que el
+        catálogo cambie. Las señales invalidan el cache en todos los workers
+        solo si es compartido (ver ``invalidar_cache_catalogo``).
+        """
+        return _cached(
+            EstadoSolicitud, 'por_codigo',
+            lambda: {estado.codigo: estado for estado in EstadoSolicitud.objects_active.all()}
+        )
+
+    @staticmethod
+    def get_indice() -> dict[str, Any]:
+        """
+        Índice precalculado de los estados, cacheado junto al catálogo.
+
+        Las señales lo invalidan junto al catálogo; sin un cache compartido
+        los demás workers pueden verlo desfasado hasta
+        ``LOOKUP_CACHE_LOCAL_TTL``. Solo contiene valores inmutables, así que
+        con un cache compartido además se memoriza en el proceso (ver
+        ``_cached``).
+
+        Returns:
+            ``{'inicial_pk': int | None, 'final_pks': frozenset[int],
+            'accion_pks': frozenset[int], 'pk_por_codigo': dict[str, int]}``
+        """
+        def _construir() -> dict[str, Any]:
+            filas = list(EstadoSolicitud.objects.values_list(
+                'pk', 'es_inicial', 'es_final', 'requiere_accion', 'activo', 'eliminado', 'codigo'
+            ).order_by('codigo_sortkey'))
+            vigentes = [fila for fila in filas if fila[4] and not fila[5]]
+            iniciales = [pk for pk, inicial, *_ in vigentes if inicial]
+            return {
+                'inicial_pk': iniciales[0] if iniciales else None,
+                'final_pks': frozenset(pk for pk, _, final, *_ in filas if final),
+                'accion_pks': frozenset(pk for pk, _, _, accion, *_ in filas if accion),
+                'pk_por_codigo': {fila[6]: fila[0] for fila in vigentes},
+            }
+        return _cached(EstadoSolicitud, 'indice', _construir, proceso=True)
+
+    @staticmethod
+    def get_id_por_codigo(codigo: str) -> Optional[int]:
+        """ID de un estado activo por su código, sin cargar la fila del estado."""
+        return EstadoSolicitudRepository.get_indice()['pk_por_codigo'].get(codigo)
 
     @staticmethod
     def get_inicial() -> Optional[EstadoSolicitud]:
         """Obtiene el estado inicial del sistema."""
-        return EstadoSolicitud.objects.filter(
-            es_inicial=True, activo=True, eliminado=False
-        ).first()
+        inicial_pk = EstadoSolicitudRepository.get_indice()['inicial_pk']
+        if inicial_pk is None:
+            return None
+        return EstadoSolicitudRepository.get_by_id(inicial_pk)
+
+    @staticmethod
+    def es_final(estado_id: Optional[int]) -> bool:
+        """Indica si el estado es final sin cargar la fila del estado."""
+        return estado_id in EstadoSolicitudRepository.get_indice()['final_pks']
+
+    @staticmethod
+    def requiere_accion(estado_id: Optional[int]) -> bool:
+        """Indica si el estado requiere acción sin cargar la fila del estado."""
+        return estado_id in EstadoSolicitudRepository.get_indice()['accion_pks']
 
     @staticmethod
     def get_finales() -> QuerySet[EstadoSolicitud]:
         """Retorna todos los estados finales."""
-        return EstadoSolicitud.objects.filter(
-            es_final=True, activo=True, eliminado=False
-        ).order_by('codigo')
+        return EstadoSolicitud.objects_active.filter(es_final=True).order_by('codigo_sortkey')
 
     @staticmethod
     def get_que_requieren_accion() -> QuerySet[EstadoSolicitud]:
         """Retorna estados que requieren acción."""
-        return EstadoSolicitud.objects.filter(
-            requiere_accion=True, activo=True, eliminado=False
-        ).order_by('codigo')
+        return EstadoSolicitud.objects_active.filter(requiere_accion=True).order_by('codigo_sortkey')
+
+
+# ==================== PRODUCTOS DISPONIBLES REPOSITORY ====================
+
+# Tope de vida de las listas de productos, además de la invalidación por señales
+PRODUCTOS_DISPONIBLES_TTL = 5 * 60
+
+# Columnas que muestran los selectores de productos de los formularios de
+# creación; cualquier otra quedaría diferida y se leería fila por fila. El
+# stock no va en el cache: cambia con cada movimiento y se lee aparte.
+ACTIVO_DISPONIBLE_FIELDS = ('id', 'codigo', 'nombre', 'categoria__nombre')
+ARTICULO_DISPONIBLE_FIELDS = (
+    'id', 'codigo', 'nombre', 'categoria__nombre', 'unidad_medida__simbolo'
+)
+
+
+class ProductoDisponibleRepository:
+    """
+    Activos y artículos que se ofrecen al crear solicitudes.
+
+    Las listas se cachean con la versión de ``Activo``/``Articulo``; las
+    señales del módulo las invalidan al modificar productos, sus categorías
+    o unidades de medida. Solo se traen las columnas que muestran los
+    selectores (``*_DISPONIBLE_FIELDS``); el stock de los artículos se
+    consulta en cada llamada.
+    """
+
+    @staticmethod
+    def get_activos() -> list[Activo]:
+        """Activos vigentes con su categoría, ordenados por código."""
+        return _cached(Activo, 'disponibles', lambda: list(
+            Activo.objects.filter(
+                activo=True, eliminado=False
+            ).select_related('categoria').only(*ACTIVO_DISPONIBLE_FIELDS).order_by('codigo')
+        ), ttl=PRODUCTOS_DISPONIBLES_TTL)
+
+    @staticmethod
+    def get_articulos() -> list[Articulo]:
+        """
+        Artículos vigentes con categoría y unidad de medida, ordenados por código.
+
+        La lista viene del cache; ``stock_actual`` se completa con una consulta
+        ``(pk, stock_actual)`` de los artículos vigentes, que además descarta
+        los que dejaron de estarlo desde que se cacheó la lista.
+        """
+        articulos = _cached(Articulo, 'disponibles', lambda: list(
+            Articulo.objects.filter(
+                activo=True, eliminado=False
+            ).select_related(
+                'categoria', 'unidad_medida'
+            ).only(*ARTICULO_DISPONIBLE_FIELDS).order_by('codigo')
+        ), ttl=PRODUCTOS_DISPONIBLES_TTL)
+        stock = dict(Articulo.objects.filter(
+            activo=True, eliminado=False
+        ).values_list('pk', 'stock_actual'))
+        vigentes = []
+        for articulo in articulos:
+            if articulo.pk in stock:
+                articulo.stock_actual = stock[articulo.pk]
+                vigentes.append(articulo)
+        return vigentes
 
 
 # ==================== SOLICITUD REPOSITORY ====================
 
+# Columnas que realmente pintan los listados: base + relaciones
+LIST_ONLY_FIELDS = ('id', 'numero', 'tipo', 'fecha_solicitud', 'fecha_requerida')
+LIST_RELATED_FIELDS = {
+    'tipo_solicitud': ('codigo', 'nombre', 'requiere_aprobacion'),
+    'estado': ('codigo', 'nombre', 'color', 'es_final'),
+    'solicitante': ('username', 'first_name', 'last_name'),
+    'aprobador': ('username', 'first_name', 'last_name'),
+    'despachador': ('username', 'first_name', 'last_name'),
+    'bodega_origen': ('codigo', 'nombre'),
+}
+# Catálogos de baja cardinalidad: se repiten en casi todas las filas, así que
+# conviene traerlos en una consulta IN aparte en vez de ensanchar cada fila.
+LIST_PREFETCH_MODELS = {
+    'tipo_solicitud': TipoSolicitud,
+    'estado': EstadoSolicitud,
+    'bodega_origen': Bodega,
+}
+
+SOLICITUD_BATCH_SIZE = settings.SOLICITUDES_BULK_BATCH_SIZE
+
+# Columnas que leen las transiciones de estado: las del service, el número
+# (mensajes y log de la vista) y el solicitante (notificación de estado final)
+STATE_CHANGE_FIELDS = ('id', 'numero', 'estado', 'aprobador', 'solicitante')
+
+
+def _para_listado(
+    queryset: QuerySet[Solicitud], *relaciones: str, nulas: tuple[str, ...] = ()
+) -> QuerySet[Solicitud]:
+    """
+    Prepara un queryset de listado restringiendo columnas.
+
+    Los usuarios (alta cardinalidad) se unen con ``select_related``; los
+    catálogos de ``LIST_PREFETCH_MODELS`` se precargan con ``Prefetch``
+    proyectando solo sus columnas de grilla.
+
+    ``nulas`` son FKs que el filtro del listado garantiza en NULL: no se
+    unen (el LEFT JOIN solo traería columnas vacías), pero su columna
+    ``*_id`` se incluye para que acceder a la relación retorne ``None`` sin
+    disparar una consulta diferida por fila.
+    """
+    campos = [*LIST_ONLY_FIELDS, *nulas]
+    unidas = []
+    precargas = []
+    for relacion in relaciones:
+        campos_relacion = LIST_RELATED_FIELDS[relacion]
+        modelo = LIST_PREFETCH_MODELS.get(relacion)
+        if modelo is None:
+            unidas.append(relacion)
+            campos.extend(f'{relacion}__{campo}' for campo in campos_relacion)
+        else:
+            campos.append(relacion)
+            precargas.append(
+                Prefetch(relacion, queryset=modelo.objects.only('id', *campos_relacion))
+            )
+    return queryset.select_related(*unidas).prefetch_related(*precargas).only(*campos)
+
+
+# Lookups del buscador ``SolicitudRepository.search``, fijados al importar
+SEARCH_LOOKUPS = (
+    'numero__icontains',
+    'solicitante__first_name__icontains',
+    'solicitante__last_name__icontains',
+    'solicitante__email__icontains',
+    'area__nombre__icontains',
+)
+
+
 class SolicitudRepository:
-    """Repository para gestionar solicitudes."""
+    """
+    Repository para gestionar solicitudes.
+
+    Los métodos de listado proyectan solo las columnas de la grilla; los de
+    detalle (``get_by_id``, ``get_by_numero``) retornan el objeto completo.
+    """
+
+    PENDIENTE_APROBACION = Q(estado__requiere_accion=True, aprobador__isnull=True)
+    PENDIENTE_DESPACHO = Q(
+        aprobador__isnull=False, despachador__isnull=True, estado__es_final=False
+    )
 
     @staticmethod
     def get_all() -> QuerySet[Solicitud]:
         """Retorna todas las solicitudes no eliminadas con relaciones optimizadas."""
-        return Solicitud.objects.filter(
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive(),
             'tipo_solicitud', 'estado', 'solicitante',
             'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud', '-numero')
 
     @staticmethod
     def get_by_id(solicitud_id: int) -> Optional[Solicitud]:
-        """Obtiene una solicitud por su ID."""
-        try:
-            return Solicitud.objects.select_related(
-                'tipo_solicitud', 'estado', 'solicitante',
-                'aprobador', 'despachador', 'bodega_origen'
-            ).get(id=solicitud_id, eliminado=False)
-        except Solicitud.DoesNotExist:
-            return None
+        """
+        Obtiene una solicitud por su ID.
+
+        Carga todas las FKs que leen los servicios del workflow y la vista de
+        detalle, para que ninguna dispare una consulta diferida.
+        """
+        return Solicitud.objects.alive().select_related(
+            'tipo_solicitud', 'estado', 'solicitante',
+            'aprobador', 'despachador', 'bodega_origen',
+            'departamento', 'area'
+        ).filter(id=solicitud_id).first()
+
+    @staticmethod
+    def con_detalle(
+        queryset: Optional[QuerySet[Solicitud]] = None, historial: bool = True
+    ) -> QuerySet[Solicitud]:
+        """
+        Solicitudes cargadas con todo lo que muestra su detalle.
+
+        Las FKs van unidas y detalles (vigentes, por id) e historial (vigente,
+        más reciente primero) van precargados: el detalle y los modales que
+        se muestran tras cada acción se renderizan sin consultas perezosas.
+
+        Args:
+            queryset: Queryset base (por ejemplo, ya acotado por permisos);
+                por defecto todas las solicitudes.
+            historial: Con ``False`` el historial no se precarga, para cuando
+                se carga antes de una acción que le agrega un registro.
+        """
+        if queryset is None:
+            queryset = Solicitud.objects.all()
+        precargas = [
+            Prefetch('detalles', queryset=DetalleSolicitud.objects.alive().select_related(
+                'articulo', 'articulo__categoria', 'activo', 'activo__categoria'
+            ).order_by('id')),
+        ]
+        if historial:
+            # Mismo criterio que HistorialSolicitudRepository.filter_by_solicitud
+            precargas.append(Prefetch('historial', queryset=HistorialSolicitud.objects.alive().select_related(
+                'estado_anterior', 'estado_nuevo', 'usuario'
+            ).order_by('-fecha_cambio')))
+        return queryset.select_related(
+            'tipo_solicitud', 'estado', 'solicitante', 'aprobador',
+            'despachador', 'bodega_origen', 'departamento', 'area'
+        ).prefetch_related(*precargas)
+
+    @staticmethod
+    def get_con_detalle(solicitud_id: int) -> Solicitud:
+        """Obtiene una solicitud con ``con_detalle``; lanza ``DoesNotExist`` si no existe."""
+        return SolicitudRepository.con_detalle().get(pk=solicitud_id)
+
+    @staticmethod
+    def para_actualizar(queryset: QuerySet[Solicitud]) -> QuerySet[Solicitud]:
+        """
+        ``SELECT ... FOR UPDATE`` solo sobre la fila de la solicitud.
+
+        Con ``of=('self',)`` las tablas unidas por ``select_related`` (estado,
+        tipo, solicitante) no quedan bloqueadas. Debe evaluarse dentro de
+        ``transaction.atomic``.
+        """
+        return queryset.select_for_update(of=('self',))
+
+    @staticmethod
+    def get_for_state_change(solicitud_id: int, bloquear: bool = False) -> Optional[Solicitud]:
+        """
+        Obtiene una solicitud solo con las columnas que lee una transición.
+
+        Los textos largos (``motivo``, ``observaciones``, ``notas_*``...)
+        quedan diferidos: las transiciones los escriben sin leerlos. Úsese
+        cuando la solicitud no se vuelve a mostrar completa; para renderizar
+        el detalle, ``get_by_id``. Con ``bloquear=True`` la fila se lee con
+        ``SELECT ... FOR UPDATE`` (dentro de ``transaction.atomic``).
+        """
+        queryset = Solicitud.objects.alive().only(*STATE_CHANGE_FIELDS)
+        if bloquear:
+            queryset = queryset.select_for_update()
+        return queryset.filter(id=solicitud_id).first()
 
     @staticmethod
     def get_by_numero(numero: str) -> Optional[Solicitud]:
-        """Obtiene una solicitud por su número."""
-        try:
-            return Solicitud.objects.select_related(
-                'tipo_solicitud', 'estado', 'solicitante',
-                'aprobador', 'despachador', 'bodega_origen'
-            ).get(numero=numero, eliminado=False)
-        except Solicitud.DoesNotExist:
-            return None
+        """
+        Obtiene una solicitud por su número, o ``None`` si no existe.
+
+        Para "verificar y luego cargar" basta esta llamada: evita el
+        ``exists_by_numero`` previo y su consulta extra.
+        """
+        return Solicitud.objects.alive().select_related(
+            'tipo_solicitud', 'estado', 'solicitante',
+            'aprobador', 'despachador', 'bodega_origen'
+        ).filter(numero=numero).first()
 
     @staticmethod
     def filter_by_solicitante(solicitante: User) -> QuerySet[Solicitud]:
         """Retorna solicitudes de un solicitante específico."""
-        return Solicitud.objects.filter(
-            solicitante=solicitante,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(solicitante=solicitante),
             'tipo_solicitud', 'estado', 'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud')
 
     @staticmethod
     def filter_by_estado(estado: EstadoSolicitud) -> QuerySet[Solicitud]:
         """Retorna solicitudes en un estado específico."""
-        return Solicitud.objects.filter(
-            estado=estado,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(estado=estado),
             'tipo_solicitud', 'solicitante', 'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud')
 
     @staticmethod
     def filter_by_tipo(tipo_solicitud: TipoSolicitud) -> QuerySet[Solicitud]:
         """Retorna solicitudes de un tipo específico."""
-        return Solicitud.objects.filter(
-            tipo_solicitud=tipo_solicitud,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(tipo_solicitud=tipo_solicitud),
             'estado', 'solicitante', 'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud')
 
     @staticmethod
     def filter_by_tipo_choice(tipo: str) -> QuerySet[Solicitud]:
         """Retorna solicitudes por tipo de choice (ACTIVO o ARTICULO)."""
-        return Solicitud.objects.filter(
-            tipo=tipo,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(tipo=tipo),
             'tipo_solicitud', 'estado', 'solicitante',
             'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud')
@@ -260,10 +617,8 @@ class SolicitudRepository:
     @staticmethod
     def filter_by_bodega(bodega: Bodega) -> QuerySet[Solicitud]:
         """Retorna solicitudes de una bodega específica."""
-        return Solicitud.objects.filter(
-            bodega_origen=bodega,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(bodega_origen=bodega),
             'tipo_solicitud', 'estado', 'solicitante',
             'aprobador', 'despachador'
         ).order_by('-fecha_solicitud')
@@ -271,47 +626,273 @@ class SolicitudRepository:
     @staticmethod
     def filter_pendientes_aprobacion() -> QuerySet[Solicitud]:
         """Retorna solicitudes pendientes de aprobación."""
-        return Solicitud.objects.filter(
-            estado__requiere_accion=True,
-            aprobador__isnull=True,
-            eliminado=False
-        ).select_related(
-            'tipo_solicitud', 'estado', 'solicitante', 'bodega_origen'
+        return _para_listado(
+            Solicitud.objects.alive().filter(SolicitudRepository.PENDIENTE_APROBACION),
+            'tipo_solicitud', 'estado', 'solicitante', 'bodega_origen',
+            nulas=('aprobador',)
         ).order_by('-fecha_solicitud')
 
     @staticmethod
     def filter_pendientes_despacho() -> QuerySet[Solicitud]:
         """Retorna solicitudes pendientes de despacho."""
-        return Solicitud.objects.filter(
-            aprobador__isnull=False,
-            despachador__isnull=True,
-            estado__es_final=False,
-            eliminado=False
-        ).select_related(
+        return _para_listado(
+            Solicitud.objects.alive().filter(SolicitudRepository.PENDIENTE_DESPACHO),
             'tipo_solicitud', 'estado', 'solicitante',
-            'aprobador', 'bodega_origen'
+            'aprobador', 'bodega_origen',
+            nulas=('despachador',)
         ).order_by('-fecha_solicitud')
 
+    @staticmethod
+    def filter_page_after(
+        fecha: Optional[datetime] = None,
+        numero: Optional[str] = None,
+        limit: int = 50,
+    ) -> tuple[list[Solicitud], Optional[tuple[datetime, str]]]:
+        """
+        Página de solicitudes por keyset (seek) en vez de OFFSET.
+
+        Retorna las ``limit`` solicitudes siguientes a ``(fecha, numero)`` en
+        el orden del listado y el cursor para pedir la próxima página (``None``
+        si no hay más). Sin cursor retorna la primera página. El costo por
+        página es constante: la consulta busca directamente en el índice
+        ``sol_solicitud_live_idx`` en lugar de ordenar y saltar filas.
+
+        Args:
+            fecha: ``fecha_solicitud`` de la última fila de la página anterior.
+            numero: ``numero`` de la última fila de la página anterior.
+            limit: Cantidad de filas por página.
+
+        Returns:
+            tuple: ``(solicitudes, cursor)``.
+        """
+        queryset = SolicitudRepository.get_all()
+        if fecha is not None and numero is not None:
+            queryset = queryset.filter(
+                Q(fecha_solicitud__lt=fecha) |
+                Q(fecha_solicitud=fecha, numero__lt=numero)
+            )
+        filas = list(queryset[:limit + 1])
+        if len(filas) <= limit:
+            return filas, None
+        filas = filas[:limit]
+        ultima = filas[-1]
+        return filas, (ultima.fecha_solicitud, ultima.numero)
+
+    # Variantes en streaming de los listados: recorren el resultado por bloques
+    # (cursor del lado del servidor en PostgreSQL). No admiten len() ni slicing.
+
+    @staticmethod
+    def iter_all(chunk_size: int = 1000) -> Iterator[Solicitud]:
+        """Recorre todas las solicitudes vigentes por bloques."""
+        return SolicitudRepository.get_all().iterator(chunk_size=chunk_size)
+
+    @staticmethod
+    def iter_by_solicitante(solicitante: User, chunk_size: int = 1000) -> Iterator[Solicitud]:
+        """Recorre las solicitudes de un solicitante por bloques."""
+        return SolicitudRepository.filter_by_solicitante(solicitante).iterator(chunk_size=chunk_size)
+
+    @staticmethod
+    def iter_by_estado(estado: EstadoSolicitud, chunk_size: int = 1000) -> Iterator[Solicitud]:
+        """Recorre las solicitudes en un estado por bloques."""
+        return SolicitudRepository.filter_by_estado(estado).iterator(chunk_size=chunk_size)
+
+    @staticmethod
+    def pending_despacho_pks() -> list[int]:
+        """
+        Retorna solo los IDs de solicitudes pendientes de despacho.
+
+        Pensado para colas de trabajo: se seleccionan los IDs (consulta
+        liviana) y luego se hidratan por lotes con ``get_many``.
+        """
+        return list(
+            Solicitud.objects.alive().filter(SolicitudRepository.PENDIENTE_DESPACHO)
+            .order_by('-fecha_solicitud')
+            .values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def get_many(pks: Iterable[int]) -> dict[int, Solicitud]:
+        """Carga varias solicitudes por ID en una consulta, como ``{pk: solicitud}``."""
+        return Solicitud.objects.alive().select_related(
+            'tipo_solicitud', 'estado', 'solicitante',
+            'aprobador', 'despachador', 'bodega_origen'
+        ).in_bulk(list(pks))
+
+    @staticmethod
+    def dashboard_counts() -> dict[str, int]:
+        """
+        Cuenta pendientes de aprobación y de despacho en una sola consulta.
+
+        Returns:
+            ``{'pendientes_aprobacion': int, 'pendientes_despacho': int}``
+        """
+        return Solicitud.objects.alive().aggregate(
+            pendientes_aprobacion=Count('pk', filter=SolicitudRepository.PENDIENTE_APROBACION),
+            pendientes_despacho=Count('pk', filter=SolicitudRepository.PENDIENTE_DESPACHO),
+        )
+
+    @staticmethod
+    def menu_counts(usuario: User, estado_pendiente_id: Optional[int]) -> dict[str, int]:
+        """
+        Cuenta las estadísticas del menú del módulo en una sola consulta.
+
+        ``estado_pendiente_id`` viene del catálogo cacheado: filtrar por la
+        columna ``estado_id`` evita unir la tabla de estados.
+
+        Returns:
+            ``{'total_solicitudes', 'mis_solicitudes', 'solicitudes_activos',
+            'solicitudes_articulos', 'pendientes'}``
+        """
+        return Solicitud.objects.alive().aggregate(
+            total_solicitudes=Count('pk'),
+            mis_solicitudes=Count('pk', filter=Q(solicitante=usuario)),
+            solicitudes_activos=Count('pk', filter=Q(tipo='ACTIVO')),
+            solicitudes_articulos=Count('pk', filter=Q(tipo='ARTICULO')),
+            pendientes=Count('pk', filter=Q(estado_id=estado_pendiente_id)),
+        )
+
+    @staticmethod
+    def menu_counts_cached(usuario: User, estado_pendiente_id: Optional[int]) -> dict[str, int]:
+        """
+        ``menu_counts`` a través del cache, con TTL corto.
+
+        Los conteos globales se comparten entre usuarios
+        (``MENU_STATS_GLOBAL_TTL``) y ``mis_solicitudes`` se guarda por
+        usuario (``MENU_STATS_USUARIO_TTL``). Si faltan los globales se
+        recalcula todo con la consulta agregada; si solo falta el del usuario,
+        basta con contar sus solicitudes.
+        """
+        version = cache.get_or_set(MENU_STATS_VERSION_KEY, time.time_ns, None)
+        clave_global = f'solicitudes:menu_stats_global:{estado_pendiente_id}:v{version}'
+        clave_usuario = f'solicitudes:menu_stats_user:{usuario.pk}:v{version}'
+        valores = cache.get_many([clave_global, clave_usuario])
+
+        if clave_global not in valores:
+            conteos = SolicitudRepository.menu_counts(usuario, estado_pendiente_id)
+            mis_solicitudes = conteos.pop('mis_solicitudes')
+            cache.set(clave_global, conteos, MENU_STATS_GLOBAL_TTL)
+            cache.set(clave_usuario, mis_solicitudes, MENU_STATS_USUARIO_TTL)
+            return {**conteos, 'mis_solicitudes': mis_solicitudes}
+
+        mis_solicitudes = valores.get(clave_usuario)
+        if mis_solicitudes is None:
+            mis_solicitudes = Solicitud.objects.alive().filter(solicitante=usuario).count()
+            cache.set(clave_usuario, mis_solicitudes, MENU_STATS_USUARIO_TTL)
+        return {**valores[clave_global], 'mis_solicitudes': mis_solicitudes}
+
+    @staticmethod
+    def iter_for_export(
+        field_list: Iterable[str],
+        queryset: Optional[QuerySet[Solicitud]] = None,
+        chunk_size: int = 2000,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Recorre solicitudes como diccionarios para exportaciones masivas.
+
+        Usa ``values()`` (sin instanciar modelos) e ``iterator()`` (cursor por
+        bloques), por lo que la memoria no crece con el número de filas. Los
+        diccionarios no tienen métodos de modelo (``get_tipo_display``, etc.).
+
+        Args:
+            field_list: Campos a extraer, admite lookups (``'estado__nombre'``).
+            queryset: Queryset ya filtrado; por defecto todas las vigentes.
+            chunk_size: Filas por bloque leído desde la base de datos.
+        """
+        if queryset is None:
+            queryset = Solicitud.objects.alive()
+        return queryset.values(*field_list).iterator(chunk_size=chunk_size)
+
     @staticmethod
     def exists_by_numero(numero: str, exclude_id: Optional[int] = None) -> bool:
-        """Verifica si existe una solicitud con el número dado."""
-        queryset = Solicitud.objects.filter(numero=numero)
+        """
+        Verifica si existe una solicitud con el número dado.
+
+        ``numero`` es único: la consulta es un único ``EXISTS`` resuelto con
+        el índice de la restricción UNIQUE. A diferencia de ``get_by_numero``
+        considera también las solicitudes eliminadas, porque la restricción
+        las incluye; úsese solo para validar unicidad, no antes de cargar.
+        """
+        condicion = Q(numero=numero)
         if exclude_id:
-            queryset = queryset.exclude(id=exclude_id)
-        return queryset.exists()
+            condicion &= ~Q(pk=exclude_id)
+        return Solicitud.objects.filter(condicion).exists()
+
+    @staticmethod
+    def cambiar_estado_con_nota(solicitud: Solicitud, estado: EstadoSolicitud, nota: str) -> None:
+        """
+        Cambia el estado y anexa ``nota`` a ``observaciones`` en un único UPDATE.
+
+        La concatenación se hace en la base de datos (``Concat``), así que el
+        texto acumulado de ``observaciones`` no viaja a Django ni de vuelta.
+        La instancia se actualiza en memoria con el mismo resultado y, como
+        ``update()`` no emite ``post_save``, se emite aquí para la auditoría.
+        """
+        ahora = timezone.now()
+        Solicitud.objects.filter(pk=solicitud.pk).update(
+            estado=estado,
+            observaciones=Case(
+                When(Q(observaciones__isnull=True) | Q(observaciones=''), then=Value(nota)),
+                default=Concat('observaciones', Value(f'\n{nota}')),
+                output_field=TextField(),
+            ),
+            fecha_actualizacion=ahora,
+        )
+        solicitud.estado = estado
+        # Si la columna venía diferida se deja así: leerla sería traer el texto
+        if 'observaciones' not in solicitud.get_deferred_fields():
+            solicitud.observaciones = f'{solicitud.observaciones}\n{nota}' if solicitud.observaciones else nota
+        solicitud.fecha_actualizacion = ahora
+        emitir_post_save(
+            Solicitud, [solicitud], created=False,
+            update_fields={'estado', 'observaciones', 'fecha_actualizacion'}
+        )
+
+    @staticmethod
+    def bulk_create(solicitudes: list[Solicitud]) -> list[Solicitud]:
+        """
+        Inserta solicitudes en lotes (un INSERT multi-fila por lote).
+
+        ``bulk_create`` no emite ``post_save``; se emite aquí por cada
+        solicitud para que la auditoría y las notificaciones de solicitud
+        nueva sigan funcionando.
+        """
+        creadas = Solicitud.objects.bulk_create(solicitudes, batch_size=SOLICITUD_BATCH_SIZE)
+        emitir_post_save(Solicitud, creadas, created=True)
+        return creadas
+
+    @staticmethod
+    def filtro_busqueda(texto: str) -> Q:
+        """
+        Predicado del buscador del listado de gestión.
+
+        Busca por número, usuario solicitante, área o departamento. Los nombres
+        se resuelven como subconsultas ``<fk>_id IN (SELECT id ...)`` en vez de
+        unir las tablas relacionadas: cada rama del OR queda sobre una columna
+        indexada de la propia solicitud (el índice trigram ``sol_numero_trgm``
+        para el número y los índices de cada FK), de modo que PostgreSQL puede
+        combinarlas con un BitmapOr en lugar de recorrer la tabla completa.
+        """
+        return (
+            Q(numero__icontains=texto) |
+            Q(solicitante_id__in=User.objects.filter(username__icontains=texto).values('pk')) |
+            Q(area_id__in=Area.objects.filter(nombre__icontains=texto).values('pk')) |
+            Q(departamento_id__in=Departamento.objects.filter(nombre__icontains=texto).values('pk'))
+        )
 
     @staticmethod
     def search(query: str) -> QuerySet[Solicitud]:
-        """Búsqueda de solicitudes por número o solicitante."""
-        from django.db.models import Q
-        return Solicitud.objects.filter(
-            Q(numero__icontains=query) |
-            Q(solicitante__first_name__icontains=query) |
-            Q(solicitante__last_name__icontains=query) |
-            Q(solicitante__email__icontains=query) |
-            Q(area_solicitante__icontains=query),
-            eliminado=False
-        ).select_related(
+        """
+        Búsqueda de solicitudes por número, solicitante o área.
+
+        En PostgreSQL ``numero__icontains`` se resuelve con el índice GIN
+        trigram ``sol_numero_trgm`` (migración 0017). El predicado se arma
+        como un único nodo OR a partir de ``SEARCH_LOOKUPS``, sin combinar
+        cinco ``Q`` con ``|`` (cada combinación copia el árbol anterior).
+        """
+        return _para_listado(
+            Solicitud.objects.alive().filter(
+                Q(*((campo, query) for campo in SEARCH_LOOKUPS), _connector=Q.OR)
+            ),
             'tipo_solicitud', 'estado', 'solicitante',
             'aprobador', 'despachador', 'bodega_origen'
         ).order_by('-fecha_solicitud')
@@ -319,49 +900,131 @@ class SolicitudRepository:
 
 # ==================== DETALLE SOLICITUD REPOSITORY ====================
 
+DETALLE_BATCH_SIZE = settings.SOLICITUDES_BULK_BATCH_SIZE
+
 class DetalleSolicitudRepository:
     """Repository para detalles de solicitudes."""
 
     @staticmethod
     def filter_by_solicitud(solicitud: Solicitud) -> QuerySet[DetalleSolicitud]:
         """Retorna detalles de una solicitud específica."""
-        return DetalleSolicitud.objects.filter(
-            solicitud=solicitud,
-            eliminado=False
+        return DetalleSolicitud.objects.alive().filter(
+            solicitud=solicitud
         ).select_related('activo').order_by('id')
 
+    @staticmethod
+    def get_map_by_solicitud(solicitud: Solicitud) -> dict[int, DetalleSolicitud]:
+        """
+        Carga los detalles vigentes de una solicitud como ``{id: detalle}``.
+
+        Reemplaza el patrón "``exists()`` y luego ``get_by_id`` por cada
+        detalle": una sola consulta sirve tanto para saber si hay detalles
+        como para resolver cada ``detalle_id`` recibido, y garantiza que el
+        detalle pertenece a la solicitud.
+
+        Cada detalle queda enlazado a la instancia ``solicitud`` recibida, de
+        modo que ``detalle.solicitud`` (que lee, por ejemplo, la auditoría al
+        guardar) no vuelve a consultar la solicitud por cada detalle.
+        """
+        detalles = {}
+        for detalle in DetalleSolicitud.objects.alive().filter(
+            solicitud=solicitud
+        ).select_related('articulo', 'activo'):
+            detalle.solicitud = solicitud
+            detalles[detalle.pk] = detalle
+        return detalles
+
+    @staticmethod
+    def filter_by_solicitudes(solicitudes: Iterable[Solicitud]) -> QuerySet[DetalleSolicitud]:
+        """Retorna en una sola consulta los detalles de varias solicitudes."""
+        return DetalleSolicitud.objects.alive().filter(
+            solicitud__in=solicitudes
+        ).select_related('articulo', 'activo').order_by('solicitud_id', 'id')
+
+    @staticmethod
+    def detalles_prefetch(to_attr: Optional[str] = None) -> Prefetch:
+        """``Prefetch`` de detalles vigentes para encadenar en querysets de Solicitud."""
+        return Prefetch(
+            'detalles',
+            queryset=DetalleSolicitud.objects.alive()
+            .select_related('articulo', 'activo').order_by('id'),
+            to_attr=to_attr,
+        )
+
+    @staticmethod
+    def attach_detalles(solicitudes: Iterable[Solicitud]) -> list[Solicitud]:
+        """
+        Precarga los detalles de un lote de solicitudes ya materializadas.
+
+        Tras la llamada, ``solicitud.detalles.all()`` no vuelve a consultar
+        la base de datos para ninguna solicitud del lote.
+        """
+        solicitudes = list(solicitudes)
+        prefetch_related_objects(solicitudes, DetalleSolicitudRepository.detalles_prefetch())
+        return solicitudes
+
     @staticmethod
     def get_by_id(detalle_id: int) -> Optional[DetalleSolicitud]:
         """Obtiene un detalle por su ID."""
-        try:
-            return DetalleSolicitud.objects.select_related(
-                'solicitud', 'activo'
-            ).get(id=detalle_id, eliminado=False)
-        except DetalleSolicitud.DoesNotExist:
-            return None
+        return DetalleSolicitud.objects.alive().select_related(
+            'solicitud', 'activo'
+        ).filter(id=detalle_id).first()
 
     @staticmethod
     def filter_pendientes_despacho(solicitud: Solicitud) -> QuerySet[DetalleSolicitud]:
-        """Retorna detalles pendientes de despacho."""
-        from django.db.models import F
-        return DetalleSolicitud.objects.filter(
-            solicitud=solicitud,
-            cantidad_aprobada__gt=F('cantidad_despachada'),
-            eliminado=False
+        """
+        Retorna detalles pendientes de despacho.
+
+        Filtra por la columna generada ``pendiente_despacho``, respaldada por
+        el índice parcial ``sol_det_pendiente_idx``.
+        """
+        return DetalleSolicitud.objects.alive().filter(
+            solicitud=solicitud, pendiente_despacho=True
         ).select_related('activo').order_by('id')
 
+    @staticmethod
+    def bulk_create(detalles: list[DetalleSolicitud]) -> list[DetalleSolicitud]:
+        """
+        Inserta detalles en lotes (un INSERT multi-fila por lote).
+
+        ``bulk_create`` no emite ``post_save``; se emite aquí por cada detalle
+        para que la auditoría siga registrando cada línea creada.
+        """
+        creados = DetalleSolicitud.objects.bulk_create(detalles, batch_size=DETALLE_BATCH_SIZE)
+        emitir_post_save(DetalleSolicitud, creados, created=True)
+        return creados
+
+    @staticmethod
+    def bulk_update(detalles: list[DetalleSolicitud], fields: list[str]) -> None:
+        """
+        Persiste cambios de varios detalles en lotes (un UPDATE por lote).
+
+        ``bulk_update`` no actualiza ``fecha_actualizacion`` ni emite
+        ``post_save``; ambas cosas se hacen aquí para que la auditoría siga
+        registrando cada detalle modificado.
+        """
+        if not detalles:
+            return
+        ahora = timezone.now()
+        for detalle in detalles:
+            detalle.fecha_actualizacion = ahora
+        campos = [*fields, 'fecha_actualizacion']
+        DetalleSolicitud.objects.bulk_update(detalles, campos, batch_size=DETALLE_BATCH_SIZE)
+        emitir_post_save(DetalleSolicitud, detalles, created=False, update_fields=campos)
+
 
 # ==================== HISTORIAL SOLICITUD REPOSITORY ====================
 
+HISTORIAL_BATCH_SIZE = settings.SOLICITUDES_BULK_BATCH_SIZE
+
 class HistorialSolicitudRepository:
     """Repository para historial de cambios de estado."""
 
     @staticmethod
     def filter_by_solicitud(solicitud: Solicitud) -> QuerySet[HistorialSolicitud]:
         """Retorna el historial de una solicitud específica."""
-        return HistorialSolicitud.objects.filter(
-            solicitud=solicitud,
-            eliminado=False
+        return HistorialSolicitud.objects.alive().filter(
+            solicitud=solicitud
         ).select_related(
             'estado_anterior', 'estado_nuevo', 'usuario'
         ).order_by('-fecha_cambio')
@@ -369,12 +1032,9 @@ class HistorialSolicitudRepository:
     @staticmethod
     def get_by_id(historial_id: int) -> Optional[HistorialSolicitud]:
         """Obtiene un registro de historial por su ID."""
-        try:
-            return HistorialSolicitud.objects.select_related(
-                'solicitud', 'estado_anterior', 'estado_nuevo', 'usuario'
-            ).get(id=historial_id, eliminado=False)
-        except HistorialSolicitud.DoesNotExist:
-            return None
+        return HistorialSolicitud.objects.alive().select_related(
+            'solicitud', 'estado_anterior', 'estado_nuevo', 'usuario'
+        ).filter(id=historial_id).first()
 
     @staticmethod
     def create(
@@ -385,10 +1045,26 @@ class HistorialSolicitudRepository:
         observaciones: str = ''
     ) -> HistorialSolicitud:
         """Crea un nuevo registro de historial."""
-        return HistorialSolicitud.objects.create(
-            solicitud=solicitud,
-            estado_anterior=estado_anterior,
-            estado_nuevo=estado_nuevo,
-            usuario=usuario,
-            observaciones=observaciones
+        return HistorialSolicitudRepository.bulk_create([
+            HistorialSolicitud(
+                solicitud=solicitud,
+                estado_anterior=estado_anterior,
+                estado_nuevo=estado_nuevo,
+                usuario=usuario,
+                observaciones=observaciones
+            )
+        ])[0]
+
+    @staticmethod
+    def bulk_create(registros: list[HistorialSolicitud]) -> list[HistorialSolicitud]:
+        """
+        Inserta registros de historial en lotes (un INSERT multi-fila por lote).
+
+        ``bulk_create`` no emite ``post_save``; se emite aquí por cada registro
+        para que las notificaciones de cambio de estado sigan funcionando.
+        """
+        creados = HistorialSolicitud.objects.bulk_create(
+            registros, batch_size=HISTORIAL_BATCH_SIZE
         )
+        emitir_post_save(HistorialSolicitud, creados, created=True)
+        return creados
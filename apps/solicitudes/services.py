@@ -8,11 +8,13 @@ usan transacciones atómicas para garantizar consistencia.
 from typing import Optional, List, Dict, Any
 from decimal import Decimal
 from datetime import date, datetime
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils import timezone
-from core.utils import generar_codigo_unico
+from core.utils import (
+    a_decimal, emitir_post_save, generar_codigo_unico, generar_codigos_unicos
+)
 from .models import (
     Departamento, Area,
     TipoSolicitud, EstadoSolicitud, Solicitud,
@@ -27,17 +29,148 @@ from apps.bodega.models import Bodega
 from apps.activos.models import Activo
 
 
+# Códigos de estado que fijan las transiciones del workflow
+ESTADO_APROBADA = 'APROBADA'
+ESTADO_RECHAZADA = 'RECHAZAR'
+ESTADO_DESPACHAR = 'DESPACHAR'
+ESTADO_CANCELADA = 'CANCELADA'
+ESTADO_COMPRAR = 'COMPRAR'
+
+# Textos que el workflow registra en el historial y en la solicitud
+_MSG_CREADA = 'Solicitud creada por {nombre}'
+_MSG_APROBADA = 'Aprobada por {nombre}. {notas}'
+_MSG_RECHAZADA = 'Rechazada por {nombre}. Motivo: {motivo}'
+_MSG_DESPACHAR = 'Movido a Para Despachar por {nombre}. {notas}'
+_MSG_CANCELADA = 'Cancelada por {nombre}. Motivo: {motivo}'
+_MSG_COMPRAR = 'Enviada a compras por {nombre}'
+_MSG_COMPRAR_NOTAS = 'Enviada a compras por {nombre}. Notas: {notas}'
+_NOTA_RECHAZO = 'RECHAZADO: {motivo}'
+_NOTA_CANCELACION = 'CANCELADO: {motivo}'
+_NOTA_COMPRA = 'COMPRA: {notas}'
+
+
+def _nombre_usuario(usuario: User) -> str:
+    """Nombre para el historial: nombre completo o, si está vacío, el username."""
+    return usuario.get_full_name() or usuario.username
+
+
 # ==================== SOLICITUD SERVICE ====================
 
 class SolicitudService:
     """Service para lógica de negocio de Solicitudes."""
 
+    # Intentos de generar un número libre ante inserciones concurrentes
+    NUMERO_MAX_REINTENTOS = 5
+
     def __init__(self):
         self.solicitud_repo = SolicitudRepository()
         self.estado_repo = EstadoSolicitudRepository()
         self.tipo_repo = TipoSolicitudRepository()
         self.detalle_repo = DetalleSolicitudRepository()
         self.historial_repo = HistorialSolicitudRepository()
+        self._estados: Optional[Dict[str, EstadoSolicitud]] = None
+        self._hora_referencia: Optional[datetime] = None
+
+    def fijar_hora_referencia(self, momento: Optional[datetime]) -> None:
+        """
+        Fija el instante que usarán las operaciones de este service.
+
+        Pensado para cargas masivas: todas las solicitudes de un lote
+        comparten un mismo ``datetime`` en vez de consultar el reloj (y
+        resolver la zona horaria) en cada registro. ``None`` vuelve a usar
+        la hora actual.
+        """
+        self._hora_referencia = momento
+
+    def _ahora(self) -> datetime:
+        """Hora de referencia fijada o, si no hay, la hora actual."""
+        return self._hora_referencia or timezone.now()
+
+    # Campos que las transiciones leen antes de escribir: se releen bajo el
+    # bloqueo para decidir sobre el estado vigente y no sobre una copia vieja
+    CAMPOS_BLOQUEO = ['estado', 'aprobador']
+
+    @staticmethod
+    def marcar_bloqueada(solicitud: Solicitud) -> Solicitud:
+        """
+        Indica que ``solicitud`` ya se leyó con ``SELECT ... FOR UPDATE``.
+
+        Para vistas que cargan la solicitud bloqueada dentro de su propia
+        transacción (``SolicitudRepository.para_actualizar``): la transición
+        no vuelve a bloquearla ni a releerla. La marca solo vale mientras siga
+        abierta una transacción.
+        """
+        solicitud._fila_bloqueada = True
+        return solicitud
+
+    def _bloquear(self, solicitud: Solicitud) -> None:
+        """
+        Bloquea la fila de la solicitud (``SELECT ... FOR UPDATE``) hasta el fin
+        de la transacción y relee los campos que decide la transición.
+
+        Sin el bloqueo, dos transiciones concurrentes pueden validar ambas el
+        mismo estado no final y aplicarse una sobre otra. Se actualiza la
+        instancia recibida (en vez de reemplazarla) para que el llamador vea
+        el resultado. Debe llamarse dentro de ``transaction.atomic``.
+
+        Si el llamador ya la cargó bloqueada (``marcar_bloqueada``) en la
+        transacción en curso, sus campos ya son los vigentes y no se relee.
+        """
+        if getattr(solicitud, '_fila_bloqueada', False) and transaction.get_connection().in_atomic_block:
+            return
+        solicitud.refresh_from_db(
+            from_queryset=Solicitud.objects.select_for_update(),
+            fields=self.CAMPOS_BLOQUEO,
+        )
+
+    def _estado_actual(self, solicitud: Solicitud) -> EstadoSolicitud:
+        """
+        Retorna el estado actual de la solicitud sin consulta diferida.
+
+        Si el llamador no cargó la solicitud con ``select_related('estado')``,
+        el estado se resuelve desde el catálogo cacheado y se asigna a la
+        instancia; solo un estado inactivo (fuera del cache) cae en la carga
+        diferida normal.
+        """
+        if not Solicitud.estado.is_cached(solicitud):
+            estado = self.estado_repo.get_by_id(solicitud.estado_id)
+            if estado is not None:
+                solicitud.estado = estado
+        return solicitud.estado
+
+    def _get_estado(self, codigo: str) -> Optional[EstadoSolicitud]:
+        """
+        Obtiene un estado por código, memorizado en la instancia del servicio.
+
+        El primer uso toma el índice completo del catálogo (una consulta o
+        una ida al cache, invalidado por señales); las demás transiciones de
+        la instancia lo resuelven en memoria.
+        """
+        if self._estados is None:
+            self._estados = self.estado_repo.get_por_codigo()
+        return self._estados.get(codigo)
+
+    def _validar_nueva_solicitud(
+        self,
+        fecha_requerida: date,
+        tipo_choice: str,
+        bodega_origen: Optional[Bodega]
+    ) -> Dict[str, str]:
+        """Valida los datos de una solicitud nueva; retorna ``{campo: mensaje}``."""
+        errors = {}
+
+        # Los campos titulo_actividad y objetivo_actividad son opcionales
+        # Solo se validan si se proporcionan y tienen contenido
+
+        # Validar fecha requerida
+        if fecha_requerida < timezone.localdate(self._ahora()):
+            errors['fecha_requerida'] = 'La fecha requerida no puede ser anterior a hoy'
+
+        # Validar bodega para artículos
+        if tipo_choice == 'ARTICULO' and not bodega_origen:
+            errors['bodega_origen'] = 'Las solicitudes de artículos requieren bodega de origen'
+
+        return errors
 
     @transaction.atomic
     def crear_solicitud(
@@ -79,50 +212,48 @@ class SolicitudService:
             ValidationError: Si hay errores de validación
         """
         # Validaciones
-        errors = {}
-
-        # Los campos titulo_actividad y objetivo_actividad son opcionales
-        # Solo se validan si se proporcionan y tienen contenido
-
-        # Validar fecha requerida
-        if fecha_requerida < date.today():
-            errors['fecha_requerida'] = 'La fecha requerida no puede ser anterior a hoy'
-
-        # Validar bodega para artículos
-        if tipo_choice == 'ARTICULO' and not bodega_origen:
-            errors['bodega_origen'] = 'Las solicitudes de artículos requieren bodega de origen'
-
+        errors = self._validar_nueva_solicitud(fecha_requerida, tipo_choice, bodega_origen)
         if errors:
             raise ValidationError(errors)
 
-        # Generar número si no se proporciona
-        if not numero:
-            numero = generar_codigo_unico('SOL', Solicitud, 'numero', longitud=8)
-        else:
-            if self.solicitud_repo.exists_by_numero(numero):
-                raise ValidationError({'numero': 'Ya existe una solicitud con este número'})
-
         # Obtener estado inicial (PENDIENTE)
         estado_inicial = self.estado_repo.get_inicial()
         if not estado_inicial:
             raise ValidationError('No se ha configurado un estado inicial para solicitudes')
 
-        # Crear solicitud - siempre en estado PENDIENTE
-        solicitud = Solicitud.objects.create(
-            tipo=tipo_choice,
-            numero=numero,
-            fecha_requerida=fecha_requerida,
-            tipo_solicitud=tipo_solicitud,
-            estado=estado_inicial,
-            solicitante=solicitante,
-            titulo_actividad=titulo_actividad,
-            objetivo_actividad=objetivo_actividad,
-            departamento=departamento,
-            area=area,
-            bodega_origen=bodega_origen,
-            motivo=motivo,
-            observaciones=kwargs.get('observaciones', '')
-        )
+        # Crear solicitud - siempre en estado PENDIENTE.
+        # La unicidad del número la garantiza el índice UNIQUE: en vez de
+        # consultar antes (dos idas y una carrera entre ambas), se intenta el
+        # INSERT dentro de un savepoint. Un número generado que colisiona con
+        # una inserción concurrente se regenera; uno indicado por el usuario
+        # se reporta como error de validación.
+        numero_generado = not numero
+        for intento in range(self.NUMERO_MAX_REINTENTOS):
+            if numero_generado:
+                numero = generar_codigo_unico('SOL', Solicitud, 'numero', longitud=8)
+            try:
+                with transaction.atomic():
+                    solicitud = Solicitud.objects.create(
+                        tipo=tipo_choice,
+                        numero=numero,
+                        fecha_requerida=fecha_requerida,
+                        tipo_solicitud=tipo_solicitud,
+                        estado=estado_inicial,
+                        solicitante=solicitante,
+                        titulo_actividad=titulo_actividad,
+                        objetivo_actividad=objetivo_actividad,
+                        departamento=departamento,
+                        area=area,
+                        bodega_origen=bodega_origen,
+                        motivo=motivo,
+                        observaciones=kwargs.get('observaciones', '')
+                    )
+                break
+            except IntegrityError:
+                if not numero_generado:
+                    raise ValidationError({'numero': 'Ya existe una solicitud con este número'})
+                if intento == self.NUMERO_MAX_REINTENTOS - 1:
+                    raise
 
         # Registrar en historial
         self.historial_repo.create(
@@ -130,11 +261,107 @@ class SolicitudService:
             estado_anterior=None,
             estado_nuevo=estado_inicial,
             usuario=solicitante,
-            observaciones=f'Solicitud creada por {solicitante.get_full_name()}'
+            observaciones=_MSG_CREADA.format(nombre=_nombre_usuario(solicitante))
         )
 
         return solicitud
 
+    @transaction.atomic
+    def crear_solicitudes_bulk(self, filas: List[Dict[str, Any]]) -> List[Solicitud]:
+        """
+        Crea varias solicitudes en una sola transacción.
+
+        Cada elemento de ``filas`` lleva los mismos argumentos que
+        ``crear_solicitud``. Todas las filas se validan antes de escribir;
+        luego las solicitudes y su historial inicial se insertan por lotes
+        (``SOLICITUDES_BULK_BATCH_SIZE``) y los números faltantes se generan
+        con una única lectura del correlativo.
+
+        Args:
+            filas: Argumentos de ``crear_solicitud`` por cada solicitud
+
+        Returns:
+            List[Solicitud]: Solicitudes creadas, en el orden de ``filas``
+
+        Raises:
+            ValidationError: Con los errores de todas las filas, con claves
+                ``'<índice>.<campo>'``; si hay alguno no se crea ninguna.
+        """
+        if not filas:
+            return []
+
+        errors = {}
+        for indice, fila in enumerate(filas):
+            errores_fila = self._validar_nueva_solicitud(
+                fila['fecha_requerida'], fila.get('tipo_choice', 'ARTICULO'), fila.get('bodega_origen')
+            )
+            for campo, mensaje in errores_fila.items():
+                errors[f'{indice}.{campo}'] = mensaje
+
+        # Números indicados por el usuario: repetidos en el lote o ya usados
+        indicados = [fila['numero'] for fila in filas if fila.get('numero')]
+        usados = set(Solicitud.objects.filter(numero__in=indicados).values_list('numero', flat=True))
+        vistos = set()
+        for indice, fila in enumerate(filas):
+            numero = fila.get('numero')
+            if numero and (numero in usados or numero in vistos):
+                errors[f'{indice}.numero'] = 'Ya existe una solicitud con este número'
+            vistos.add(numero)
+
+        if errors:
+            raise ValidationError(errors)
+
+        estado_inicial = self.estado_repo.get_inicial()
+        if not estado_inicial:
+            raise ValidationError('No se ha configurado un estado inicial para solicitudes')
+
+        generados = iter(generar_codigos_unicos(
+            'SOL', Solicitud, len(filas) - len(indicados), campo='numero', longitud=8
+        ))
+        solicitudes = [
+            Solicitud(
+                tipo=fila.get('tipo_choice', 'ARTICULO'),
+                numero=fila.get('numero') or next(generados),
+                fecha_requerida=fila['fecha_requerida'],
+                tipo_solicitud=fila['tipo_solicitud'],
+                estado=estado_inicial,
+                solicitante=fila['solicitante'],
+                titulo_actividad=fila['titulo_actividad'],
+                objetivo_actividad=fila['objetivo_actividad'],
+                departamento=fila.get('departamento'),
+                area=fila.get('area'),
+                bodega_origen=fila.get('bodega_origen'),
+                motivo=fila['motivo'],
+                observaciones=fila.get('observaciones', '')
+            )
+            for fila in filas
+        ]
+        try:
+            with transaction.atomic():
+                solicitudes = self.solicitud_repo.bulk_create(solicitudes)
+        except IntegrityError:
+            # Una inserción concurrente tomó alguno de los números
+            raise ValidationError({'numero': 'Ya existe una solicitud con alguno de los números del lote'})
+
+        # Un lote suele venir de pocos solicitantes: el texto se arma una vez por cada uno
+        solicitantes = {solicitud.solicitante_id: solicitud.solicitante for solicitud in solicitudes}
+        mensajes = {
+            pk: _MSG_CREADA.format(nombre=_nombre_usuario(solicitante))
+            for pk, solicitante in solicitantes.items()
+        }
+        self.historial_repo.bulk_create([
+            HistorialSolicitud(
+                solicitud=solicitud,
+                estado_anterior=None,
+                estado_nuevo=estado_inicial,
+                usuario=solicitud.solicitante,
+                observaciones=mensajes[solicitud.solicitante_id]
+            )
+            for solicitud in solicitudes
+        ])
+
+        return solicitudes
+
     @transaction.atomic
     def cambiar_estado(
         self,
@@ -158,15 +385,17 @@ class SolicitudService:
         Raises:
             ValidationError: Si el cambio no es válido
         """
+        self._bloquear(solicitud)
+
         # Validar que no esté en estado final
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede cambiar el estado de una solicitud finalizada')
 
-        estado_anterior = solicitud.estado
+        estado_anterior = self._estado_actual(solicitud)
 
         # Actualizar estado
         solicitud.estado = nuevo_estado
-        solicitud.save()
+        solicitud.save(update_fields=['estado', 'fecha_actualizacion'])
 
         # Registrar en historial
         self.historial_repo.create(
@@ -179,6 +408,76 @@ class SolicitudService:
 
         return solicitud
 
+    @transaction.atomic
+    def cambiar_estado_bulk(
+        self,
+        solicitudes: List[Solicitud],
+        nuevo_estado: EstadoSolicitud,
+        usuario: User,
+        observaciones: str = ''
+    ) -> List[Solicitud]:
+        """
+        Cambia el estado de varias solicitudes en lote.
+
+        Equivale a ``cambiar_estado`` por cada solicitud, pero con un único
+        UPDATE para las solicitudes y el historial insertado por lotes
+        (``SOLICITUDES_BULK_BATCH_SIZE``). Las solicitudes en estado final
+        se omiten en lugar de abortar todo el lote.
+
+        El UPDATE masivo no emite ``post_save`` de Solicitud; se emite aquí
+        por cada solicitud actualizada para que la auditoría y los conteos
+        del menú sigan al día.
+
+        Args:
+            solicitudes: Solicitudes a actualizar
+            nuevo_estado: Nuevo estado
+            usuario: Usuario que realiza el cambio
+            observaciones: Observaciones del cambio
+
+        Returns:
+            List[Solicitud]: Solicitudes efectivamente actualizadas
+        """
+        # Bloquear todas las filas y decidir sobre el estado vigente de cada una
+        estados_vigentes = dict(
+            Solicitud.objects.select_for_update()
+            .filter(pk__in=[s.pk for s in solicitudes])
+            .order_by('pk')
+            .values_list('pk', 'estado_id')
+        )
+        actualizadas = [
+            solicitud for solicitud in solicitudes
+            if solicitud.pk in estados_vigentes
+            and not self.estado_repo.es_final(estados_vigentes[solicitud.pk])
+        ]
+        if not actualizadas:
+            return []
+
+        registros = [
+            HistorialSolicitud(
+                solicitud=solicitud,
+                estado_anterior_id=estados_vigentes[solicitud.pk],
+                estado_nuevo=nuevo_estado,
+                usuario=usuario,
+                observaciones=observaciones
+            )
+            for solicitud in actualizadas
+        ]
+
+        ahora = self._ahora()
+        Solicitud.objects.filter(pk__in=[s.pk for s in actualizadas]).update(
+            estado=nuevo_estado, fecha_actualizacion=ahora
+        )
+        for solicitud in actualizadas:
+            solicitud.estado = nuevo_estado
+            solicitud.fecha_actualizacion = ahora
+        emitir_post_save(
+            Solicitud, actualizadas, created=False,
+            update_fields={'estado', 'fecha_actualizacion'}
+        )
+
+        self.historial_repo.bulk_create(registros)
+        return actualizadas
+
     @transaction.atomic
     def aprobar_solicitud(
         self,
@@ -202,20 +501,24 @@ class SolicitudService:
         Raises:
             ValidationError: Si hay errores de validación
         """
+        self._bloquear(solicitud)
+
         # Validar que no esté finalizada
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede aprobar una solicitud finalizada')
 
-        # Validar que tenga detalles
-        detalles = self.detalle_repo.filter_by_solicitud(solicitud)
-        if not detalles.exists():
+        # Validar que tenga detalles (la misma consulta resuelve cada detalle_id)
+        detalles = self.detalle_repo.get_map_by_solicitud(solicitud)
+        if not detalles:
             raise ValidationError('La solicitud no tiene detalles para aprobar')
 
-        # Actualizar cantidades aprobadas
+        # Validar todas las cantidades antes de escribir nada: un error en el
+        # último detalle no debe desperdiciar escrituras que luego se revierten
+        cambios = []
         for detalle_data in detalles_aprobados:
-            detalle = self.detalle_repo.get_by_id(detalle_data['detalle_id'])
-            if detalle and detalle.solicitud.id == solicitud.id:
-                cantidad_aprobada = Decimal(str(detalle_data['cantidad_aprobada']))
+            detalle = detalles.get(int(detalle_data['detalle_id']))
+            if detalle:
+                cantidad_aprobada = a_decimal(detalle_data['cantidad_aprobada'])
 
                 # Validar que no exceda lo solicitado
                 if cantidad_aprobada > detalle.cantidad_solicitada:
@@ -232,32 +535,41 @@ class SolicitudService:
                         f'La cantidad aprobada para {producto} no puede ser negativa'
                     )
 
-                detalle.cantidad_aprobada = cantidad_aprobada
-                detalle.save()
+                cambios.append((detalle, cantidad_aprobada))
+
+        # Actualizar cantidades aprobadas
+        modificados = []
+        for detalle, cantidad_aprobada in cambios:
+            detalle.cantidad_aprobada = cantidad_aprobada
+            modificados.append(detalle)
+
+        self.detalle_repo.bulk_update(modificados, ['cantidad_aprobada'])
 
         # Actualizar solicitud
         solicitud.aprobador = aprobador
-        solicitud.fecha_aprobacion = timezone.now()
+        solicitud.fecha_aprobacion = self._ahora()
         solicitud.notas_aprobacion = notas_aprobacion
 
-        # Cambiar a estado aprobado (buscar el estado, puede no existir)
-        estado_aprobado = self.estado_repo.get_by_codigo('APROBADA')
+        campos = ['aprobador', 'fecha_aprobacion', 'notas_aprobacion', 'fecha_actualizacion']
+
+        # Cambiar a estado aprobado (buscar el estado, puede no existir).
+        # Si no existe, solo se guarda la información sin cambiar estado.
+        estado_aprobado = self._get_estado(ESTADO_APROBADA)
         if estado_aprobado:
-            estado_anterior = solicitud.estado
+            estado_anterior = self._estado_actual(solicitud)
             solicitud.estado = estado_aprobado
-            solicitud.save()
+            campos.append('estado')
+        solicitud.save(update_fields=campos)
 
+        if estado_aprobado:
             # Registrar en historial
             self.historial_repo.create(
                 solicitud=solicitud,
                 estado_anterior=estado_anterior,
                 estado_nuevo=estado_aprobado,
                 usuario=aprobador,
-                observaciones=f'Aprobada por {aprobador.get_full_name()}. {notas_aprobacion}'
+                observaciones=_MSG_APROBADA.format(nombre=_nombre_usuario(aprobador), notas=notas_aprobacion)
             )
-        else:
-            # Si no existe el estado APROBADA, solo guardar la información sin cambiar estado
-            solicitud.save()
 
         return solicitud
 
@@ -282,22 +594,24 @@ class SolicitudService:
         Raises:
             ValidationError: Si hay errores de validación
         """
+        self._bloquear(solicitud)
+
         # Validar que no esté finalizada
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede rechazar una solicitud finalizada')
 
         if not motivo_rechazo:
             raise ValidationError({'motivo_rechazo': 'Debe indicar el motivo del rechazo'})
 
         # Cambiar a estado rechazado
-        estado_rechazado = self.estado_repo.get_by_codigo('RECHAZAR')
+        estado_rechazado = self._get_estado(ESTADO_RECHAZADA)
         if not estado_rechazado:
             raise ValidationError('No existe el estado RECHAZAR en el sistema')
 
-        estado_anterior = solicitud.estado
+        estado_anterior = self._estado_actual(solicitud)
         solicitud.estado = estado_rechazado
-        solicitud.notas_aprobacion = f'RECHAZADO: {motivo_rechazo}'
-        solicitud.save()
+        solicitud.notas_aprobacion = _NOTA_RECHAZO.format(motivo=motivo_rechazo)
+        solicitud.save(update_fields=['estado', 'notas_aprobacion', 'fecha_actualizacion'])
 
         # Registrar en historial
         self.historial_repo.create(
@@ -305,7 +619,7 @@ class SolicitudService:
             estado_anterior=estado_anterior,
             estado_nuevo=estado_rechazado,
             usuario=rechazador,
-            observaciones=f'Rechazada por {rechazador.get_full_name()}. Motivo: {motivo_rechazo}'
+            observaciones=_MSG_RECHAZADA.format(nombre=_nombre_usuario(rechazador), motivo=motivo_rechazo)
         )
 
         return solicitud
@@ -333,15 +647,24 @@ class SolicitudService:
         Raises:
             ValidationError: Si hay errores de validación
         """
+        self._bloquear(solicitud)
+
         # Validar que no esté finalizada
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede despachar una solicitud finalizada')
 
-        # Actualizar cantidades despachadas
+        # El estado destino debe existir antes de escribir nada
+        estado_despachar = self._get_estado(ESTADO_DESPACHAR)
+        if not estado_despachar:
+            raise ValidationError('No existe el estado DESPACHAR (Para despachar) en el sistema')
+
+        # Validar todas las cantidades antes de escribir nada
+        detalles = self.detalle_repo.get_map_by_solicitud(solicitud)
+        cambios = []
         for detalle_data in detalles_despachados:
-            detalle = self.detalle_repo.get_by_id(detalle_data['detalle_id'])
-            if detalle and detalle.solicitud.id == solicitud.id:
-                cantidad_despachada = Decimal(str(detalle_data['cantidad_despachada']))
+            detalle = detalles.get(int(detalle_data['detalle_id']))
+            if detalle:
+                cantidad_despachada = a_decimal(detalle_data['cantidad_despachada'])
 
                 # Validar que no exceda lo solicitado
                 if cantidad_despachada > detalle.cantidad_solicitada:
@@ -356,31 +679,35 @@ class SolicitudService:
                         f'La cantidad despachada para {detalle.producto_nombre} no puede ser negativa'
                     )
 
-                # En este flujo, no marcamos como despachado aún, 
-                # solo aprobamos las cantidades si no lo estaban.
-                # El despacho real lo hace el módulo de Bodega.
-                if detalle.cantidad_aprobada == 0:
-                    detalle.cantidad_aprobada = cantidad_despachada
-                detalle.save()
+                cambios.append((detalle, cantidad_despachada))
+
+        # Actualizar cantidades: en este flujo no se marca como despachado
+        # aún, solo se aprueban las cantidades si no lo estaban. El despacho
+        # real lo hace el módulo de Bodega.
+        modificados = []
+        for detalle, cantidad_despachada in cambios:
+            if detalle.cantidad_aprobada == 0:
+                detalle.cantidad_aprobada = cantidad_despachada
+                modificados.append(detalle)
+
+        self.detalle_repo.bulk_update(modificados, ['cantidad_aprobada'])
 
         # Actualizar solicitud
         solicitud.despachador = despachador
-        solicitud.fecha_despacho = timezone.now()
+        solicitud.fecha_despacho = self._ahora()
         solicitud.notas_despacho = notas_despacho
         
         # Si no hay aprobador, el despachador asume el rol de aprobador
-        if not solicitud.aprobador:
+        if solicitud.aprobador_id is None:
             solicitud.aprobador = despachador
             solicitud.fecha_aprobacion = solicitud.fecha_despacho
 
-        # Cambiar a estado para despachar
-        estado_despachar = self.estado_repo.get_by_codigo('DESPACHAR')
-        if not estado_despachar:
-            raise ValidationError('No existe el estado DESPACHAR (Para despachar) en el sistema')
-
-        estado_anterior = solicitud.estado
+        estado_anterior = self._estado_actual(solicitud)
         solicitud.estado = estado_despachar
-        solicitud.save()
+        solicitud.save(update_fields=[
+            'estado', 'despachador', 'fecha_despacho', 'notas_despacho',
+            'aprobador', 'fecha_aprobacion', 'fecha_actualizacion',
+        ])
 
         # Registrar en historial
         self.historial_repo.create(
@@ -388,7 +715,7 @@ class SolicitudService:
             estado_anterior=estado_anterior,
             estado_nuevo=estado_despachar,
             usuario=despachador,
-            observaciones=f'Movido a Para Despachar por {despachador.get_full_name()}. {notas_despacho}'
+            observaciones=_MSG_DESPACHAR.format(nombre=_nombre_usuario(despachador), notas=notas_despacho)
         )
 
         return solicitud
@@ -414,22 +741,24 @@ class SolicitudService:
         Raises:
             ValidationError: Si hay errores de validación
         """
+        self._bloquear(solicitud)
+
         # Validar que no esté finalizada
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede cancelar una solicitud finalizada')
 
         if not motivo_cancelacion:
             raise ValidationError({'motivo_cancelacion': 'Debe indicar el motivo de cancelación'})
 
         # Cambiar a estado cancelado
-        estado_cancelado = self.estado_repo.get_by_codigo('CANCELADA')
+        estado_cancelado = self._get_estado(ESTADO_CANCELADA)
         if not estado_cancelado:
             raise ValidationError('No existe el estado CANCELADA en el sistema')
 
-        estado_anterior = solicitud.estado
-        solicitud.estado = estado_cancelado
-        solicitud.observaciones = f'{solicitud.observaciones}\nCANCELADO: {motivo_cancelacion}'
-        solicitud.save()
+        estado_anterior = self._estado_actual(solicitud)
+        self.solicitud_repo.cambiar_estado_con_nota(
+            solicitud, estado_cancelado, _NOTA_CANCELACION.format(motivo=motivo_cancelacion)
+        )
 
         # Registrar en historial
         self.historial_repo.create(
@@ -437,7 +766,7 @@ class SolicitudService:
             estado_anterior=estado_anterior,
             estado_nuevo=estado_cancelado,
             usuario=usuario,
-            observaciones=f'Cancelada por {usuario.get_full_name()}. Motivo: {motivo_cancelacion}'
+            observaciones=_MSG_CANCELADA.format(nombre=_nombre_usuario(usuario), motivo=motivo_cancelacion)
         )
 
         return solicitud
@@ -463,28 +792,31 @@ class SolicitudService:
         Raises:
             ValidationError: Si hay errores de validación
         """
+        self._bloquear(solicitud)
+
         # Validar que esté en estado que permita comprar
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se puede marcar como comprada una solicitud finalizada')
 
         # Cambiar a estado comprar (en compras)
-        estado_comprar = self.estado_repo.get_by_codigo('COMPRAR')
+        estado_comprar = self._get_estado(ESTADO_COMPRAR)
         if not estado_comprar:
             raise ValidationError('No existe el estado COMPRAR en el sistema')
 
-        estado_anterior = solicitud.estado
-        solicitud.estado = estado_comprar
+        estado_anterior = self._estado_actual(solicitud)
 
         # Guardar notas de compra en observaciones
         if notas_compra:
-            solicitud.observaciones = f'{solicitud.observaciones}\nCOMPRA: {notas_compra}' if solicitud.observaciones else f'COMPRA: {notas_compra}'
-
-        solicitud.save()
+            self.solicitud_repo.cambiar_estado_con_nota(
+                solicitud, estado_comprar, _NOTA_COMPRA.format(notas=notas_compra)
+            )
+        else:
+            solicitud.estado = estado_comprar
+            solicitud.save(update_fields=['estado', 'fecha_actualizacion'])
 
         # Registrar en historial
-        observaciones_historial = f'Enviada a compras por {comprador.get_full_name()}'
-        if notas_compra:
-            observaciones_historial += f'. Notas: {notas_compra}'
+        plantilla = _MSG_COMPRAR_NOTAS if notas_compra else _MSG_COMPRAR
+        observaciones_historial = plantilla.format(nombre=_nombre_usuario(comprador), notas=notas_compra)
 
         self.historial_repo.create(
             solicitud=solicitud,
@@ -504,6 +836,7 @@ class DetalleSolicitudService:
 
     def __init__(self):
         self.detalle_repo = DetalleSolicitudRepository()
+        self.estado_repo = EstadoSolicitudRepository()
 
     @transaction.atomic
     def agregar_detalle(
@@ -529,7 +862,7 @@ class DetalleSolicitudService:
             ValidationError: Si hay errores de validación
         """
         # Validar que la solicitud no esté finalizada
-        if solicitud.estado.es_final:
+        if self.estado_repo.es_final(solicitud.estado_id):
             raise ValidationError('No se pueden agregar detalles a una solicitud finalizada')
 
         # Validar cantidad
@@ -560,10 +893,10 @@ class DetalleSolicitudService:
             ValidationError: Si la solicitud está finalizada
         """
         # Validar que la solicitud no esté finalizada
-        if detalle.solicitud.estado.es_final:
+        if self.estado_repo.es_final(detalle.solicitud.estado_id):
             raise ValidationError('No se pueden eliminar detalles de una solicitud finalizada')
 
         # Soft delete
         detalle.eliminado = True
         detalle.activo = False
-        detalle.save()
+        detalle.save(update_fields=['eliminado', 'activo', 'fecha_actualizacion'])
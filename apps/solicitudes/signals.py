@@ -0,0 +1,47 @@
+"""
+Señales del módulo de solicitudes.
+
+Mantiene coherente el cache de catálogos, de productos disponibles y de
+conteos del menú usado por los repositories.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.activos.models import Activo, CategoriaActivo
+from apps.bodega.models import Articulo, Categoria, UnidadMedida
+
+from .models import Area, Departamento, EstadoSolicitud, Solicitud, TipoSolicitud
+from .repositories import invalidar_cache_catalogo, invalidar_menu_stats
+
+
+@receiver([post_save, post_delete], sender=Departamento)
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender=TipoSolicitud)
+@receiver([post_save, post_delete], sender=EstadoSolicitud)
+def invalidar_catalogo(sender, **kwargs):
+    """Invalida el cache del catálogo modificado."""
+    invalidar_cache_catalogo(sender)
+    if sender is Departamento:
+        # Las áreas cacheadas incluyen su departamento (select_related)
+        invalidar_cache_catalogo(Area)
+
+
+@receiver([post_save, post_delete], sender=Solicitud)
+def invalidar_conteos_menu(sender, **kwargs):
+    """Descarta los conteos del menú al crear, modificar o borrar una solicitud."""
+    invalidar_menu_stats()
+
+
+@receiver([post_save, post_delete], sender=Activo)
+@receiver([post_save, post_delete], sender=CategoriaActivo)
+def invalidar_activos_disponibles(sender, **kwargs):
+    """Invalida la lista de activos de los formularios (incluye su categoría)."""
+    invalidar_cache_catalogo(Activo)
+
+
+@receiver([post_save, post_delete], sender=Articulo)
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=UnidadMedida)
+def invalidar_articulos_disponibles(sender, **kwargs):
+    """Invalida la lista de artículos de los formularios (incluye categoría y unidad)."""
+    invalidar_cache_catalogo(Articulo)
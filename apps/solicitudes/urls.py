@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
 
 app_name = 'solicitudes'
@@ -13,16 +13,21 @@ urlpatterns = [
     # Mis Solicitudes: muestra solo las solicitudes del usuario actual
     path('mis-solicitudes/', views.MisSolicitudesListView.as_view(), name='mis_solicitudes'),
 
-    # ==================== DETALLE Y EDICIÓN ====================
-    path('<int:pk>/', views.SolicitudDetailView.as_view(), name='detalle_solicitud'),
-    path('<int:pk>/editar/', views.SolicitudUpdateView.as_view(), name='editar_solicitud'),
-    path('<int:pk>/eliminar/', views.SolicitudDeleteView.as_view(), name='eliminar_solicitud'),
+    # ==================== DETALLE, EDICIÓN Y FLUJO ====================
+    # Las rutas por solicitud comparten el prefijo ``<int:pk>/``: agrupadas en
+    # un include el resolver lo evalúa una sola vez y luego prueba solo las
+    # acciones, en vez de recorrer cada ruta completa. Los nombres no cambian.
+    path('<int:pk>/', include([
+        path('', views.SolicitudDetailView.as_view(), name='detalle_solicitud'),
+        path('editar/', views.SolicitudUpdateView.as_view(), name='editar_solicitud'),
+        path('eliminar/', views.SolicitudDeleteView.as_view(), name='eliminar_solicitud'),
 
-    # ==================== FLUJO DE APROBACIÓN Y DESPACHO ====================
-    path('<int:pk>/aprobar/', views.SolicitudAprobarView.as_view(), name='aprobar_solicitud'),
-    path('<int:pk>/rechazar/', views.SolicitudRechazarView.as_view(), name='rechazar_solicitud'),
-    path('<int:pk>/despachar/', views.SolicitudDespacharView.as_view(), name='despachar_solicitud'),
-    path('<int:pk>/comprar/', views.SolicitudComprarView.as_view(), name='comprar_solicitud'),
+        # Flujo de aprobación y despacho
+        path('aprobar/', views.SolicitudAprobarView.as_view(), name='aprobar_solicitud'),
+        path('rechazar/', views.SolicitudRechazarView.as_view(), name='rechazar_solicitud'),
+        path('despachar/', views.SolicitudDespacharView.as_view(), name='despachar_solicitud'),
+        path('comprar/', views.SolicitudComprarView.as_view(), name='comprar_solicitud'),
+    ])),
 
     # ==================== CREACIÓN DE SOLICITUDES ====================
     # Solicitudes de Bienes (tipo=ACTIVO)
@@ -9,8 +9,12 @@ Este archivo implementa todas las vistas usando CBVs siguiendo SOLID y DRY:
 - Auditoría automática
 - Workflow de aprobación y despacho
 """
+import re
+from collections import defaultdict
 from typing import Any
-from django.db.models import QuerySet, Q
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet, Q
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, render
 from django.contrib import messages
@@ -21,10 +25,12 @@ from django.views.generic import (
 from core.mixins import (
     BaseAuditedViewMixin, AtomicTransactionMixin, SoftDeleteMixin,
     ScopedObjectPermissionMixin,
-    PaginatedListMixin, FilteredListMixin
+    PaginatedListMixin, FilteredListMixin, PkCountPaginator
 )
 from core.utils import registrar_log_auditoria
-from core.authz import can_view_solicitud, scope_solicitudes_for_user
+from core.authz import (
+    annotate_permisos, can_view_solicitud, request_permission_checker, scope_solicitudes_for_user,
+)
 from .mixins import (
     GestionSolicitudesPermissionMixin,
     AprobarSolicitudesPermissionMixin,
@@ -45,13 +51,43 @@ from .forms import (
     FiltroSolicitudesForm, TipoSolicitudForm, EstadoSolicitudForm
 )
 from .repositories import (
-    TipoSolicitudRepository, EstadoSolicitudRepository, SolicitudRepository,
-    DetalleSolicitudRepository, HistorialSolicitudRepository
+    EstadoSolicitudRepository, SolicitudRepository,
+    DetalleSolicitudRepository, HistorialSolicitudRepository, ProductoDisponibleRepository
 )
 from .services import SolicitudService, DetalleSolicitudService
 from decimal import Decimal
 
 
+# Filas detalles[<índice>][<campo>] del POST de los formularios de creación
+_DETALLE_POST_RE = re.compile(r'detalles\[(\d+)\]\[(\w+)\]$')
+
+
+def _extraer_detalles_post(post_data, campo_producto: str) -> list[dict]:
+    """
+    Agrupa los detalles enviados en el POST por índice en una sola pasada.
+
+    ``campo_producto`` es ``activo_id`` o ``articulo_id``. Se descartan las
+    filas sin producto o sin cantidad; el orden es el de los campos del POST.
+    """
+    filas = defaultdict(dict)
+    for key, valor in post_data.items():
+        match = _DETALLE_POST_RE.match(key)
+        if match:
+            filas[match.group(1)][match.group(2)] = valor
+
+    detalles = []
+    for fila in filas.values():
+        producto_id = fila.get(campo_producto)
+        cantidad_solicitada = fila.get('cantidad_solicitada')
+        if producto_id and cantidad_solicitada:
+            detalles.append({
+                campo_producto: int(producto_id),
+                'cantidad_solicitada': float(cantidad_solicitada),
+                'observaciones': fila.get('observaciones', ''),
+            })
+    return detalles
+
+
 # ==================== VISTA MENÚ PRINCIPAL ====================
 
 class MenuSolicitudesView(BaseAuditedViewMixin, TemplateView):
@@ -73,67 +109,86 @@ class MenuSolicitudesView(BaseAuditedViewMixin, TemplateView):
         # Inicializar repositories
         solicitud_repo = SolicitudRepository()
         estado_repo = EstadoSolicitudRepository()
-        tipo_repo = TipoSolicitudRepository()
 
-        # Estadísticas del módulo usando repositories
-        estado_pendiente = estado_repo.get_by_codigo('PENDIENTE')
-        pendientes_count = 0
-        if estado_pendiente:
-            pendientes_count = solicitud_repo.filter_by_estado(estado_pendiente).count()
+        # Datos para tabs (Tipos y Estados inline); se evalúan aquí porque
+        # también alimentan los conteos de mantenedores
+        tipos = list(TipoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey'))
+        estados = list(EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey'))
+        context['tipos_solicitud'] = tipos
+        context['estados_solicitud'] = estados
 
+        # Estadísticas del módulo: una sola consulta con conteos condicionales,
+        # cacheada por unos segundos (ver menu_counts_cached)
         context['stats'] = {
-            'total_solicitudes': solicitud_repo.get_all().count(),
-            'mis_solicitudes': solicitud_repo.filter_by_solicitante(user).count(),
-            'solicitudes_activos': solicitud_repo.filter_by_tipo_choice('ACTIVO').count(),
-            'solicitudes_articulos': solicitud_repo.filter_by_tipo_choice('ARTICULO').count(),
-            'pendientes': pendientes_count,
+            **solicitud_repo.menu_counts_cached(user, estado_repo.get_id_por_codigo('PENDIENTE')),
             # Estadísticas de mantenedores
-            'total_tipos_solicitud': tipo_repo.get_all().count(),
-            'total_estados_solicitud': estado_repo.get_all().count(),
+            'total_tipos_solicitud': sum(1 for tipo in tipos if tipo.activo),
+            'total_estados_solicitud': sum(1 for estado in estados if estado.activo),
         }
 
-        # Permisos del usuario (usando nuevos permisos personalizados)
+        # Permisos del usuario (usando nuevos permisos personalizados),
+        # resueltos en un solo conjunto en vez de un has_perm por permiso
+        tiene = request_permission_checker(self.request)
         context['permisos'] = {
             # Permisos de gestión
-            'puede_gestionar': user.has_perm('solicitudes.gestionar_solicitudes'),
-            'puede_aprobar': user.has_perm('solicitudes.aprobar_solicitudes'),
-            'puede_rechazar': user.has_perm('solicitudes.rechazar_solicitudes'),
-            'puede_despachar': user.has_perm('solicitudes.despachar_solicitudes'),
-            'puede_ver_todas': user.has_perm('solicitudes.ver_todas_solicitudes'),
+            'puede_gestionar': tiene('solicitudes.gestionar_solicitudes'),
+            'puede_aprobar': tiene('solicitudes.aprobar_solicitudes'),
+            'puede_rechazar': tiene('solicitudes.rechazar_solicitudes'),
+            'puede_despachar': tiene('solicitudes.despachar_solicitudes'),
+            'puede_ver_todas': tiene('solicitudes.ver_todas_solicitudes'),
 
             # Permisos de solicitud de artículos
-            'puede_crear_articulos': user.has_perm('solicitudes.crear_solicitud_articulos'),
-            'puede_ver_solicitudes_articulos': user.has_perm('solicitudes.ver_solicitudes_articulos'),
+            'puede_crear_articulos': tiene('solicitudes.crear_solicitud_articulos'),
+            'puede_ver_solicitudes_articulos': tiene('solicitudes.ver_solicitudes_articulos'),
 
             # Permisos de solicitud de bienes
-            'puede_crear_bienes': user.has_perm('solicitudes.crear_solicitud_bienes'),
-            'puede_ver_solicitudes_bienes': user.has_perm('solicitudes.ver_solicitudes_bienes'),
+            'puede_crear_bienes': tiene('solicitudes.crear_solicitud_bienes'),
+            'puede_ver_solicitudes_bienes': tiene('solicitudes.ver_solicitudes_bienes'),
 
             # Permisos de mis solicitudes
-            'puede_ver_mis_solicitudes': user.has_perm('solicitudes.ver_mis_solicitudes'),
-            'puede_editar_mis_solicitudes': user.has_perm('solicitudes.editar_mis_solicitudes'),
-            'puede_eliminar_mis_solicitudes': user.has_perm('solicitudes.eliminar_mis_solicitudes'),
+            'puede_ver_mis_solicitudes': tiene('solicitudes.ver_mis_solicitudes'),
+            'puede_editar_mis_solicitudes': tiene('solicitudes.editar_mis_solicitudes'),
+            'puede_eliminar_mis_solicitudes': tiene('solicitudes.eliminar_mis_solicitudes'),
 
             # Permisos para mantenedores
-            'puede_gestionar_mantenedores': (
-                user.has_perm('solicitudes.view_tiposolicitud') or
-                user.has_perm('solicitudes.change_tiposolicitud') or
-                user.has_perm('solicitudes.view_estadosolicitud') or
-                user.has_perm('solicitudes.change_estadosolicitud')
-            ),
+            'puede_gestionar_mantenedores': any(tiene(perm) for perm in (
+                'solicitudes.view_tiposolicitud',
+                'solicitudes.change_tiposolicitud',
+                'solicitudes.view_estadosolicitud',
+                'solicitudes.change_estadosolicitud',
+            )),
         }
 
         context['titulo'] = 'Gestores - Solicitudes'
 
-        # Datos para tabs (Tipos y Estados inline)
-        context['tipos_solicitud'] = TipoSolicitud.objects.filter(eliminado=False).order_by('codigo')
-        context['estados_solicitud'] = EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo')
-
         return context
 
 
 # ==================== VISTAS DE SOLICITUDES GENERALES ====================
 
+# Campo del formulario de filtros -> lookup sobre Solicitud
+_FILTROS_SOLICITUD = {
+    'estado': 'estado',
+    'tipo': 'tipo_solicitud',
+    'fecha_desde': 'fecha_solicitud__gte',
+    'fecha_hasta': 'fecha_solicitud__lte',
+}
+
+
+def _filtros_solicitud(data: dict) -> dict:
+    """
+    Traduce los filtros informados a argumentos de ``filter``.
+
+    Todos se aplican en una sola llamada (un único clon del queryset);
+    ``buscar`` queda fuera porque se resuelve con un ``Q``.
+    """
+    return {
+        lookup: data[campo]
+        for campo, lookup in _FILTROS_SOLICITUD.items()
+        if data.get(campo)
+    }
+
+
 class SolicitudListView(GestionSolicitudesPermissionMixin, BaseAuditedViewMixin, PaginatedListMixin, ListView):
     """
     Vista para listar todas las solicitudes con filtros (GESTIÓN).
@@ -145,40 +200,43 @@ class SolicitudListView(GestionSolicitudesPermissionMixin, BaseAuditedViewMixin,
     template_name = 'solicitudes/lista_solicitudes.html'
     context_object_name = 'solicitudes'
     paginate_by = 25
+    paginator_class = PkCountPaginator
     filter_form_class = FiltroSolicitudesForm
+    filter_keys = frozenset(FiltroSolicitudesForm.base_fields)
+
+    def get_filter_form(self) -> FiltroSolicitudesForm:
+        """
+        Construye el formulario de filtros una sola vez por petición.
+
+        Si la URL no trae ningún filtro (la página por defecto) el formulario
+        queda sin datos: se muestra vacío igual, pero ni la vista ni la
+        plantilla lo validan.
+        """
+        if not hasattr(self, '_filter_form'):
+            data = self.request.GET if self.filter_keys.intersection(self.request.GET) else None
+            self._filter_form = self.filter_form_class(data)
+        return self._filter_form
 
     def get_queryset(self) -> QuerySet:
         """Retorna solicitudes con relaciones optimizadas y filtros."""
-        queryset = super().get_queryset().select_related(
-            'tipo_solicitud', 'estado', 'solicitante', 'bodega_origen'
+        # Los catálogos (pocos valores distintos) se precargan con una consulta
+        # IN cada uno en vez de unirse y repetirse en cada fila de la página
+        queryset = super().get_queryset().select_related('solicitante').prefetch_related(
+            'tipo_solicitud', 'estado', 'bodega_origen'
         )
         queryset = scope_solicitudes_for_user(queryset, self.request.user)
+        queryset = annotate_permisos(
+            queryset, self.request.user, request_permission_checker(self.request)
+        )
 
-        # Aplicar filtros del formulario
-        form = self.filter_form_class(self.request.GET)
+        # Aplicar filtros del formulario (is_valid es False si no hay filtros)
+        form = self.get_filter_form()
         if form.is_valid():
             data = form.cleaned_data
-
-            if data.get('estado'):
-                queryset = queryset.filter(estado=data['estado'])
-
-            if data.get('tipo'):
-                queryset = queryset.filter(tipo_solicitud=data['tipo'])
-
-            if data.get('fecha_desde'):
-                queryset = queryset.filter(fecha_solicitud__gte=data['fecha_desde'])
-
-            if data.get('fecha_hasta'):
-                queryset = queryset.filter(fecha_solicitud__lte=data['fecha_hasta'])
+            queryset = queryset.filter(**_filtros_solicitud(data))
 
             if data.get('buscar'):
-                q = data['buscar']
-                queryset = queryset.filter(
-                    Q(numero__icontains=q) |
-                    Q(solicitante__username__icontains=q) |
-                    Q(area__nombre__icontains=q) |
-                    Q(departamento__nombre__icontains=q)
-                )
+                queryset = queryset.filter(SolicitudRepository.filtro_busqueda(data['buscar']))
 
         return queryset.order_by('-fecha_solicitud')
 
@@ -186,10 +244,68 @@ class SolicitudListView(GestionSolicitudesPermissionMixin, BaseAuditedViewMixin,
         """Agrega datos adicionales al contexto."""
         context = super().get_context_data(**kwargs)
         context['titulo'] = 'Solicitudes'
-        context['form'] = self.filter_form_class(self.request.GET)
+        context['form'] = self.get_filter_form()
         return context
 
 
+def _es_modal(request) -> bool:
+    """
+    Indica si la petición viene del modal (AJAX o ``?modal=1``).
+
+    Se evalúa una vez y queda guardado en ``request``: varias etapas de la
+    misma vista (plantilla, respuesta tras guardar) lo consultan.
+    """
+    es_modal = getattr(request, '_es_modal', None)
+    if es_modal is None:
+        es_modal = (
+            request.headers.get('x-requested-with') == 'XMLHttpRequest'
+            or request.GET.get('modal') == '1'
+        )
+        request._es_modal = es_modal
+    return es_modal
+
+
+def _contexto_detalle(solicitud: Solicitud) -> dict:
+    """
+    Arma el contexto del detalle de una solicitud.
+
+    Supone que ``solicitud`` se cargó con ``SolicitudRepository.con_detalle``:
+    detalles e historial se sirven desde la precarga, sin consultas adicionales.
+    """
+    return {
+        'solicitud': solicitud,
+        'detalles': solicitud.detalles.all(),
+        'historial': solicitud.historial.all(),
+    }
+
+
+def _respuesta_modal_detalle(request, solicitud_pk: int, solicitud: Solicitud | None = None):
+    """
+    Renderiza el modal de detalle tras una acción sobre la solicitud.
+
+    Recarga la solicitud una vez con ``SolicitudRepository.get_con_detalle``:
+    detalles e historial llegan en las precargas en vez de consultarse por
+    separado. Si la vista ya la tiene cargada con
+    ``con_detalle(historial=False)`` puede pasarla en ``solicitud``: solo se
+    consulta el historial, que la acción acaba de modificar.
+    """
+    if solicitud is None:
+        solicitud = SolicitudRepository.get_con_detalle(solicitud_pk)
+        contexto = _contexto_detalle(solicitud)
+    else:
+        contexto = {
+            'solicitud': solicitud,
+            'detalles': solicitud.detalles.all(),
+            'historial': HistorialSolicitudRepository.filter_by_solicitud(solicitud),
+        }
+    # Usar modal diferente según si es mis solicitudes o admin
+    if solicitud.solicitante_id == request.user.pk:
+        modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html'
+    else:
+        modal_template = 'solicitudes/partials/modal_detalle_admin.html'
+    return render(request, modal_template, contexto)
+
+
 class SolicitudDetailView(ScopedObjectPermissionMixin, BaseAuditedViewMixin, DetailView):
     """
     Vista para ver el detalle de una solicitud.
@@ -202,13 +318,9 @@ class SolicitudDetailView(ScopedObjectPermissionMixin, BaseAuditedViewMixin, Det
     permission_required = 'solicitudes.view_solicitud'
 
     def get_queryset(self) -> QuerySet:
-        """Optimiza consultas con select_related."""
+        """Optimiza consultas con select_related y precarga detalles e historial."""
         return scope_solicitudes_for_user(
-            super().get_queryset().select_related(
-            'tipo_solicitud', 'estado', 'solicitante', 'aprobador',
-            'despachador', 'bodega_origen', 'departamento', 'area'
-            ),
-            self.request.user
+            SolicitudRepository.con_detalle(super().get_queryset()), self.request.user
         )
 
     def has_object_permission(self, obj) -> bool:
@@ -219,16 +331,8 @@ class SolicitudDetailView(ScopedObjectPermissionMixin, BaseAuditedViewMixin, Det
         context = super().get_context_data(**kwargs)
         context['titulo'] = f'Solicitud {self.object.numero}'
 
-        context['detalles'] = self.object.detalles.filter(eliminado=False).select_related(
-            'articulo',
-            'articulo__categoria',
-            'activo',
-            'activo__categoria'
-        ).order_by('id')
-
-        context['historial'] = self.object.historial.select_related(
-            'estado_anterior', 'estado_nuevo', 'usuario'
-        )
+        # Servidos desde la precarga de get_queryset
+        context.update(_contexto_detalle(self.object))
 
         # Pasar el origen al contexto para que el template de página completa sepa cuál tabla usar
         context['origen'] = self.request.GET.get('origen', 'mis')
@@ -237,7 +341,7 @@ class SolicitudDetailView(ScopedObjectPermissionMixin, BaseAuditedViewMixin, Det
 
     def get_template_names(self):
         # Si la petición es AJAX o se solicita modal, devolver el modal según el origen
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             if self.request.GET.get('origen') == 'admin':
                 return ['solicitudes/partials/modal_detalle_admin.html']
             else:
@@ -255,6 +359,7 @@ class MisSolicitudesListView(MisSolicitudesPermissionMixin, BaseAuditedViewMixin
     template_name = 'solicitudes/mis_solicitudes.html'
     context_object_name = 'solicitudes'
     paginate_by = 25
+    paginator_class = PkCountPaginator
 
     def get_queryset(self) -> QuerySet:
         """Retorna solo las solicitudes del usuario actual."""
@@ -291,10 +396,20 @@ class SolicitudCreateView(BaseAuditedViewMixin, AtomicTransactionMixin, CreateVi
     # Mensaje de éxito
     success_message = 'Solicitud {obj.numero} creada exitosamente.'
 
+    # Campo del producto en las filas de detalle del POST (vistas por tipo)
+    item_id_field = ''
+
     def get_success_url(self) -> str:
         """Redirige al detalle de la solicitud creada."""
         return reverse_lazy('solicitudes:detalle_solicitud', kwargs={'pk': self.object.pk})
 
+    def _extraer_detalles_post(self, post_data) -> list[dict]:
+        """
+        Extrae los detalles del POST.
+        Formato esperado: detalles[0][<item_id_field>], detalles[0][cantidad_solicitada], etc.
+        """
+        return _extraer_detalles_post(post_data, self.item_id_field)
+
     def get_context_data(self, **kwargs) -> dict:
         """Agrega formset y datos al contexto."""
         context = super().get_context_data(**kwargs)
@@ -402,7 +517,7 @@ class SolicitudUpdateView(EditarMisSolicitudesPermissionMixin, BaseAuditedViewMi
 
     def get_template_names(self):
         # Si la petición es AJAX o se solicita modal, devolver plantilla parcial del formulario
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/partials/modal_form.html']
         return [self.template_name]
 
@@ -424,21 +539,13 @@ class SolicitudUpdateView(EditarMisSolicitudesPermissionMixin, BaseAuditedViewMi
             self.log_action(self.object, self.request)
 
             # Si es petición AJAX, devolver el detalle parcial para mostrar en modal
-            if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
-                # Construir contexto usando la DetailView para mantener consistencia
-                detalle_view = SolicitudDetailView()
-                detalle_view.request = self.request
-                detalle_view.object = self.object
-                detalle_context = detalle_view.get_context_data()
-                # Usar modal diferente según si es mis solicitudes o admin
-                es_mis_solicitudes = self.object.solicitante == self.request.user
-                modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html' if es_mis_solicitudes else 'solicitudes/partials/modal_detalle_admin.html'
-                return render(self.request, modal_template, detalle_context)
+            if _es_modal(self.request):
+                return _respuesta_modal_detalle(self.request, self.object.pk)
 
             return super().form_valid(form)
         else:
             # Si es AJAX, re-renderizar el formulario con errores para inyectarlo en el modal
-            if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+            if _es_modal(self.request):
                 return render(self.request, 'solicitudes/partials/modal_form.html', context)
             return self.form_invalid(form)
 
@@ -460,6 +567,25 @@ class SolicitudDeleteView(EliminarMisSolicitudesPermissionMixin, BaseAuditedView
     audit_action = 'ELIMINAR'
     audit_description_template = 'Eliminó solicitud {obj.numero}'
 
+    def get_queryset(self) -> QuerySet:
+        """
+        Solo las columnas que usan los permisos, la confirmación y el borrado.
+
+        El texto libre de la solicitud (motivo, observaciones, ...) no se lee.
+        """
+        return super().get_queryset().select_related('tipo_solicitud', 'estado').only(
+            'numero', 'solicitante', 'fecha_solicitud',
+            'tipo_solicitud__nombre', 'estado__nombre', 'estado__es_inicial',
+        )
+
+    def get_object(self, queryset=None):
+        """Carga la solicitud una sola vez (permisos, validación de estado y borrado la piden)."""
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_solicitud'):
+            self._solicitud = super().get_object()
+        return self._solicitud
+
     # Mensaje de éxito
     success_message = 'Solicitud {obj.numero} eliminada exitosamente.'
 
@@ -508,6 +634,23 @@ class SolicitudAprobarView(AprobarSolicitudesPermissionMixin, BaseAuditedViewMix
     audit_action = 'APROBAR'
     audit_description_template = 'Aprobó solicitud {obj.numero}'
 
+    def get_queryset(self):
+        """
+        Precarga los detalles vigentes una sola vez.
+
+        El formulario, la plantilla y el armado de ``detalles_aprobados`` en
+        ``post`` recorren ``solicitud.detalles.all()``: con el prefetch los
+        tres comparten la misma consulta.
+        """
+        return super().get_queryset().select_related('estado', 'solicitante').prefetch_related(
+            Prefetch(
+                'detalles',
+                queryset=DetalleSolicitud.objects.alive().select_related(
+                    'articulo__unidad_medida', 'activo'
+                )
+            )
+        )
+
     def get_context_data(self, **kwargs) -> dict:
         """Agrega formulario y datos al contexto."""
         context = super().get_context_data(**kwargs)
@@ -522,7 +665,7 @@ class SolicitudAprobarView(AprobarSolicitudesPermissionMixin, BaseAuditedViewMix
 
     def get_template_names(self):
         """Devuelve el partial si es modal."""
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/aprobar_solicitud.html']
         return [self.template_name]
 
@@ -550,15 +693,8 @@ class SolicitudAprobarView(AprobarSolicitudesPermissionMixin, BaseAuditedViewMix
         if form.is_valid():
             solicitud_service = SolicitudService()
 
-            # Preparar detalles aprobados
-            detalles_aprobados = []
-            for detalle in self.object.detalles.all():
-                field_name = f'cantidad_aprobada_{detalle.id}'
-                if field_name in form.cleaned_data:
-                    detalles_aprobados.append({
-                        'detalle_id': detalle.id,
-                        'cantidad_aprobada': form.cleaned_data[field_name]
-                    })
+            # Preparar detalles aprobados (el formulario ya conoce sus detalles)
+            detalles_aprobados = form.get_detalles_aprobados()
 
             try:
                 # Aprobar usando service
@@ -600,9 +736,13 @@ class SolicitudRechazarView(RechazarSolicitudesPermissionMixin, BaseAuditedViewM
     audit_action = 'RECHAZAR'
     audit_description_template = 'Rechazó solicitud {obj.numero}'
 
+    def get_queryset(self):
+        """Trae en la misma consulta las relaciones que leen la validación y el modal."""
+        return super().get_queryset().select_related('estado', 'tipo_solicitud', 'solicitante')
+
     def get_template_names(self):
         """Devuelve el partial si es modal."""
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/rechazar_solicitud.html']
         return [self.template_name]
 
@@ -626,7 +766,10 @@ class SolicitudRechazarView(RechazarSolicitudesPermissionMixin, BaseAuditedViewM
 
     def post(self, request, *args, **kwargs):
         """Procesa el rechazo de la solicitud."""
-        self.object = self.get_object()
+        # Leída y bloqueada en una sola consulta: el service no vuelve a bloquearla
+        self.object = SolicitudService.marcar_bloqueada(
+            self.get_object(SolicitudRepository.para_actualizar(self.get_queryset()))
+        )
         form = RechazarSolicitudForm(request.POST)
 
         if form.is_valid():
@@ -646,8 +789,8 @@ class SolicitudRechazarView(RechazarSolicitudesPermissionMixin, BaseAuditedViewM
                 messages.success(request, f'Solicitud {self.object.numero} rechazada exitosamente.')
                 
                 # Si es petición AJAX/modal, devolver el partial del detalle
-                if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.GET.get('modal') == '1':
-                    return self._render_modal_detail_response(self.object)
+                if _es_modal(request):
+                    return _respuesta_modal_detalle(request, self.object.pk)
 
                 return redirect('solicitudes:detalle_solicitud', pk=self.object.pk)
 
@@ -659,21 +802,6 @@ class SolicitudRechazarView(RechazarSolicitudesPermissionMixin, BaseAuditedViewM
         # Si el formulario no es válido, mostrar errores
         return self.render_to_response(self.get_context_data(form=form))
 
-    def _render_modal_detail_response(self, solicitud):
-        """Helper para renderizar la respuesta del modal tras acción exitosa."""
-        from .repositories import HistorialSolicitudRepository
-        historial_repo = HistorialSolicitudRepository()
-        context = {
-            'solicitud': solicitud,
-            'detalles': solicitud.detalles.filter(eliminado=False).select_related(
-                'articulo', 'articulo__categoria', 'activo', 'activo__categoria'
-            ).order_by('id'),
-            'historial': historial_repo.filter_by_solicitud(solicitud)
-        }
-        es_mis_solicitudes = solicitud.solicitante == self.request.user
-        modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html' if es_mis_solicitudes else 'solicitudes/partials/modal_detalle_admin.html'
-        return render(self.request, modal_template, context)
-
 
 class SolicitudDespacharView(DespacharSolicitudesPermissionMixin, BaseAuditedViewMixin, AtomicTransactionMixin, DetailView):
     """
@@ -688,9 +816,10 @@ class SolicitudDespacharView(DespacharSolicitudesPermissionMixin, BaseAuditedVie
     context_object_name = 'solicitud'
 
     def get_queryset(self):
-        """Optimiza la consulta para incluir detalles y stock."""
-        from django.db.models import Prefetch
-        return super().get_queryset().prefetch_related(
+        """Optimiza la consulta para incluir estado, detalles y stock."""
+        return super().get_queryset().select_related(
+            'estado', 'tipo_solicitud', 'solicitante'
+        ).prefetch_related(
             Prefetch(
                 'detalles',
                 queryset=DetalleSolicitud.objects.select_related(
@@ -708,7 +837,7 @@ class SolicitudDespacharView(DespacharSolicitudesPermissionMixin, BaseAuditedVie
 
     def get_template_names(self):
         """Devuelve el partial si es modal."""
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/despachar_solicitud.html']
         return [self.template_name]
 
@@ -737,7 +866,10 @@ class SolicitudDespacharView(DespacharSolicitudesPermissionMixin, BaseAuditedVie
 
     def post(self, request, *args, **kwargs):
         """Procesa el despacho de la solicitud."""
-        self.object = self.get_object()
+        # Leída y bloqueada en una sola consulta: el service no vuelve a bloquearla
+        self.object = SolicitudService.marcar_bloqueada(
+            self.get_object(SolicitudRepository.para_actualizar(self.get_queryset()))
+        )
         form = DespacharSolicitudForm(request.POST, solicitud=self.object)
 
         if form.is_valid():
@@ -768,11 +900,8 @@ class SolicitudDespacharView(DespacharSolicitudesPermissionMixin, BaseAuditedVie
                 messages.success(request, f'Solicitud {self.object.numero} despachada exitosamente.')
                 
                 # Si es petición AJAX/modal, devolver parcial
-                if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.GET.get('modal') == '1':
-                    # Reutilizar el helper de RechazarView
-                    rechazar_view = SolicitudRechazarView()
-                    rechazar_view.request = request
-                    return rechazar_view._render_modal_detail_response(self.object)
+                if _es_modal(request):
+                    return _respuesta_modal_detalle(request, self.object.pk)
 
                 return redirect('solicitudes:detalle_solicitud', pk=self.object.pk)
 
@@ -800,14 +929,23 @@ class SolicitudComprarView(DespacharSolicitudesPermissionMixin, BaseAuditedViewM
 
     def post(self, request, pk):
         """Procesa el envío de la solicitud a compras usando SolicitudService."""
-        try:
-            solicitud = Solicitud.objects.get(pk=pk)
-        except Solicitud.DoesNotExist:
+        # Bloqueada en la misma consulta: el service no vuelve a bloquearla
+        if _es_modal(request):
+            # El modal muestra esta misma instancia: se carga completa y con
+            # sus detalles (la compra no los modifica), sin recargarla después
+            solicitud = SolicitudRepository.para_actualizar(
+                SolicitudRepository.con_detalle(Solicitud.objects.alive(), historial=False)
+            ).filter(pk=pk).first()
+        else:
+            # Solo las columnas de la transición: el texto de la solicitud no se lee
+            solicitud = SolicitudRepository.get_for_state_change(pk, bloquear=True)
+        if solicitud is None:
             messages.error(request, 'Solicitud no encontrada.')
             return redirect('solicitudes:lista_solicitudes')
+        SolicitudService.marcar_bloqueada(solicitud)
 
         # Verificar que no esté finalizada
-        if solicitud.estado.es_final:
+        if EstadoSolicitudRepository.es_final(solicitud.estado_id):
             messages.warning(request, 'No se puede enviar a compras una solicitud finalizada.')
             return redirect('solicitudes:detalle_solicitud', pk=solicitud.pk)
 
@@ -831,20 +969,8 @@ class SolicitudComprarView(DespacharSolicitudesPermissionMixin, BaseAuditedViewM
             messages.error(request, error_msg)
 
         # Si es petición AJAX/modal, devolver el partial actualizado
-        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.GET.get('modal') == '1':
-            from .repositories import HistorialSolicitudRepository
-            historial_repo = HistorialSolicitudRepository()
-            context = {
-                'solicitud': solicitud,
-                'detalles': solicitud.detalles.filter(eliminado=False).select_related(
-                    'articulo', 'articulo__categoria', 'activo', 'activo__categoria'
-                ).order_by('id'),
-                'historial': historial_repo.filter_by_solicitud(solicitud)
-            }
-            # Usar modal diferente según si es mis solicitudes o admin
-            es_mis_solicitudes = solicitud.solicitante == request.user
-            modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html' if es_mis_solicitudes else 'solicitudes/partials/modal_detalle_admin.html'
-            return render(request, modal_template, context)
+        if _es_modal(request):
+            return _respuesta_modal_detalle(request, solicitud.pk, solicitud)
 
         return redirect('solicitudes:detalle_solicitud', pk=solicitud.pk)
 
@@ -861,7 +987,7 @@ class SolicitudActivoListView(VerSolicitudesBienesPermissionMixin, SolicitudList
 
     def get_queryset(self) -> QuerySet:
         """Filtra solo solicitudes de activos."""
-        return super().get_queryset().filter(tipo='ACTIVO')
+        return super().get_queryset().de_activos()
 
     def get_context_data(self, **kwargs) -> dict:
         """Agrega datos adicionales al contexto."""
@@ -878,24 +1004,21 @@ class SolicitudActivoCreateView(CrearSolicitudBienesPermissionMixin, SolicitudCr
     Permisos: solicitudes.crear_solicitud_bienes
     """
     template_name = 'solicitudes/form_solicitud_bienes.html'
+    item_id_field = 'activo_id'
 
     def get_template_names(self):
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/partials/modal_form_crear.html']
         return [self.template_name]
 
     def get_context_data(self, **kwargs) -> dict:
         """Agrega datos adicionales al contexto y lista de activos disponibles."""
-        from apps.activos.models import Activo
-
         context = super().get_context_data(**kwargs)
         context['titulo'] = 'Crear Solicitud de Bienes'
         context['action'] = 'Crear'
         context['tipo'] = 'ACTIVO'
 
-        activos = Activo.objects.filter(
-            activo=True, eliminado=False
-        ).select_related('categoria').order_by('codigo')
+        activos = ProductoDisponibleRepository.get_activos()
 
         context['activos'] = activos
         context['items'] = activos
@@ -903,7 +1026,7 @@ class SolicitudActivoCreateView(CrearSolicitudBienesPermissionMixin, SolicitudCr
         context['show_bodega'] = False
         context['item_type'] = 'bien'
         context['item_type_label'] = 'Bien/Activo'
-        context['item_id_field'] = 'activo_id'
+        context['item_id_field'] = self.item_id_field
         context['table_id'] = 'tabla-bienes'
         context['tbody_id'] = 'tbody-bienes'
         context['empty_state_id'] = 'sin-bienes'
@@ -922,8 +1045,6 @@ class SolicitudActivoCreateView(CrearSolicitudBienesPermissionMixin, SolicitudCr
 
     def form_valid(self, form):
         """Procesa el formulario válido usando SolicitudService con tipo ACTIVO."""
-        from django.db import transaction
-
         try:
             with transaction.atomic():
                 # Crear solicitud usando service con tipo ACTIVO
@@ -950,21 +1071,23 @@ class SolicitudActivoCreateView(CrearSolicitudBienesPermissionMixin, SolicitudCr
                     form.add_error(None, 'Debe agregar al menos un bien/activo a la solicitud')
                     return self.form_invalid(form)
 
-                # Crear detalles de bienes
-                for detalle_data in detalles:
-                    DetalleSolicitud.objects.create(
+                # Crear detalles de bienes (un INSERT por lote)
+                DetalleSolicitudRepository.bulk_create([
+                    DetalleSolicitud(
                         solicitud=self.object,
                         activo_id=detalle_data['activo_id'],
                         cantidad_solicitada=Decimal(str(detalle_data['cantidad_solicitada'])),
                         observaciones=detalle_data.get('observaciones', '')
                     )
+                    for detalle_data in detalles
+                ])
 
                 # Mensaje de éxito y log de auditoría
                 messages.success(self.request, self.get_success_message(self.object))
                 self.log_action(self.object, self.request)
 
                 # Si es AJAX/modal, devolver detalle parcial
-                if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+                if _es_modal(self.request):
                     return self._render_modal_detalle()
 
                 return redirect(self.get_success_url())
@@ -979,51 +1102,13 @@ class SolicitudActivoCreateView(CrearSolicitudBienesPermissionMixin, SolicitudCr
             return self.form_invalid(form)
 
     def _render_modal_detalle(self):
-        """Renderiza el detalle de la solicitud recién creada para mostrar en modal."""
-        context = {
-            'solicitud': self.object,
-            'detalles': self.object.detalles.filter(eliminado=False).select_related(
-                'articulo', 'articulo__categoria', 'activo', 'activo__categoria'
-            ).order_by('id'),
-            'historial': self.object.historial.select_related(
-                'estado_anterior', 'estado_nuevo', 'usuario'
-            )
-        }
-        # Usar modal diferente según si es mis solicitudes o admin
-        # Las solicitudes creadas siempre son "mis solicitudes" para el usuario actual
-        modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html'
-        return render(self.request, modal_template, context)
-
-    def _extraer_detalles_post(self, post_data):
         """
-        Extrae los detalles de bienes del POST.
-        Formato esperado: detalles[0][activo_id], detalles[0][cantidad_solicitada], etc.
-        """
-        detalles = []
-        indices = set()
-
-        # Identificar todos los índices presentes
-        for key in post_data.keys():
-            if key.startswith('detalles['):
-                # Extraer índice: detalles[0][campo] -> 0
-                indice = key.split('[')[1].split(']')[0]
-                indices.add(indice)
-
-        # Extraer datos para cada índice
-        for indice in indices:
-            activo_id = post_data.get(f'detalles[{indice}][activo_id]')
-            cantidad_solicitada = post_data.get(f'detalles[{indice}][cantidad_solicitada]')
+        Renderiza el detalle de la solicitud recién creada para mostrar en modal.
 
-            if activo_id and cantidad_solicitada:
-                detalle = {
-                    'activo_id': int(activo_id),
-                    'cantidad_solicitada': float(cantidad_solicitada),
-                    'observaciones': post_data.get(f'detalles[{indice}][observaciones]', '')
-                }
-
-                detalles.append(detalle)
-
-        return detalles
+        Se recarga con todas sus relaciones como en los modales del flujo; al
+        ser el usuario actual el solicitante, se usa el modal de mis solicitudes.
+        """
+        return _respuesta_modal_detalle(self.request, self.object.pk)
 
 
 class SolicitudActivoUpdateView(SolicitudUpdateView):
@@ -1032,7 +1117,7 @@ class SolicitudActivoUpdateView(SolicitudUpdateView):
 
     def get_queryset(self) -> QuerySet:
         """Solo solicitudes de bienes."""
-        return super().get_queryset().filter(tipo='ACTIVO')
+        return super().get_queryset().de_activos()
 
     def get(self, request, *args, **kwargs):
         """Verifica que la solicitud pueda ser editada."""
@@ -1079,7 +1164,7 @@ class SolicitudArticuloListView(VerSolicitudesArticulosPermissionMixin, Solicitu
 
     def get_queryset(self) -> QuerySet:
         """Filtra solo solicitudes de artículos."""
-        return super().get_queryset().filter(tipo='ARTICULO')
+        return super().get_queryset().de_articulos()
 
     def get_context_data(self, **kwargs) -> dict:
         """Agrega datos adicionales al contexto."""
@@ -1096,24 +1181,21 @@ class SolicitudArticuloCreateView(CrearSolicitudArticulosPermissionMixin, Solici
     Permisos: solicitudes.crear_solicitud_articulos
     """
     template_name = 'solicitudes/form_solicitud_articulos.html'
+    item_id_field = 'articulo_id'
 
     def get_template_names(self):
-        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+        if _es_modal(self.request):
             return ['solicitudes/partials/modal_form_crear.html']
         return [self.template_name]
 
     def get_context_data(self, **kwargs) -> dict:
         """Agrega datos adicionales al contexto y lista de artículos disponibles."""
-        from apps.bodega.models import Articulo
-
         context = super().get_context_data(**kwargs)
         context['titulo'] = 'Crear Solicitud de Artículos'
         context['action'] = 'Crear'
         context['tipo'] = 'ARTICULO'
 
-        articulos = Articulo.objects.filter(
-            activo=True, eliminado=False
-        ).select_related('categoria', 'unidad_medida').order_by('codigo')
+        articulos = ProductoDisponibleRepository.get_articulos()
 
         context['articulos'] = articulos
         context['items'] = articulos
@@ -1121,7 +1203,7 @@ class SolicitudArticuloCreateView(CrearSolicitudArticulosPermissionMixin, Solici
         context['show_bodega'] = True
         context['item_type'] = 'articulo'
         context['item_type_label'] = 'Artículo'
-        context['item_id_field'] = 'articulo_id'
+        context['item_id_field'] = self.item_id_field
         context['table_id'] = 'tabla-articulos'
         context['tbody_id'] = 'tbody-articulos'
         context['empty_state_id'] = 'sin-articulos'
@@ -1140,8 +1222,6 @@ class SolicitudArticuloCreateView(CrearSolicitudArticulosPermissionMixin, Solici
 
     def form_valid(self, form):
         """Procesa el formulario válido usando SolicitudService con tipo ARTICULO."""
-        from django.db import transaction
-
         try:
             with transaction.atomic():
                 # Crear solicitud usando service con tipo ARTICULO
@@ -1168,21 +1248,23 @@ class SolicitudArticuloCreateView(CrearSolicitudArticulosPermissionMixin, Solici
                     form.add_error(None, 'Debe agregar al menos un artículo a la solicitud')
                     return self.form_invalid(form)
 
-                # Crear detalles de artículos
-                for detalle_data in detalles:
-                    DetalleSolicitud.objects.create(
+                # Crear detalles de artículos (un INSERT por lote)
+                DetalleSolicitudRepository.bulk_create([
+                    DetalleSolicitud(
                         solicitud=self.object,
                         articulo_id=detalle_data['articulo_id'],
                         cantidad_solicitada=Decimal(str(detalle_data['cantidad_solicitada'])),
                         observaciones=detalle_data.get('observaciones', '')
                     )
+                    for detalle_data in detalles
+                ])
 
                 # Mensaje de éxito y log de auditoría
                 messages.success(self.request, self.get_success_message(self.object))
                 self.log_action(self.object, self.request)
 
                 # Si es AJAX/modal, devolver detalle parcial
-                if self.request.headers.get('x-requested-with') == 'XMLHttpRequest' or self.request.GET.get('modal') == '1':
+                if _es_modal(self.request):
                     return self._render_modal_detalle()
 
                 return redirect(self.get_success_url())
@@ -1201,51 +1283,13 @@ class SolicitudArticuloCreateView(CrearSolicitudArticulosPermissionMixin, Solici
         return super().form_invalid(form)
 
     def _render_modal_detalle(self):
-        """Renderiza el detalle de la solicitud recién creada para mostrar en modal."""
-        context = {
-            'solicitud': self.object,
-            'detalles': self.object.detalles.filter(eliminado=False).select_related(
-                'articulo', 'articulo__categoria', 'activo', 'activo__categoria'
-            ).order_by('id'),
-            'historial': self.object.historial.select_related(
-                'estado_anterior', 'estado_nuevo', 'usuario'
-            )
-        }
-        # Usar modal diferente según si es mis solicitudes o admin
-        # Las solicitudes creadas siempre son "mis solicitudes" para el usuario actual
-        modal_template = 'solicitudes/partials/modal_detalle_mis_solicitudes.html'
-        return render(self.request, modal_template, context)
-
-    def _extraer_detalles_post(self, post_data):
-        """
-        Extrae los detalles de artículos del POST.
-        Formato esperado: detalles[0][articulo_id], detalles[0][cantidad_solicitada], etc.
         """
-        detalles = []
-        indices = set()
-
-        # Identificar todos los índices presentes
-        for key in post_data.keys():
-            if key.startswith('detalles['):
-                # Extraer índice: detalles[0][campo] -> 0
-                indice = key.split('[')[1].split(']')[0]
-                indices.add(indice)
-
-        # Extraer datos para cada índice
-        for indice in indices:
-            articulo_id = post_data.get(f'detalles[{indice}][articulo_id]')
-            cantidad_solicitada = post_data.get(f'detalles[{indice}][cantidad_solicitada]')
-
-            if articulo_id and cantidad_solicitada:
-                detalle = {
-                    'articulo_id': int(articulo_id),
-                    'cantidad_solicitada': float(cantidad_solicitada),
-                    'observaciones': post_data.get(f'detalles[{indice}][observaciones]', '')
-                }
-
-                detalles.append(detalle)
+        Renderiza el detalle de la solicitud recién creada para mostrar en modal.
 
-        return detalles
+        Se recarga con todas sus relaciones como en los modales del flujo; al
+        ser el usuario actual el solicitante, se usa el modal de mis solicitudes.
+        """
+        return _respuesta_modal_detalle(self.request, self.object.pk)
 
 
 class SolicitudArticuloUpdateView(SolicitudUpdateView):
@@ -1254,7 +1298,7 @@ class SolicitudArticuloUpdateView(SolicitudUpdateView):
 
     def get_queryset(self) -> QuerySet:
         """Solo solicitudes de artículos."""
-        return super().get_queryset().filter(tipo='ARTICULO')
+        return super().get_queryset().de_articulos()
 
     def get(self, request, *args, **kwargs):
         """Verifica que la solicitud pueda ser editada."""
@@ -1292,7 +1336,6 @@ class TipoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView):
     Vista para listar tipos de solicitud.
 
     Permisos: solicitudes.view_tiposolicitud
-    Utiliza: TipoSolicitudRepository para acceso a datos optimizado
     """
     model = TipoSolicitud
     template_name = 'solicitudes/mantenedores/tipo_solicitud/lista.html'
@@ -1301,17 +1344,13 @@ class TipoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView):
     paginate_by = 25
 
     def get_queryset(self) -> QuerySet:
-        """Retorna tipos de solicitud usando repository."""
-        from .repositories import TipoSolicitudRepository
-        tipo_repo = TipoSolicitudRepository()
-
+        """Retorna tipos de solicitud no eliminados, filtrados por la búsqueda ``q``."""
         # Incluir inactivos y eliminados para administración
-        queryset = TipoSolicitud.objects.filter(eliminado=False).order_by('codigo')
+        queryset = TipoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey')
 
         # Búsqueda por query string
         query = self.request.GET.get('q', '').strip()
         if query:
-            from django.db.models import Q
             queryset = queryset.filter(
                 Q(codigo__icontains=query) |
                 Q(nombre__icontains=query)
@@ -1323,7 +1362,7 @@ class TipoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView):
         """Agrega datos adicionales al contexto."""
         context = super().get_context_data(**kwargs)
         context['titulo'] = 'Tipos de Solicitud'
-        context['puede_crear'] = self.request.user.has_perm('solicitudes.add_tiposolicitud')
+        context['puede_crear'] = request_permission_checker(self.request)('solicitudes.add_tiposolicitud')
         return context
 
 
@@ -1405,14 +1444,12 @@ class TipoSolicitudUpdateView(BaseAuditedViewMixin, UpdateView):
         messages.success(self.request, self.get_success_message(self.object))
         self.log_action(self.object, self.request)
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            from django.http import JsonResponse
             return JsonResponse({'success': True})
         return response
 
     def form_invalid(self, form):
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            from django.shortcuts import render as django_render
-            return django_render(
+            return render(
                 self.request,
                 'solicitudes/mantenedores/tipo_solicitud/modal_editar.html',
                 self.get_context_data(form=form)
@@ -1449,15 +1486,30 @@ class TipoSolicitudDeleteView(BaseAuditedViewMixin, DeleteView):
         context['titulo'] = f'Eliminar Tipo de Solicitud: {self.object.nombre}'
         context['tipo'] = self.object
 
-        # Verificar si hay solicitudes asociadas
-        context['tiene_solicitudes'] = self.object.solicitudes.filter(eliminado=False).exists()
-        context['count_solicitudes'] = self.object.solicitudes.filter(eliminado=False).count()
+        # Verificar si hay solicitudes asociadas (un solo COUNT para ambos datos)
+        count_solicitudes = self.object.solicitudes.filter(eliminado=False).count()
+        context['tiene_solicitudes'] = count_solicitudes > 0
+        context['count_solicitudes'] = count_solicitudes
 
         return context
 
+    def form_valid(self, form):
+        """
+        Confirmación por POST: borrado lógico.
+
+        ``DeleteView`` resuelve el POST en ``form_valid`` (no en ``delete``)
+        y borraría la fila; ``self.object`` ya viene cargado por ``post``.
+        """
+        return self._eliminar_logico()
+
     def delete(self, request, *args, **kwargs):
         """Elimina usando soft delete."""
         self.object = self.get_object()
+        return self._eliminar_logico()
+
+    def _eliminar_logico(self):
+        """Marca el tipo como eliminado e inactivo, si no tiene solicitudes asociadas."""
+        request = self.request
 
         # Verificar si tiene solicitudes asociadas
         if self.object.solicitudes.filter(eliminado=False).exists():
@@ -1468,10 +1520,11 @@ class TipoSolicitudDeleteView(BaseAuditedViewMixin, DeleteView):
             )
             return redirect('solicitudes:tipo_solicitud_lista')
 
-        # Soft delete
+        # Soft delete: UPDATE de las tres columnas; save() emite post_save,
+        # que invalida el cache del catálogo
         self.object.eliminado = True
         self.object.activo = False
-        self.object.save()
+        self.object.save(update_fields=['eliminado', 'activo', 'fecha_actualizacion'])
 
         messages.success(request, self.get_success_message(self.object))
         self.log_action(self.object, request)
@@ -1487,7 +1540,6 @@ class EstadoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView
     Vista para listar estados de solicitud.
 
     Permisos: solicitudes.view_estadosolicitud
-    Utiliza: EstadoSolicitudRepository para acceso a datos optimizado
     """
     model = EstadoSolicitud
     template_name = 'solicitudes/mantenedores/estado_solicitud/lista.html'
@@ -1496,17 +1548,13 @@ class EstadoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView
     paginate_by = 25
 
     def get_queryset(self) -> QuerySet:
-        """Retorna estados de solicitud usando repository."""
-        from .repositories import EstadoSolicitudRepository
-        estado_repo = EstadoSolicitudRepository()
-
+        """Retorna estados de solicitud no eliminados, filtrados por la búsqueda ``q``."""
         # Incluir inactivos y eliminados para administración
-        queryset = EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo')
+        queryset = EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey')
 
         # Búsqueda por query string
         query = self.request.GET.get('q', '').strip()
         if query:
-            from django.db.models import Q
             queryset = queryset.filter(
                 Q(codigo__icontains=query) |
                 Q(nombre__icontains=query)
@@ -1518,7 +1566,7 @@ class EstadoSolicitudListView(BaseAuditedViewMixin, PaginatedListMixin, ListView
         """Agrega datos adicionales al contexto."""
         context = super().get_context_data(**kwargs)
         context['titulo'] = 'Estados de Solicitud'
-        context['puede_crear'] = self.request.user.has_perm('solicitudes.add_estadosolicitud')
+        context['puede_crear'] = request_permission_checker(self.request)('solicitudes.add_estadosolicitud')
         return context
 
 
@@ -1600,14 +1648,12 @@ class EstadoSolicitudUpdateView(BaseAuditedViewMixin, UpdateView):
         messages.success(self.request, self.get_success_message(self.object))
         self.log_action(self.object, self.request)
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            from django.http import JsonResponse
             return JsonResponse({'success': True})
         return response
 
     def form_invalid(self, form):
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            from django.shortcuts import render as django_render
-            return django_render(
+            return render(
                 self.request,
                 'solicitudes/mantenedores/estado_solicitud/modal_editar.html',
                 self.get_context_data(form=form)
@@ -1644,15 +1690,30 @@ class EstadoSolicitudDeleteView(BaseAuditedViewMixin, DeleteView):
         context['titulo'] = f'Eliminar Estado de Solicitud: {self.object.nombre}'
         context['estado'] = self.object
 
-        # Verificar si hay solicitudes asociadas
-        context['tiene_solicitudes'] = self.object.solicitudes.filter(eliminado=False).exists()
-        context['count_solicitudes'] = self.object.solicitudes.filter(eliminado=False).count()
+        # Verificar si hay solicitudes asociadas (un solo COUNT para ambos datos)
+        count_solicitudes = self.object.solicitudes.filter(eliminado=False).count()
+        context['tiene_solicitudes'] = count_solicitudes > 0
+        context['count_solicitudes'] = count_solicitudes
 
         return context
 
+    def form_valid(self, form):
+        """
+        Confirmación por POST: borrado lógico.
+
+        ``DeleteView`` resuelve el POST en ``form_valid`` (no en ``delete``)
+        y borraría la fila; ``self.object`` ya viene cargado por ``post``.
+        """
+        return self._eliminar_logico()
+
     def delete(self, request, *args, **kwargs):
         """Elimina usando soft delete."""
         self.object = self.get_object()
+        return self._eliminar_logico()
+
+    def _eliminar_logico(self):
+        """Marca el estado como eliminado e inactivo, si no tiene solicitudes asociadas."""
+        request = self.request
 
         # Verificar si tiene solicitudes asociadas
         if self.object.solicitudes.filter(eliminado=False).exists():
@@ -1663,10 +1724,11 @@ class EstadoSolicitudDeleteView(BaseAuditedViewMixin, DeleteView):
             )
             return redirect('solicitudes:estado_solicitud_lista')
 
-        # Soft delete
+        # Soft delete: UPDATE de las tres columnas; save() emite post_save,
+        # que invalida el cache del catálogo
         self.object.eliminado = True
         self.object.activo = False
-        self.object.save()
+        self.object.save(update_fields=['eliminado', 'activo', 'fecha_actualizacion'])
 
         messages.success(request, self.get_success_message(self.object))
         self.log_action(self.object, request)
@@ -1677,22 +1739,41 @@ class EstadoSolicitudDeleteView(BaseAuditedViewMixin, DeleteView):
 # ==================== IMPORTACION EXCEL PARA MANTENEDORES ====================
 
 from apps.bodega.excel_services.importacion_excel import ImportacionExcelService
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, JsonResponse, HttpResponse
 from django.contrib.auth.decorators import login_required
+from tempfile import SpooledTemporaryFile
 
+# Tamaño hasta el que la plantilla generada se mantiene en memoria antes de
+# pasar a un archivo temporal en disco
+PLANTILLA_SPOOL_MAX = 8 * 1024 * 1024
 
-@login_required
-def tipo_solicitud_descargar_plantilla(request):
-    """Vista para descargar plantilla Excel de tipos de solicitud."""
-    contenido = ImportacionExcelService.generar_plantilla_tipos_solicitud()
-    response = HttpResponse(contenido, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="plantilla_tipos_solicitud.xlsx"'
-    return response
 
+def _plantilla_response(generar, filename: str):
+    """
+    Responde la plantilla Excel escrita por ``generar(stream=...)``.
 
-@login_required
-def tipo_solicitud_importar_excel(request):
-    """Vista para importar tipos de solicitud desde Excel."""
+    El libro se guarda directamente en un archivo temporal y se envía por
+    bloques con ``FileResponse``, sin armar además una copia en ``bytes``.
+    """
+    archivo = SpooledTemporaryFile(max_size=PLANTILLA_SPOOL_MAX)
+    generar(stream=archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def _importar_catalogo_excel(request, importar, entidad: str):
+    """
+    Importa un catalogo desde el Excel subido y responde en JSON.
+
+    La importacion corre dentro de la peticion: el servicio guarda en lote y
+    acota las filas aceptadas, de modo que un archivo excesivo se rechaza con
+    400 antes de escribir en la base de datos.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'Metodo no permitido'}, status=405)
     if 'archivo' not in request.FILES:
@@ -1702,55 +1783,49 @@ def tipo_solicitud_importar_excel(request):
     if not es_valido:
         return JsonResponse({'error': mensaje_error}, status=400)
     try:
-        creadas, actualizadas, errores = ImportacionExcelService.importar_tipos_solicitud(archivo, request.user)
-        mensaje = f"Importacion completada: {creadas} tipos creados, {actualizadas} actualizados"
-        if errores:
-            mensaje += f". Errores: {len(errores)}"
-        return JsonResponse({
-            'success': True,
-            'mensaje': mensaje,
-            'creadas': creadas,
-            'actualizadas': actualizadas,
-            'errores': errores[:10]
-        })
+        creadas, actualizadas, errores = importar(archivo, request.user)
+    except ValidationError as e:
+        return JsonResponse({'error': ' '.join(e.messages)}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'Error al importar: {str(e)}'}, status=500)
+    mensaje = f"Importacion completada: {creadas} {entidad} creados, {actualizadas} actualizados"
+    if errores:
+        mensaje += f". Errores: {len(errores)}"
+    return JsonResponse({
+        'success': True,
+        'mensaje': mensaje,
+        'creadas': creadas,
+        'actualizadas': actualizadas,
+        'errores': errores[:10]
+    })
+
+
+@login_required
+def tipo_solicitud_descargar_plantilla(request):
+    """Vista para descargar plantilla Excel de tipos de solicitud."""
+    return _plantilla_response(
+        ImportacionExcelService.generar_plantilla_tipos_solicitud, 'plantilla_tipos_solicitud.xlsx'
+    )
+
+
+@login_required
+def tipo_solicitud_importar_excel(request):
+    """Vista para importar tipos de solicitud desde Excel."""
+    return _importar_catalogo_excel(request, ImportacionExcelService.importar_tipos_solicitud, 'tipos')
 
 
 @login_required
 def estado_solicitud_descargar_plantilla(request):
     """Vista para descargar plantilla Excel de estados de solicitud."""
-    contenido = ImportacionExcelService.generar_plantilla_estados_solicitud()
-    response = HttpResponse(contenido, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="plantilla_estados_solicitud.xlsx"'
-    return response
+    return _plantilla_response(
+        ImportacionExcelService.generar_plantilla_estados_solicitud, 'plantilla_estados_solicitud.xlsx'
+    )
 
 
 @login_required
 def estado_solicitud_importar_excel(request):
     """Vista para importar estados de solicitud desde Excel."""
-    if request.method != 'POST':
-        return JsonResponse({'error': 'Metodo no permitido'}, status=405)
-    if 'archivo' not in request.FILES:
-        return JsonResponse({'error': 'No se proporciono archivo'}, status=400)
-    archivo = request.FILES['archivo']
-    es_valido, mensaje_error = ImportacionExcelService.validar_archivo_excel(archivo)
-    if not es_valido:
-        return JsonResponse({'error': mensaje_error}, status=400)
-    try:
-        creadas, actualizadas, errores = ImportacionExcelService.importar_estados_solicitud(archivo, request.user)
-        mensaje = f"Importacion completada: {creadas} estados creados, {actualizadas} actualizados"
-        if errores:
-            mensaje += f". Errores: {len(errores)}"
-        return JsonResponse({
-            'success': True,
-            'mensaje': mensaje,
-            'creadas': creadas,
-            'actualizadas': actualizadas,
-            'errores': errores[:10]
-        })
-    except Exception as e:
-        return JsonResponse({'error': f'Error al importar: {str(e)}'}, status=500)
+    return _importar_catalogo_excel(request, ImportacionExcelService.importar_estados_solicitud, 'estados')
 
 
 # ==================== EXPORTAR DATOS MAESTROS (GESTORES) ====================
@@ -1792,7 +1867,7 @@ def tipo_solicitud_exportar_excel(request):
 
     odd_fill = PatternFill("solid", fgColor="EBF0F8")
     for row_idx, obj in enumerate(
-        TipoSolicitud.objects.filter(eliminado=False).order_by('codigo'), start=2
+        TipoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey'), start=2
     ):
         fill = odd_fill if row_idx % 2 == 0 else None
         fila = [
@@ -1839,14 +1914,14 @@ def estado_solicitud_exportar_excel(request):
 
     odd_fill = PatternFill("solid", fgColor="EBF0F8")
     for row_idx, obj in enumerate(
-        EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo'), start=2
+        EstadoSolicitud.objects.filter(eliminado=False).order_by('codigo_sortkey'), start=2
     ):
         fill = odd_fill if row_idx % 2 == 0 else None
-        color_hex = obj.color.lstrip('#') if hasattr(obj, 'color') and obj.color else "CCCCCC"
+        color_hex = obj.color_hex.lstrip('#')
         fila = [
             obj.codigo,
             obj.nombre,
-            obj.color if hasattr(obj, 'color') else "",
+            obj.color_hex,
             "SI" if obj.es_inicial else "NO",
             "SI" if obj.es_final else "NO",
             "SI" if obj.requiere_accion else "NO",
@@ -1878,29 +1953,14 @@ from .excel_services import ExportacionSolicitudesService, ImportacionSolicitude
 @login_required
 def solicitudes_exportar_excel(request):
     """Exporta la lista de solicitudes (con filtros) a Excel."""
-    from .forms import FiltroSolicitudesForm
-
     queryset = Solicitud.objects.filter(eliminado=False)
 
     form = FiltroSolicitudesForm(request.GET)
     if form.is_valid():
         data = form.cleaned_data
-        if data.get('estado'):
-            queryset = queryset.filter(estado=data['estado'])
-        if data.get('tipo'):
-            queryset = queryset.filter(tipo_solicitud=data['tipo'])
-        if data.get('fecha_desde'):
-            queryset = queryset.filter(fecha_solicitud__gte=data['fecha_desde'])
-        if data.get('fecha_hasta'):
-            queryset = queryset.filter(fecha_solicitud__lte=data['fecha_hasta'])
+        queryset = queryset.filter(**_filtros_solicitud(data))
         if data.get('buscar'):
-            q = data['buscar']
-            queryset = queryset.filter(
-                Q(numero__icontains=q) |
-                Q(solicitante__username__icontains=q) |
-                Q(area__nombre__icontains=q) |
-                Q(departamento__nombre__icontains=q)
-            )
+            queryset = queryset.filter(SolicitudRepository.filtro_busqueda(data['buscar']))
 
     contenido = ExportacionSolicitudesService.exportar(queryset, titulo="Reporte de Solicitudes")
     response = HttpResponse(
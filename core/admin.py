@@ -10,6 +10,10 @@ class BaseAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at")
 
     def save_model(self, request, obj, form, change):
+        # Guardar un formulario de edición sin cambios no emite el UPDATE
+        # (ni la auditoría de post_save) ni marca al usuario como editor
+        if change and not form.has_changed():
+            return
         if not obj.pk:  # Si el objeto es nuevo
             obj.created_by = request.user
         obj.updated_by = request.user
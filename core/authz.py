@@ -6,7 +6,9 @@ entre templates, vistas y consultas duplicadas.
 """
 from __future__ import annotations
 
-from django.db.models import Q, QuerySet
+from typing import Callable
+
+from django.db.models import BooleanField, Case, Q, QuerySet, Value, When
 
 from apps.accounts.models import AccessScope
 from apps.accounts.role_catalog import OFFICIAL_ROLE_CATALOG
@@ -80,6 +82,37 @@ def can_manage_authorization(user) -> bool:
     )
 
 
+def permission_checker(user) -> Callable[[str], bool]:
+    """
+    Retorna una función ``perm -> bool`` equivalente a ``user.has_perm``.
+
+    Los permisos se resuelven una sola vez con ``get_all_permissions`` y cada
+    chequeo posterior es una búsqueda en un conjunto, en vez de recorrer los
+    backends de autenticación por cada permiso. Como ``has_perm``, un
+    superusuario activo tiene cualquier permiso y un usuario inactivo ninguno.
+    """
+    if not getattr(user, 'is_authenticated', False) or not user.is_active:
+        return lambda perm: False
+    if user.is_superuser:
+        return lambda perm: True
+    return frozenset(user.get_all_permissions()).__contains__
+
+
+def request_permission_checker(request) -> Callable[[str], bool]:
+    """
+    Igual que ``permission_checker`` pero compartido durante la petición.
+
+    El verificador se guarda en ``request`` la primera vez, de modo que los
+    mixins de permisos y la vista respondan todos sus chequeos con el mismo
+    conjunto de permisos.
+    """
+    checker = getattr(request, '_perm_checker', None)
+    if checker is None:
+        checker = permission_checker(request.user)
+        request._perm_checker = checker
+    return checker
+
+
 def can_view_solicitud(user, solicitud) -> bool:
     if not user.is_authenticated or not user.has_perm('solicitudes.view_solicitud'):
         return False
@@ -116,6 +149,39 @@ def scope_solicitudes_for_user(queryset: QuerySet, user) -> QuerySet:
     return queryset.filter(filters).distinct()
 
 
+def annotate_permisos(
+    queryset: QuerySet, user, tiene_permiso: Callable[[str], bool] | None = None
+) -> QuerySet:
+    """
+    Anota en cada solicitud los permisos de acción por fila.
+
+    - ``puede_aprobar``: permiso aprobar_solicitudes y estado no final.
+    - ``puede_editar``: permiso change_solicitud y estado no final.
+
+    Los permisos no dependen de la fila: se evalúan una vez con
+    ``permission_checker`` (backends de autenticación, ``is_active`` y
+    superusuario, como ``has_perm``) y la consulta solo agrega la condición
+    sobre el estado. ``tiene_permiso`` permite reutilizar el verificador de
+    la petición (``request_permission_checker``).
+    """
+    if tiene_permiso is None:
+        tiene_permiso = permission_checker(user)
+
+    def _por_fila(perm: str):
+        if not tiene_permiso(perm):
+            return Value(False, output_field=BooleanField())
+        return Case(
+            When(estado__es_final=False, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+
+    return queryset.annotate(
+        puede_aprobar=_por_fila('solicitudes.aprobar_solicitudes'),
+        puede_editar=_por_fila('solicitudes.change_solicitud'),
+    )
+
+
 def can_view_orden_compra(user, orden) -> bool:
     if not user.is_authenticated or not user.has_perm('compras.view_ordencompra'):
         return False
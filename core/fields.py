@@ -0,0 +1,70 @@
+"""
+Campos de modelo reutilizables del proyecto.
+"""
+import re
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
+from django.db import models
+
+
+_HEX_COLOR_RE = re.compile(r'^#?([0-9a-fA-F]{6})$')
+
+# Mayor color representable en 24 bits (#ffffff)
+COLOR_RGB_MAX = 0xFFFFFF
+
+
+def color_int_a_hex(value) -> str:
+    """Formatea un color RGB de 24 bits como ``#rrggbb``."""
+    if isinstance(value, str):
+        return value
+    return f'#{value:06x}'
+
+
+class ColorHexFormField(forms.CharField):
+    """Campo de formulario que edita un color RGB entero como ``#rrggbb``."""
+
+    def prepare_value(self, value):
+        if isinstance(value, int):
+            return color_int_a_hex(value)
+        return value
+
+    def validate(self, value):
+        super().validate(value)
+        if value and not _HEX_COLOR_RE.match(value):
+            raise ValidationError('Ingrese un color hexadecimal válido (Ej: #28a745).', code='invalid')
+
+
+class ColorRGBField(models.PositiveIntegerField):
+    """
+    Color RGB de 24 bits almacenado como entero.
+
+    Acepta también cadenas ``#rrggbb`` al asignar, guardar o filtrar, de modo
+    que formularios, importaciones y comandos de carga puedan seguir usando
+    notación hexadecimal.
+    """
+
+    description = 'Color RGB (entero de 24 bits)'
+    default_validators = [MaxValueValidator(COLOR_RGB_MAX)]
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            match = _HEX_COLOR_RE.match(value.strip())
+            if not match:
+                raise ValidationError(
+                    'Ingrese un color hexadecimal válido (Ej: #28a745).', code='invalid'
+                )
+            return int(match.group(1), 16)
+        return super().to_python(value)
+
+    def get_prep_value(self, value):
+        return super().get_prep_value(self.to_python(value))
+
+    def pre_save(self, model_instance, add):
+        value = self.to_python(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': ColorHexFormField, **kwargs})
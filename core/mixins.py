@@ -9,10 +9,13 @@ Todos los mixins incluyen type hints completos siguiendo Python 3.13.
 from typing import Any, Optional, Dict
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import BooleanField, Q, QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.core.exceptions import PermissionDenied
+from django.utils.functional import cached_property
+from core.authz import request_permission_checker
 from core.utils import registrar_log_auditoria
 
 
@@ -99,13 +102,19 @@ class AtomicTransactionMixin:
     """
     Mixin para envolver operaciones en transacciones atómicas.
 
-    Garantiza que todas las operaciones de la vista se ejecuten
-    de manera atómica (todo o nada).
+    Garantiza que las operaciones de escritura de la vista se ejecuten
+    de manera atómica (todo o nada). Los métodos de solo lectura (GET,
+    HEAD, OPTIONS) corren en autocommit y no dejan una transacción
+    abierta mientras se renderiza el template.
+
+    Attributes:
+        atomic_methods: Métodos HTTP que se ejecutan dentro de la transacción
     """
-    @transaction.atomic
+    atomic_methods: tuple[str, ...] = ('post', 'put', 'patch', 'delete')
+
     def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         """
-        Envuelve el dispatch en una transacción atómica.
+        Envuelve el dispatch en una transacción atómica si el método escribe.
 
         Args:
             request: HttpRequest de Django
@@ -115,7 +124,10 @@ class AtomicTransactionMixin:
         Returns:
             HttpResponse: Respuesta HTTP
         """
-        return super().dispatch(request, *args, **kwargs)
+        if request.method.lower() not in self.atomic_methods:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
 
 
 class SoftDeleteMixin:
@@ -129,7 +141,9 @@ class SoftDeleteMixin:
         """
         Sobrescribe delete para hacer soft delete.
 
-        En lugar de eliminar el objeto, marca eliminado=True.
+        En lugar de eliminar el objeto, marca eliminado=True (y activo=False
+        cuando ``activo`` es el flag booleano de ``BaseModel``; hay modelos
+        donde es una FK). Solo se actualizan esas columnas.
 
         Args:
             request: HttpRequest de Django
@@ -140,18 +154,23 @@ class SoftDeleteMixin:
             HttpResponse: Redirección a success_url
         """
         self.object = self.get_object()
+        campos = ['eliminado', 'fecha_actualizacion']
         self.object.eliminado = True
-        self.object.activo = False
-        self.object.save()
+        if isinstance(self.object._meta.get_field('activo'), BooleanField):
+            self.object.activo = False
+            campos.append('activo')
+        self.object.save(update_fields=campos)
 
         success_url: str = str(self.get_success_url())
 
         # Mensaje y log de auditoría
-        if hasattr(self, 'get_success_message'):
-            messages.success(request, self.get_success_message(self.object))
+        get_success_message = getattr(self, 'get_success_message', None)
+        if get_success_message is not None:
+            messages.success(request, get_success_message(self.object))
 
-        if hasattr(self, 'log_action'):
-            self.log_action(self.object, request)
+        log_action = getattr(self, 'log_action', None)
+        if log_action is not None:
+            log_action(self.object, request)
 
         return HttpResponse(status=302, headers={'Location': success_url})
 
@@ -171,7 +190,17 @@ class BaseAuditedViewMixin(
     - Log de auditoría automático
     - Mensajes de éxito
     """
-    pass
+
+    def has_permission(self) -> bool:
+        """
+        Verifica ``permission_required`` con el conjunto de permisos de la petición.
+
+        Usa ``request_permission_checker``: los chequeos que la vista haga
+        después (por ejemplo, qué botones mostrar) se responden con el mismo
+        conjunto, sin volver a consultar los backends de autenticación.
+        """
+        tiene_permiso = request_permission_checker(self.request)
+        return all(tiene_permiso(perm) for perm in self.get_permission_required())
 
 
 class ScopedObjectPermissionMixin:
@@ -189,6 +218,22 @@ class ScopedObjectPermissionMixin:
         return obj
 
 
+class PkCountPaginator(Paginator):
+    """
+    Paginator que cuenta solo la clave primaria.
+
+    El total se calcula sobre ``values('pk')`` sin orden: el COUNT no arrastra
+    anotaciones por fila ni, en querysets con ``distinct()``, compara todas
+    las columnas del modelo para eliminar duplicados.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        if isinstance(self.object_list, QuerySet):
+            return self.object_list.order_by().values('pk').count()
+        return super().count
+
+
 class PaginatedListMixin:
     """
     Mixin para agregar paginación automática a ListView.
@@ -213,15 +258,13 @@ class PaginatedListMixin:
         Returns:
             int: Número de elementos por página
         """
-        # Permitir override desde query params
-        try:
-            per_page_str: Optional[str] = self.request.GET.get('per_page')
-            if per_page_str:
-                per_page: int = int(per_page_str)
-                if 1 <= per_page <= 100:  # Límite de seguridad
-                    return per_page
-        except (ValueError, TypeError):
-            pass
+        # Permitir override desde query params; valores no numéricos o de
+        # más de 3 dígitos se descartan sin intentar la conversión
+        per_page_str: Optional[str] = self.request.GET.get('per_page')
+        if per_page_str and len(per_page_str) <= 3 and per_page_str.isdecimal():
+            per_page: int = int(per_page_str)
+            if 1 <= per_page <= 100:  # Límite de seguridad
+                return per_page
 
         return self.paginate_by
 
@@ -233,9 +276,12 @@ class FilteredListMixin:
     Attributes:
         filter_form_class: Clase del formulario de filtros
         filter_fields: Campos por los cuales filtrar
+        search_fields: Campos donde se busca el texto del campo ``q`` del
+            formulario (``icontains``, combinados con OR)
     """
     filter_form_class: Optional[type] = None
     filter_fields: list[str] = []
+    search_fields: list[str] = []
 
     def get_queryset(self) -> QuerySet:
         """
@@ -257,6 +303,10 @@ class FilteredListMixin:
         """
         Aplica los filtros al queryset.
 
+        Todos los filtros con valor van en un único ``filter()``: se compila
+        una sola cláusula WHERE y los filtros sobre una misma relación
+        comparten el JOIN.
+
         Args:
             queryset: QuerySet base
             filters: Dict con los filtros del formulario
@@ -264,11 +314,20 @@ class FilteredListMixin:
         Returns:
             QuerySet: QuerySet filtrado
         """
-        for field, value in filters.items():
-            if value:
-                queryset = queryset.filter(**{field: value})
-
-        return queryset
+        activos: Dict[str, Any] = {campo: valor for campo, valor in filters.items() if valor}
+        condiciones: list[Q] = []
+
+        if self.search_fields:
+            texto = activos.pop('q', None)
+            if texto:
+                busqueda = Q()
+                for campo in self.search_fields:
+                    busqueda |= Q(**{f'{campo}__icontains': texto})
+                condiciones.append(busqueda)
+
+        if not activos and not condiciones:
+            return queryset
+        return queryset.filter(*condiciones, **activos)
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """
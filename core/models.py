@@ -72,6 +72,89 @@ class AutoCodeMixin(models.Model):
                 setattr(self, campo, "")
 
 
+class CodigoSortKeyMixin(models.Model):
+    """
+    Mantiene ``codigo_sortkey``, una clave de orden natural derivada de ``codigo``.
+
+    Con orden de texto ``DEP-10`` queda antes que ``DEP-2``; la clave rellena
+    los tramos numéricos con ceros para que el orden lo resuelva la base de
+    datos (y su índice) en vez de reordenar en Python.
+
+    Debe ir **después** de ``AutoCodeMixin`` en el MRO, para calcular la clave
+    cuando el código ya fue generado.
+    """
+
+    codigo_sortkey = models.CharField(
+        max_length=100,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Clave de orden",
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from core.utils.business import clave_orden_natural
+
+        self.codigo_sortkey = clave_orden_natural(self.codigo)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "codigo" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "codigo_sortkey"}
+        super().save(*args, **kwargs)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet con los predicados de borrado lógico de ``BaseModel``.
+
+    Centraliza los filtros ``eliminado=False`` / ``activo=True`` para que los
+    repositorios no los reconstruyan en cada método y todas las consultas
+    lleguen a la base de datos con la misma forma que los índices parciales
+    ``*_live_idx``.
+    """
+
+    def alive(self):
+        """Registros no eliminados (incluye los inactivos)."""
+        return self.filter(eliminado=False)
+
+    def vigentes(self):
+        """Registros no eliminados y activos."""
+        return self.filter(eliminado=False, activo=True)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager default para modelos con borrado lógico.
+
+    No filtra nada por sí mismo (el admin y las validaciones de unicidad deben
+    seguir viendo todos los registros); solo expone ``alive()`` y
+    ``vigentes()`` desde el manager.
+    """
+
+
+class ActiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager que expone solo registros vigentes (``activo=True, eliminado=False``).
+
+    Se declara como manager **secundario**: ``objects`` sigue siendo el default
+    para que el admin, los formularios y las validaciones de unicidad sigan
+    viendo los registros inactivos. Las consultas de listado que pasan por
+    este manager calzan con el predicado de los índices parciales
+    ``*_live_idx`` y el planner puede usarlos sin re-evaluar el filtro.
+
+    Uso::
+
+        class TipoSolicitud(BaseModel):
+            objects = SoftDeleteManager()
+            objects_active = ActiveManager()
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(activo=True, eliminado=False)
+
+
 class BaseModel(models.Model):
     """
     Modelo base para auditoría - todos los modelos heredan de esta clase.
@@ -103,5 +186,10 @@ class BaseModel(models.Model):
         help_text="Fecha y hora de última actualización",
     )
 
+    # Default de todos los modelos: no filtra (admin, formularios y
+    # validaciones de unicidad ven los eliminados), pero deja ``alive()`` y
+    # ``vigentes()`` disponibles sin declarar el manager en cada modelo.
+    objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
@@ -81,10 +81,12 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'apps.accounts.middleware.CurrentUserMiddleware',
+    'apps.accounts.middleware.AuditBufferMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "allauth.account.middleware.AccountMiddleware",
     'apps.auditoria.middleware.AuditoriaMiddleware',
+    'apps.solicitudes.middleware.CatalogoRequestCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -125,6 +127,13 @@ if env('POSTGRES_ENGINE', default=None):
             'HOST': env('POSTGRES_HOST', default='localhost'),
             'PORT': env('POSTGRES_PORT', default='5432'),
             'OPTIONS': {'client_encoding': 'UTF8'},
+            # Conexiones persistentes: se reutilizan entre peticiones del mismo
+            # worker en vez de abrir una conexión TCP/TLS nueva por petición
+            'CONN_MAX_AGE': env.int('DJANGO_CONN_MAX_AGE', default=60),
+            'CONN_HEALTH_CHECKS': True,
+            # Detrás de pgbouncer en modo transaction los cursores con nombre
+            # no sobreviven entre transacciones
+            'DISABLE_SERVER_SIDE_CURSORS': env.bool('POSTGRES_PGBOUNCER', default=False),
         }
     }
 else:
@@ -135,6 +144,13 @@ else:
         }
     }
 
+# Cache. Con más de un worker debe ser compartido (Redis, o DatabaseCache tras
+# ``manage.py createcachetable``): las señales invalidan los catálogos
+# cacheados cambiando su versión en este backend. El default en memoria es
+# propio de cada proceso, así que ahí la invalidación solo alcanza al proceso
+# que guardó y las entradas se acotan a ``LOOKUP_CACHE_LOCAL_TTL``.
+CACHES = {'default': env.cache('DJANGO_CACHE_URL', default='locmemcache://')}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -207,6 +223,15 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
 
+# Tamaño de lote para inserciones/actualizaciones masivas de solicitudes
+# (historial y detalles). Acota la memoria y el tamaño de cada sentencia.
+SOLICITUDES_BULK_BATCH_SIZE = env.int('SOL_BULK_BATCH', default=500)
+
+# Fracción de eventos de auditoría (AuthLogs) que se guardan por acción:
+# glosa en mayúsculas -> 0.0..1.0 (ej: {'CONSULTAR': 0.05}). Las acciones no
+# listadas se registran siempre.
+AUDIT_SAMPLE_RATES = {}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
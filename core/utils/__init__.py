@@ -3,20 +3,29 @@ Utilidades centralizadas del proyecto.
 Estas funciones son reutilizadas en diferentes apps.
 """
 
-from .logging import registrar_log_auditoria
+from .logging import registrar_log_auditoria, registrar_logs_auditoria
 from .http import get_client_ip
+from .signals import emitir_post_save
 from .business import (
     format_rut,
     validar_rut,
     truncar_texto,
+    a_decimal,
+    clave_orden_natural,
     generar_codigo_unico,
+    generar_codigos_unicos,
 )
 
 __all__ = [
     'registrar_log_auditoria',
+    'registrar_logs_auditoria',
     'get_client_ip',
+    'emitir_post_save',
     'format_rut',
     'validar_rut',
     'truncar_texto',
+    'a_decimal',
+    'clave_orden_natural',
     'generar_codigo_unico',
+    'generar_codigos_unicos',
 ]
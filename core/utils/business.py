@@ -5,9 +5,12 @@ Contiene funciones para validación de RUT, generación de códigos,
 formateo de texto y otras utilidades de negocio.
 """
 
+from decimal import Decimal
 from typing import Optional
 import re
-from django.db import transaction
+from django.db import connections, router, transaction
+from django.db.models import BigIntegerField, Count, Max, Q
+from django.db.models.functions import Cast, Substr
 
 
 def format_rut(rut: str) -> str:
@@ -128,7 +131,122 @@ def truncar_texto(texto: str, longitud: int = 100, sufijo: str = "...") -> str:
     if len(texto) <= longitud:
         return texto
 
-    return texto[: longitud - len(sufijo)].strip() + sufijo
+    # Solo el corte puede dejar espacios al final; el inicio se conserva
+    # igual que cuando el texto no se trunca.
+    return texto[: longitud - len(sufijo)].rstrip() + sufijo
+
+
+def a_decimal(valor) -> Decimal:
+    """
+    Convierte una cantidad a ``Decimal`` evitando el paso por ``str`` cuando sobra.
+
+    Un ``Decimal`` se retorna tal cual y un ``int`` se convierte directo
+    (exacto). El resto (``float``, ``str``) pasa por ``str()`` para conservar
+    su representación decimal en lugar del valor binario del float.
+
+    Args:
+        valor: Cantidad recibida (Decimal, int, float o str)
+
+    Returns:
+        Decimal: Cantidad como Decimal
+
+    Example:
+        >>> a_decimal(0.1)
+        Decimal('0.1')
+    """
+    if isinstance(valor, Decimal):
+        return valor
+    if isinstance(valor, int):
+        return Decimal(valor)
+    return Decimal(str(valor))
+
+
+_DIGITOS_RE = re.compile(r"\d+")
+_DIGITOS_FINALES_RE = re.compile(r"\d+$")
+
+
+def clave_orden_natural(valor: str, relleno: int = 10, longitud: int = 100) -> str:
+    """
+    Genera una clave de ordenamiento natural para un código.
+
+    Rellena con ceros cada tramo numérico para que el orden de texto
+    coincida con el orden numérico.
+
+    Args:
+        valor: Código original
+        relleno: Dígitos a los que se completa cada tramo numérico (default: 10)
+        longitud: Largo máximo de la clave (default: 100)
+
+    Returns:
+        str: Clave de ordenamiento
+
+    Example:
+        >>> clave_orden_natural('DEP-2') < clave_orden_natural('DEP-10')
+        True
+    """
+    if not valor:
+        return ""
+    return _DIGITOS_RE.sub(lambda m: m.group().zfill(relleno), valor)[:longitud]
+
+
+def _max_correlativo(modelo, campo: str, serie: str) -> int:
+    """
+    Retorna el mayor correlativo de los códigos ``<serie>-...`` de un modelo.
+
+    El máximo numérico se calcula en la base de datos (``MAX`` del sufijo
+    convertido a entero, que no depende del relleno con ceros) y se lee una
+    sola fila, en vez de traer y bloquear todos los códigos de la serie. Los
+    sufijos se limitan a 18 dígitos para que la conversión a ``bigint`` no
+    desborde; cualquier otro código de la serie aporta sus dígitos finales,
+    como antes.
+
+    El filtro por prefijo (``LIKE '<serie>-%'``) se resuelve con el índice
+    ``<campo>_like`` (``varchar_pattern_ops``) que Django crea en PostgreSQL
+    para todo ``CharField`` único o indexado, así que los campos ``codigo`` y
+    ``numero`` que usan estos generadores no necesitan un índice adicional.
+
+    Dentro de ``transaction.atomic()`` en PostgreSQL se toma además un lock
+    consultivo por serie hasta el fin de la transacción: un generador
+    concurrente espera y, al continuar, su consulta ya ve el código insertado.
+    Fuera de una transacción (o en SQLite, que serializa las escrituras) la
+    constraint UNIQUE sigue siendo el árbitro final.
+
+    Args:
+        modelo: Clase del modelo Django
+        campo: Nombre del campo que contiene el código
+        serie: Parte fija del código antes del correlativo (ej: 'SOL', 'OC-2025')
+
+    Returns:
+        int: Mayor correlativo existente, o 0 si la serie está vacía
+    """
+    prefijo_serie = f"{serie}-"
+    alias = router.db_for_write(modelo)
+    conexion = connections[alias]
+    if conexion.vendor == "postgresql" and conexion.in_atomic_block:
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                [f"{modelo._meta.db_table}.{campo}:{prefijo_serie}"],
+            )
+
+    codigos = modelo.objects.using(alias).filter(**{f"{campo}__startswith": prefijo_serie})
+    canonico = Q(**{f"{campo}__regex": rf"^{re.escape(prefijo_serie)}[0-9]{{1,18}}$"})
+    resultado = codigos.aggregate(
+        maximo=Max(
+            Cast(Substr(campo, len(prefijo_serie) + 1), BigIntegerField()), filter=canonico
+        ),
+        otros=Count("pk", filter=~canonico),
+    )
+    max_numero: int = resultado["maximo"] or 0
+
+    # Códigos fuera del formato (ej: 'UBI-TEST-A1') cuentan por sus dígitos
+    # finales; son pocos, así que solo esos se leen y se procesan en Python.
+    if resultado["otros"]:
+        for codigo_existente in codigos.exclude(canonico).values_list(campo, flat=True):
+            match = _DIGITOS_FINALES_RE.search(str(codigo_existente))
+            if match:
+                max_numero = max(max_numero, int(match.group()))
+    return max_numero
 
 
 def generar_codigo_unico(
@@ -141,8 +259,8 @@ def generar_codigo_unico(
     """
     Genera el siguiente código secuencial único para un modelo y prefijo dados.
 
-    Determina el número máximo actual analizando todos los registros con ese
-    prefijo y devuelve el siguiente en la secuencia.  El parámetro
+    Determina el número máximo actual entre los códigos con ese prefijo
+    (ver ``_max_correlativo``) y devuelve el siguiente en la secuencia.  El parámetro
     ``max_retries`` es aceptado por compatibilidad con llamadas existentes pero
     **no** se usa aquí — la lógica de reintento ante ``IntegrityError`` vive en
     ``AutoCodeMixin.save()``.
@@ -164,36 +282,46 @@ def generar_codigo_unico(
         'ART-000001'
 
     Note:
-        Usa ``select_for_update()`` para serializar lecturas concurrentes del
-        contador cuando se invoca dentro de ``transaction.atomic()`` (que
-        ``AutoCodeMixin`` siempre provee).  Fuera de una transacción el lock
-        es un no-op, pero la constraint UNIQUE de la DB sigue siendo el
+        En PostgreSQL, dentro de ``transaction.atomic()`` (que
+        ``AutoCodeMixin`` siempre provee), un lock consultivo por serie
+        serializa a los generadores concurrentes.  Fuera de una transacción
+        el lock no aplica, pero la constraint UNIQUE de la DB sigue siendo el
         árbitro final.
     """
-    # select_for_update() serializa la lectura del máximo cuando se ejecuta
-    # dentro de transaction.atomic() (AutoCodeMixin siempre lo provee).
-    codigos_existentes = (
-        modelo.objects.select_for_update()
-        .filter(**{f"{campo}__startswith": f"{prefijo}-"})
-        .values_list(campo, flat=True)
-    )
+    return generar_codigos_unicos(prefijo, modelo, 1, campo=campo, longitud=longitud)[0]
 
-    nuevo_numero: int = 1
 
-    if codigos_existentes.exists():
-        # Extraer todos los números y tomar el máximo para evitar errores de
-        # ordenación alfabética ('ART-9' > 'ART-10' lexicográficamente).
-        max_numero: int = 0
-        for codigo_existente in codigos_existentes:
-            match = re.search(r"(\d+)$", str(codigo_existente))
-            if match:
-                num = int(match.group(1))
-                if num > max_numero:
-                    max_numero = num
-        nuevo_numero = max_numero + 1
+def generar_codigos_unicos(
+    prefijo: str,
+    modelo,
+    cantidad: int,
+    campo: str = "codigo",
+    longitud: int = 6,
+) -> list[str]:
+    """
+    Genera ``cantidad`` códigos secuenciales únicos con una sola lectura.
+
+    Equivale a llamar ``generar_codigo_unico`` ``cantidad`` veces asignando
+    cada código antes de pedir el siguiente, pero el máximo actual se lee una
+    única vez: pensado para altas masivas con ``bulk_create``.
+
+    Args:
+        prefijo: Prefijo del código (ej: 'SOL')
+        modelo: Clase del modelo Django
+        cantidad: Número de códigos a generar
+        campo: Nombre del campo que contiene el código (default: 'codigo')
+        longitud: Longitud del número secuencial con ceros a la izquierda (default: 6)
+
+    Returns:
+        list[str]: Códigos consecutivos (ej: ['SOL-00000001', 'SOL-00000002'])
+    """
+    max_numero: int = _max_correlativo(modelo, campo, prefijo)
 
     # Formatear con ceros a la izquierda
-    return f"{prefijo}-{nuevo_numero:0{longitud}d}"
+    return [
+        f"{prefijo}-{numero:0{longitud}d}"
+        for numero in range(max_numero + 1, max_numero + 1 + cantidad)
+    ]
 
 
 def generar_codigo_con_anio(
@@ -231,26 +359,7 @@ def generar_codigo_con_anio(
     # Obtener el año actual
     anio_actual: int = datetime.now().year
 
-    # Buscar todos los códigos con ese prefijo y año para calcular el máximo
-    # usando comparación numérica (evita errores de orden lexicográfico).
-    patron_busqueda: str = f"{prefijo}-{anio_actual}-"
-    codigos_existentes = (
-        modelo.objects.select_for_update()
-        .filter(**{f"{campo}__startswith": patron_busqueda})
-        .values_list(campo, flat=True)
-    )
-
-    nuevo_numero: int = 1
-
-    if codigos_existentes.exists():
-        max_numero: int = 0
-        for codigo_existente in codigos_existentes:
-            match = re.search(r"(\d+)$", str(codigo_existente))
-            if match:
-                num = int(match.group(1))
-                if num > max_numero:
-                    max_numero = num
-        nuevo_numero = max_numero + 1
+    nuevo_numero: int = _max_correlativo(modelo, campo, f"{prefijo}-{anio_actual}") + 1
 
     # Formatear con ceros a la izquierda
     return f"{prefijo}-{anio_actual}-{nuevo_numero:0{longitud}d}"
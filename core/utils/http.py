@@ -10,7 +10,9 @@ def get_client_ip(request: HttpRequest) -> Optional[str]:
     Obtiene la dirección IP real del cliente desde el request.
 
     Maneja correctamente proxies y balanceadores de carga revisando
-    primero la cabecera X-Forwarded-For.
+    primero la cabecera X-Forwarded-For. El resultado se guarda en
+    ``request._client_ip``, de modo que los registros de auditoría de una
+    misma petición no vuelvan a procesar las cabeceras.
 
     Args:
         request: Objeto HttpRequest de Django
@@ -26,12 +28,19 @@ def get_client_ip(request: HttpRequest) -> Optional[str]:
     if not request:
         return None
 
+    ip = getattr(request, '_client_ip', None)
+    if ip is not None:
+        return ip
+
     # Revisar si viene de un proxy/load balancer
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
         # X-Forwarded-For puede contener múltiples IPs separadas por comas
         # La primera es la IP real del cliente
-        return x_forwarded_for.split(',')[0].strip()
+        ip = x_forwarded_for.split(',')[0].strip()
+    else:
+        # Si no hay proxy, usar REMOTE_ADDR
+        ip = request.META.get('REMOTE_ADDR')
 
-    # Si no hay proxy, usar REMOTE_ADDR
-    return request.META.get('REMOTE_ADDR')
+    request._client_ip = ip
+    return ip
@@ -1,10 +1,73 @@
 """
 Utilidades centralizadas para registro de logs y auditoría.
 """
-from typing import Optional
+import logging
+import random
+import time
+from itertools import repeat
+from typing import Iterable, Optional
+from django.conf import settings
+from django.db import DatabaseError
 from django.http import HttpRequest
 from django.contrib.auth.models import User
 
+from .http import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Tipo de excepción -> momento (monotonic) de la última traza registrada
+_ultima_traza: dict[type, float] = {}
+INTERVALO_TRAZAS = 60.0
+
+
+def registrar_traza(error: BaseException) -> bool:
+    """
+    Indica si un error de auditoría debe registrarse con su traza completa.
+
+    Con la base de datos caída cada petición falla igual; la traza se
+    formatea solo la primera vez por tipo de excepción cada
+    ``INTERVALO_TRAZAS`` segundos y el resto se registra sin ella.
+
+    Args:
+        error: Excepción capturada
+
+    Returns:
+        bool: True si corresponde incluir la traza
+    """
+    ahora = time.monotonic()
+    ultima = _ultima_traza.get(type(error))
+    if ultima is not None and ahora - ultima < INTERVALO_TRAZAS:
+        return False
+    _ultima_traza[type(error)] = ahora
+    return True
+
+
+def obtener_accion_id(glosa: str) -> int:
+    """
+    Retorna el id de la ``AuthLogAccion`` con esa glosa, creándola si falta.
+
+    No se memoriza entre peticiones: una memoria por proceso no se enteraría
+    de los cambios hechos en otros workers, y la búsqueda por ``glosa``
+    (indexada) es barata. ``AuditBufferMiddleware`` la resuelve una vez por
+    glosa en cada lote.
+
+    Args:
+        glosa: Glosa de la acción, ya en mayúsculas (ej: 'CREAR', 'LOGIN')
+
+    Returns:
+        int: Id de la acción
+    """
+    from apps.accounts.models import AuthLogAccion
+
+    # ``glosa`` no es única: con filas repetidas ``get_or_create`` lanzaría
+    # MultipleObjectsReturned, así que se usa la más antigua
+    accion_id = AuthLogAccion.objects.filter(glosa=glosa).order_by('pk').values_list(
+        'pk', flat=True
+    ).first()
+    if accion_id is None:
+        accion_id = AuthLogAccion.objects.create(glosa=glosa, activo=True).pk
+    return accion_id
+
 
 def registrar_log_auditoria(
     usuario: User,
@@ -17,7 +80,10 @@ def registrar_log_auditoria(
     Registra un evento en el log de auditoría del sistema.
 
     Esta función centraliza el registro de todas las acciones de auditoría
-    para evitar duplicación de código y mantener consistencia.
+    para evitar duplicación de código y mantener consistencia. Durante una
+    petición HTTP el registro se guarda al terminar la vista, junto con los
+    demás de la misma petición, y se descarta si la vista falla (ver
+    ``AuditBufferMiddleware``).
 
     Args:
         usuario: Usuario que realiza la acción
@@ -38,44 +104,108 @@ def registrar_log_auditoria(
         ...     meta={'articulo_id': 123}
         ... )
     """
+    registrar_logs_auditoria(usuario, accion_glosa, [descripcion], request, [meta])
+
+
+def registrar_logs_auditoria(
+    usuario: User,
+    accion_glosa: str,
+    descripciones: Iterable[str],
+    request: HttpRequest,
+    metas: Optional[Iterable[Optional[dict]]] = None
+) -> None:
+    """
+    Registra varios eventos de una misma acción en el log de auditoría.
+
+    Pensada para operaciones sobre muchos registros (importaciones,
+    actualizaciones masivas): la acción, la IP y el user-agent se resuelven
+    una vez y los logs se insertan con ``bulk_create``, sin señales por fila.
+    Durante una petición HTTP se suman al lote de ``AuditBufferMiddleware``.
+
+    Si ``settings.AUDIT_SAMPLE_RATES`` define una tasa menor a 1 para la
+    acción, cada evento se guarda con esa probabilidad.
+
+    Args:
+        usuario: Usuario que realiza la acción
+        accion_glosa: Código de la acción (ej: 'CREAR', 'IMPORTAR')
+        descripciones: Una descripción por evento
+        request: Objeto HttpRequest para obtener IP y user-agent
+        metas: Información adicional por evento, en el mismo orden que
+            ``descripciones`` (opcional)
+
+    Returns:
+        None
+
+    Example:
+        >>> registrar_logs_auditoria(
+        ...     request.user,
+        ...     'IMPORTAR',
+        ...     [f'Importó tipo {t.codigo}' for t in tipos],
+        ...     request,
+        ...     metas=[{'tipo_id': t.pk} for t in tipos],
+        ... )
+    """
+    # Las peticiones anónimas (AnonymousUser) no generan auditoría; los
+    # eventos sin usuario que sí se registran (login fallido, logout de una
+    # sesión ya expirada) llegan con usuario=None.
+    if usuario is not None and not usuario.is_authenticated:
+        return
+
     # Import dentro de la función para evitar dependencias circulares
-    from apps.accounts.models import AuthLogs, AuthLogAccion
-    from .http import get_client_ip
+    from apps.accounts.middleware import AUDIT_BATCH_SIZE
+    from apps.accounts.models import AuthLogs
 
     try:
-        # Obtener o crear la acción
-        accion, created = AuthLogAccion.objects.get_or_create(
-            glosa=accion_glosa.upper(),
-            defaults={'activo': True}
-        )
+        glosa = accion_glosa.upper()
+
+        # Muestreo opcional de acciones de bajo valor (AUDIT_SAMPLE_RATES)
+        tasa = settings.AUDIT_SAMPLE_RATES.get(glosa, 1.0)
+        if tasa <= 0:
+            return
 
         # Obtener IP del cliente
         ip_usuario = get_client_ip(request)
 
-        # Obtener user agent
-        agente = request.META.get('HTTP_USER_AGENT', '')
-
-        # Crear el log
-        AuthLogs.objects.create(
-            usuario=usuario,
-            accion=accion,
-            descripcion=descripcion,
-            ip_usuario=ip_usuario,
-            agente=agente,
-            meta=meta
-        )
+        # Obtener user agent (user_login_failed puede llegar sin request)
+        agente = request.META.get('HTTP_USER_AGENT', '') if request is not None else ''
+
+        logs = [
+            AuthLogs(
+                usuario=usuario,
+                descripcion=descripcion,
+                ip_usuario=ip_usuario,
+                agente=agente,
+                # Sin metadatos se guarda NULL y no se serializa un '{}'
+                meta=meta or None
+            )
+            for descripcion, meta in zip(
+                descripciones, repeat(None) if metas is None else metas
+            )
+            if tasa >= 1.0 or random.random() < tasa
+        ]
+
+        # Dentro de una petición, AuditBufferMiddleware resuelve la acción e
+        # inserta los logs en lote al terminar la vista; fuera de ella se
+        # crean de inmediato
+        buffer = getattr(request, '_audit_buffer', None)
+        if buffer is not None:
+            buffer.extend((glosa, log) for log in logs)
+        elif logs:
+            accion_id = obtener_accion_id(glosa)
+            for log in logs:
+                log.accion_id = accion_id
+            AuthLogs.objects.bulk_create(logs, batch_size=AUDIT_BATCH_SIZE)
 
-    except Exception as e:
+    except DatabaseError as e:
         # Log silencioso - no queremos que falle la operación principal
-        # por un error en el logging
-        import logging
-        logger = logging.getLogger(__name__)
+        # por un error de la base de datos al registrar el log. Los errores
+        # de programación se propagan para no quedar ocultos.
         logger.error(
-            f"Error al registrar log de auditoría: {str(e)}",
-            exc_info=True,
+            "Error al registrar log de auditoría: %s",
+            e,
+            exc_info=registrar_traza(e),
             extra={
-                'usuario': usuario.username if usuario else 'None',
+                'usuario': getattr(usuario, 'username', 'None'),
                 'accion': accion_glosa,
-                'descripcion': descripcion
             }
         )
@@ -0,0 +1,36 @@
+"""
+Utilidades para operaciones masivas del ORM.
+
+``bulk_create``, ``bulk_update`` y ``QuerySet.update()`` no pasan por
+``save()`` ni emiten ``post_save``; los receivers de auditoría e invalidación
+de cache dependen de esa señal, así que las rutas masivas la emiten con
+``emitir_post_save``.
+"""
+
+from typing import Iterable, Optional
+
+from django.db.models import Model
+from django.db.models.signals import post_save
+
+
+def emitir_post_save(
+    modelo: type[Model],
+    instancias: Iterable[Model],
+    created: bool,
+    update_fields: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Emite ``post_save`` por cada instancia guardada en una operación masiva.
+
+    Args:
+        modelo: Modelo que se envía como ``sender``
+        instancias: Instancias ya persistidas
+        created: ``True`` tras un ``bulk_create``
+        update_fields: Campos actualizados, como en ``save(update_fields=...)``
+    """
+    campos = frozenset(update_fields) if update_fields is not None else None
+    for instancia in instancias:
+        post_save.send(
+            sender=modelo, instance=instancia, created=created,
+            update_fields=campos, raw=False, using=instancia._state.db
+        )
@@ -5,6 +5,7 @@ Provee usuarios por rol, cliente autenticado y helpers de permisos.
 """
 import pytest
 from django.contrib.auth.models import User, Group, Permission
+from django.core.cache import cache
 from django.test import Client
 
 
@@ -29,6 +30,14 @@ def _asignar_permisos(user, codenames: list[str]):
     user.save()
 
 
+@pytest.fixture(autouse=True)
+def _limpiar_cache():
+    """Evita que catálogos cacheados sobrevivan al rollback entre pruebas."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 # ============================================================
 # FIXTURES DE USUARIOS POR ROL
 # ============================================================
@@ -6,7 +6,10 @@ from django.contrib.auth.models import Permission, User
 from apps.accounts.models import AccessScope
 from apps.bodega.models import Articulo, Bodega, Categoria, UnidadMedida
 from apps.solicitudes.models import Area, Departamento, EstadoSolicitud, Solicitud, TipoSolicitud
-from core.authz import scope_articulos_for_user, scope_solicitudes_for_user
+from core.authz import (
+    annotate_permisos, permission_checker, request_permission_checker, scope_articulos_for_user,
+    scope_solicitudes_for_user,
+)
 
 
 @pytest.mark.django_db
@@ -118,3 +121,119 @@ def test_scope_articulos_without_view_permission_returns_none():
     result = scope_articulos_for_user(Articulo.objects.all(), user)
 
     assert result.count() == 0
+
+
+@pytest.mark.django_db
+def test_annotate_permisos_resuelve_permiso_por_grupo_y_estado():
+    from django.contrib.auth.models import Group
+
+    aprobador = User.objects.create_user(username='aprobador-annot', password='x')
+    sin_permiso = User.objects.create_user(username='sin-permiso-annot', password='x')
+    grupo = Group.objects.create(name='Aprobadores annot')
+    grupo.permissions.add(
+        Permission.objects.get(codename='aprobar_solicitudes', content_type__app_label='solicitudes')
+    )
+    aprobador.groups.add(grupo)
+
+    tipo = TipoSolicitud.objects.create(codigo='TIP-A', nombre='Normal')
+    pendiente = EstadoSolicitud.objects.create(codigo='PEN-A', nombre='Pendiente', es_inicial=True)
+    cerrada = EstadoSolicitud.objects.create(codigo='CER-A', nombre='Cerrada', es_final=True)
+    abierta = Solicitud.objects.create(
+        tipo='ARTICULO', numero='SOL-A1', fecha_requerida=datetime.date.today(),
+        tipo_solicitud=tipo, estado=pendiente, solicitante=sin_permiso, motivo='Materiales',
+    )
+    Solicitud.objects.create(
+        tipo='ARTICULO', numero='SOL-A2', fecha_requerida=datetime.date.today(),
+        tipo_solicitud=tipo, estado=cerrada, solicitante=sin_permiso, motivo='Materiales',
+    )
+
+    con_permiso = dict(annotate_permisos(Solicitud.objects.all(), aprobador).values_list('numero', 'puede_aprobar'))
+    sin = dict(annotate_permisos(Solicitud.objects.all(), sin_permiso).values_list('numero', 'puede_aprobar'))
+
+    assert con_permiso == {abierta.numero: True, 'SOL-A2': False}
+    assert sin == {abierta.numero: False, 'SOL-A2': False}
+
+    # Como has_perm: un usuario inactivo no conserva los permisos de su grupo
+    aprobador.is_active = False
+    aprobador.save()
+    aprobador = User.objects.get(pk=aprobador.pk)
+    inactivo = dict(annotate_permisos(Solicitud.objects.all(), aprobador).values_list('numero', 'puede_aprobar'))
+    assert inactivo == {abierta.numero: False, 'SOL-A2': False}
+
+
+@pytest.mark.django_db
+def test_permission_checker_equivale_a_has_perm(django_assert_num_queries):
+    from django.contrib.auth.models import Group
+
+    usuario = User.objects.create_user(username='checker', password='x')
+    grupo = Group.objects.create(name='Despachadores checker')
+    grupo.permissions.add(
+        Permission.objects.get(codename='despachar_solicitudes', content_type__app_label='solicitudes')
+    )
+    usuario.groups.add(grupo)
+    usuario.user_permissions.add(
+        Permission.objects.get(codename='view_solicitud', content_type__app_label='solicitudes')
+    )
+    usuario = User.objects.get(pk=usuario.pk)
+    inactivo = User.objects.create_user(username='checker-inactivo', password='x', is_active=False)
+    admin = User.objects.create_superuser(username='checker-admin', password='x')
+    perms = ['solicitudes.despachar_solicitudes', 'solicitudes.view_solicitud', 'solicitudes.aprobar_solicitudes']
+
+    with django_assert_num_queries(2):  # permisos directos + por grupo
+        tiene = permission_checker(usuario)
+        resultado = [tiene(perm) for perm in perms]
+
+    assert resultado == [usuario.has_perm(perm) for perm in perms] == [True, True, False]
+    assert not any(permission_checker(inactivo)(perm) for perm in perms)
+    assert all(permission_checker(admin)(perm) for perm in [*perms, 'app.inexistente'])
+
+
+@pytest.mark.django_db
+def test_mixins_de_permisos_comparten_conjunto_de_la_peticion(rf, django_assert_num_queries):
+    from apps.solicitudes.mixins import (
+        AprobarSolicitudesPermissionMixin, GestionSolicitudesPermissionMixin,
+    )
+
+    usuario = User.objects.create_user(username='mixin-perms', password='x')
+    usuario.user_permissions.add(
+        Permission.objects.get(codename='aprobar_solicitudes', content_type__app_label='solicitudes')
+    )
+    request = rf.get('/')
+    request.user = User.objects.get(pk=usuario.pk)
+
+    aprobar, gestion = AprobarSolicitudesPermissionMixin(), GestionSolicitudesPermissionMixin()
+    aprobar.request = gestion.request = request
+
+    with django_assert_num_queries(2):  # permisos directos + por grupo, una sola vez
+        assert aprobar.has_permission()
+        assert not gestion.has_permission()
+        assert request_permission_checker(request)('solicitudes.aprobar_solicitudes')
+
+
+@pytest.mark.django_db
+def test_anonimo_va_al_login_sin_consultar_la_solicitud(client, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        editar = client.get('/solicitudes/1/editar/')
+        gestion = client.get('/solicitudes/gestion/')
+
+    assert editar.status_code == gestion.status_code == 302
+    assert 'next=/solicitudes/1/editar/' in editar.url
+    assert 'next=/solicitudes/gestion/' in gestion.url
+
+
+@pytest.mark.django_db
+def test_vista_auditada_reutiliza_permisos_de_la_peticion(rf, django_assert_num_queries):
+    from apps.solicitudes.views import TipoSolicitudListView
+
+    usuario = User.objects.create_user(username='mantenedor-perms', password='x')
+    usuario.user_permissions.add(
+        Permission.objects.get(codename='view_tiposolicitud', content_type__app_label='solicitudes')
+    )
+    request = rf.get('/solicitudes/tipos/')
+    request.user = User.objects.get(pk=usuario.pk)
+    vista = TipoSolicitudListView()
+    vista.setup(request)
+
+    with django_assert_num_queries(2):  # permisos directos + por grupo
+        assert vista.has_permission()
+        assert not request_permission_checker(request)('solicitudes.add_tiposolicitud')
@@ -112,6 +112,15 @@ class TestGenerarCodigoUnico:
         codigo_aaa = generar_codigo_unico("AAA", Ubicacion, "codigo", 6)
         assert codigo_aaa == "AAA-000003"
 
+    @pytest.mark.unit
+    def test_maximo_numerico_en_una_consulta(self, django_assert_num_queries):
+        """El máximo no depende del relleno con ceros y se lee en una consulta."""
+        Ubicacion.objects.create(codigo="PAD-9", nombre="Sala 9")
+        Ubicacion.objects.create(codigo="PAD-000010", nombre="Sala 10")
+        with django_assert_num_queries(1):
+            codigo = generar_codigo_unico("PAD", Ubicacion, "codigo", 6)
+        assert codigo == "PAD-000011"
+
     @pytest.mark.unit
     def test_longitud_personalizada(self):
         """Respeta el parámetro `longitud` para el zero-padding."""
@@ -161,3 +161,22 @@ class TestVistasHTTPBajas:
     def test_admin_accede_motivos_baja(self, client_admin):
         resp = client_admin.get("/bajas-inventario/motivos/")
         assert resp.status_code == 200
+
+    def test_admin_elimina_baja_por_post(
+        self, client_admin, activo_test, motivo_baja_obsoleto, ubicacion_test, u_admin
+    ):
+        baja = crear_baja(activo_test, motivo_baja_obsoleto, ubicacion_test, u_admin)
+        resp = client_admin.post(f"/bajas-inventario/{baja.pk}/eliminar/")
+        assert resp.status_code == 302
+        assert not BajaInventario.objects.filter(pk=baja.pk).exists()
+
+    def test_borrado_logico_de_baja_no_toca_el_activo_referenciado(
+        self, client_admin, activo_test, motivo_baja_obsoleto, ubicacion_test, u_admin
+    ):
+        # En BajaInventario ``activo`` es la FK al activo dado de baja, no el flag
+        baja = crear_baja(activo_test, motivo_baja_obsoleto, ubicacion_test, u_admin)
+        resp = client_admin.delete(f"/bajas-inventario/{baja.pk}/eliminar/")
+        assert resp.status_code == 302
+        baja.refresh_from_db()
+        assert baja.eliminado
+        assert baja.activo_id == activo_test.pk
@@ -307,6 +307,12 @@ class TestStockAlertas:
         bajo_stock = service.obtener_articulos_bajo_stock()
         assert articulo_sin_stock in bajo_stock
 
+    def test_manager_base_expone_predicados_de_borrado_logico(self, articulo_test):
+        Articulo.objects.filter(pk=articulo_test.pk).update(eliminado=True)
+
+        assert Articulo.objects.filter(pk=articulo_test.pk).exists()
+        assert not Articulo.objects.alive().filter(pk=articulo_test.pk).exists()
+
 
 # ============================================================
 # 5. VISTAS HTTP — BODEGA
@@ -338,6 +344,36 @@ class TestVistasHTTPBodega:
         resp = client_admin.get("/bodega/articulos/crear/")
         assert resp.status_code == 200
 
+    def test_formulario_movimiento_get_no_abre_transaccion(
+        self, client_bodega, monkeypatch
+    ):
+        from contextlib import nullcontext
+        from core import mixins
+
+        llamadas = []
+        monkeypatch.setattr(
+            mixins.transaction, "atomic", lambda *a, **kw: llamadas.append(1) or nullcontext()
+        )
+
+        resp = client_bodega.get("/bodega/movimientos/crear/")
+
+        assert resp.status_code == 200
+        assert llamadas == []
+
+    def test_filtros_de_listado_en_un_solo_filter(self, articulo_test):
+        from core.mixins import FilteredListMixin
+
+        class Filtro(FilteredListMixin):
+            search_fields = ["codigo", "nombre"]
+
+        qs = Filtro().apply_filters(
+            Articulo.objects.all(),
+            {"q": "lápiz", "categoria": articulo_test.categoria, "activo": None},
+        )
+
+        assert list(qs) == [articulo_test]
+        assert str(qs.query).count("WHERE") == 1
+
     def test_bodeguero_ve_detalle_articulo(
         self, client_bodega, articulo_test
     ):